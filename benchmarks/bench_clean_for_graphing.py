@@ -0,0 +1,80 @@
+import os
+import sys
+import time
+import warnings
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+# Set app directory
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "cli_resolve"))
+from utils.export_utils import clean_frame
+
+# INPUTS
+num_res = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+num_years = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+repeats = 3
+
+
+def make_wide_export_frame(num_res, num_years, seed=0):
+    """
+    Returns a synthetic export (as read back from CSV) with num_res resolution columns spanning num_years years.
+    Every third resolution is categorical.
+    """
+    rng = np.random.default_rng(seed)
+    start = date(2000, 1, 1)
+    num_days = (date(2000 + num_years, 1, 1) - start).days
+    data = {"date": [f"{d.month}/{d.day}/{d.year}" for d in (start + timedelta(days=i) for i in range(num_days))]}
+    for i in range(num_res):
+        if i % 3 == 2:
+            data[f"res_{i}"] = rng.choice(np.array(["0", "R", "B", "R,B"], dtype=object), size=num_days)
+        else:
+            data[f"res_{i}"] = rng.integers(0, 2, size=num_days)
+    return pd.DataFrame(data)
+
+
+def legacy_clean_frame(df):
+    """
+    Cleaning logic as it was before vectorization, kept as the baseline for this benchmark.
+    """
+    data_start = 1
+    data_end = len(df.columns) - 1
+    df[['Month', 'Day', 'Year']] = df['date'].str.split('/', expand=True)
+    df['Month'] = df['Month'].astype(int)
+    df['Day'] = df['Day'].astype(int)
+    df['Year'] = df['Year'].astype(int)
+    df.fillna(0, inplace=True)
+    df.replace({'0': 0, '0.0': 0, 'False': 0, False: 0, 'True': 1, True: 1}, inplace=True)
+    resolution_bools = df.iloc[:, data_start:data_end + 1].astype(bool)
+    df['Resolutions Met'] = resolution_bools.sum(axis=1)
+    start = data_start
+    while start < data_end + 1:
+        end = start + 1
+        col_name = df.iloc[:, start:end].columns.values[0]
+        df[f"{col_name}_bool"] = df.iloc[:, start:end].astype(bool)
+        df[f"{col_name}_bool"] = df[f"{col_name}_bool"].astype(int)
+        start += 1
+    return df
+
+
+def best_of(func, df):
+    timings = []
+    for _ in range(repeats):
+        frame = df.copy()
+        t0 = time.perf_counter()
+        func(frame)
+        timings.append(time.perf_counter() - t0)
+    return min(timings)
+
+
+# The legacy implementation fragments the frame on purpose; its PerformanceWarnings are part of what's being measured
+warnings.simplefilter("ignore", pd.errors.PerformanceWarning)
+
+df = make_wide_export_frame(num_res, num_years)
+print(f"*** Cleaning {len(df)} days x {num_res} resolutions (best of {repeats})")
+legacy = best_of(legacy_clean_frame, df)
+vectorized = best_of(clean_frame, df)
+print("{0:20}  {1:.3f}s".format("legacy", legacy))
+print("{0:20}  {1:.3f}s".format("vectorized", vectorized))
+print("{0:20}  {1:.1f}x".format("speedup", legacy / vectorized))
@@ -0,0 +1,74 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+
+# Render graphs off-screen
+os.environ.setdefault("MPLBACKEND", "Agg")
+
+# Set app directory
+benchmarks_dir = os.path.dirname(os.path.abspath(__file__))
+repo_dir = os.path.dirname(benchmarks_dir)
+sys.path.append(os.path.join(repo_dir, "cli_resolve"))
+from synthetic import make_resolutions, write_data_dir
+
+
+def time_render(func, repeats, output):
+    """
+    Renders a graph repeats times with its output silenced, and returns the best time in seconds along with the size of
+    the PDF it saved to output.
+    """
+    from matplotlib import pyplot as plt
+
+    runs = []
+    for _ in range(repeats):
+        plt.close("all")
+        with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+            t0 = time.perf_counter()
+            func()
+            runs.append(time.perf_counter() - t0)
+    plt.close("all")
+    return min(runs), os.path.getsize(output)
+
+
+parser = argparse.ArgumentParser(description="Compare the seaborn and fast renderers on a long synthetic store.")
+parser.add_argument("--resolutions", type=int, default=8, help="number of resolutions (default 8)")
+parser.add_argument("--years", type=int, default=30, help="years of history (default 30)")
+parser.add_argument("--repeats", type=int, default=3)
+parser.add_argument("--seed", type=int, default=0)
+args = parser.parse_args()
+
+from utils.export_utils import build_cleaned_frame, get_years_list
+from utils.graph_utils import RENDERERS, generate_heatmap, generate_minimaps
+
+end_year = 2022
+start_date_str = f"1/1/{end_year - args.years + 1}"
+end_date_str = f"12/31/{end_year}"
+years_list = get_years_list(start_date_str, end_date_str)
+all_res_dict = make_resolutions(num_res=args.resolutions, num_years=args.years, end_year=end_year, seed=args.seed)
+print(f"*** Rendering {args.resolutions} resolutions x {args.years} years (best of {args.repeats})")
+
+cwd = os.getcwd()
+with tempfile.TemporaryDirectory() as workspace:
+    os.chdir(workspace)
+    try:
+        write_data_dir(workspace, all_res_dict)
+        with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+            df = build_cleaned_frame(all_res_dict, start_date_str, end_date_str)
+
+        print("{0:10}  {1:10}  {2:>10}  {3:>10}".format("GRAPH", "RENDERER", "BEST (s)", "PDF (KB)"))
+        for graph, output in [("heatmap", "data/exports/temp_graph.pdf"),
+                              ("minimaps", "data/exports/temp_minimaps.pdf")]:
+            for renderer in RENDERERS:
+                if graph == "heatmap":
+                    def render():
+                        generate_heatmap(df, years_list=years_list, renderer=renderer)
+                else:
+                    def render():
+                        generate_minimaps(df, years_list=years_list, workers=1, columns="all", renderer=renderer)
+                best, size = time_render(render, args.repeats, output)
+                print("{0:10}  {1:10}  {2:10.3f}  {3:10.1f}".format(graph, renderer, best, size / 1024))
+    finally:
+        os.chdir(cwd)
@@ -0,0 +1,56 @@
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+# Set app directory
+benchmarks_dir = os.path.dirname(os.path.abspath(__file__))
+repo_dir = os.path.dirname(benchmarks_dir)
+sys.path.append(os.path.join(repo_dir, "cli_resolve"))
+from synthetic import make_resolutions
+
+parser = argparse.ArgumentParser(description="Compare snapshots with full copies of resolutions.json as backups.")
+parser.add_argument("--resolutions", type=int, default=8, help="number of resolutions (default 8)")
+parser.add_argument("--years", type=int, default=30, help="years of history (default 30)")
+parser.add_argument("--saves", type=int, default=30, help="number of backed up saves, each editing a few days "
+                                                           "(default 30)")
+parser.add_argument("--seed", type=int, default=0)
+args = parser.parse_args()
+
+from utils.snapshots import SnapshotStore
+
+end_year = 2022
+all_res_dict = make_resolutions(num_res=args.resolutions, num_years=args.years, end_year=end_year, seed=args.seed)
+rng = random.Random(args.seed)
+print(f"*** Backing up {args.resolutions} resolutions x {args.years} years over {args.saves} saves")
+
+with tempfile.TemporaryDirectory() as workspace:
+    snapshots = SnapshotStore(f"{workspace}/snapshots")
+    copies_size = 0
+    take_times = []
+    for _ in range(args.saves):
+        # Edit a few recent days between saves, as logging or a small import would
+        for res in rng.sample(list(all_res_dict.values()), 2):
+            day = rng.randint(1, 28)
+            res["data"][f"{rng.randint(1, 12)}/{day}/{end_year}"] = True
+        copies_size += len(json.dumps(all_res_dict, indent=4))
+        t0 = time.perf_counter()
+        # Keep every snapshot, as a copy per save would
+        snapshot_id = snapshots.take(all_res_dict, prune=False)
+        take_times.append(time.perf_counter() - t0)
+    snapshots_size = snapshots.disk_usage()
+    t0 = time.perf_counter()
+    snapshots.load(snapshot_id)
+    restore_time = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    listed = snapshots.list_snapshots()
+    list_time = time.perf_counter() - t0
+
+print("{0:12}  {1:>12}".format("BACKUPS", "SIZE (KB)"))
+print("{0:12}  {1:12.1f}".format("full copies", copies_size / 1024))
+print("{0:12}  {1:12.1f}".format("snapshots", snapshots_size / 1024))
+print(f"*** First snapshot {take_times[0]:.3f}s, later snapshots {min(take_times[1:] or take_times):.3f}s best, "
+      f"restore {restore_time:.3f}s, listing {len(listed)} snapshots {list_time:.3f}s")
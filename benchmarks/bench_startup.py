@@ -0,0 +1,72 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+# Modules that must never be imported just to log resolutions
+HEAVY_MODULES = ["pandas", "numpy", "seaborn", "matplotlib"]
+
+app_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "cli_resolve")
+
+
+def run_with_importtime(args, cwd, stdin=""):
+    """
+    Runs the app with `python -X importtime` and returns (list of imported top-level modules, total import time in s).
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", app_dir] + args,
+        cwd=cwd,
+        input=stdin,
+        capture_output=True,
+        text=True,
+        env={**os.environ, "TERM": os.environ.get("TERM", "dumb")},
+    )
+    modules = []
+    total_us = 0
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        # Top-level imports are the ones that aren't indented under another import
+        if not name[1:].startswith(" "):
+            total_us += int(cumulative)
+        modules.append(name.strip())
+    return modules, total_us / 1e6
+
+
+def make_data_dir(root):
+    """
+    Creates a minimal app data dir with one active resolution under root.
+    """
+    os.makedirs(f"{root}/data")
+    with open(f"{root}/data/resolutions.json", "w") as f:
+        json.dump({
+            "exercise": {
+                "res_descript": "exercise",
+                "res_creation_date": "1/1/2022",
+                "is_active": True,
+                "res_expiration_date": None,
+                "is_binary": True,
+                "res_detail_codes": {},
+                "data": {},
+            }
+        }, f)
+
+
+with tempfile.TemporaryDirectory() as tmp:
+    make_data_dir(tmp)
+    paths = {
+        "log command": (["log", "--date", "1/1/2022", "exercise=Y"], ""),
+        "menu": ([], "q\n"),
+    }
+    failed = False
+    for path, (args, stdin) in paths.items():
+        modules, seconds = run_with_importtime(args, cwd=tmp, stdin=stdin)
+        heavy = sorted({name.split(".")[0] for name in modules if name.split(".")[0] in HEAVY_MODULES})
+        print("{0:20}  {1:.3f}s  {2} modules".format(path, seconds, len(modules)))
+        if heavy:
+            print(f"    FAIL: imported {', '.join(heavy)}")
+            failed = True
+
+sys.exit(1 if failed else 0)
@@ -0,0 +1,255 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+from datetime import datetime
+
+# Render graphs off-screen
+os.environ.setdefault("MPLBACKEND", "Agg")
+
+# Set app directory
+benchmarks_dir = os.path.dirname(os.path.abspath(__file__))
+repo_dir = os.path.dirname(benchmarks_dir)
+sys.path.append(os.path.join(repo_dir, "cli_resolve"))
+from synthetic import make_resolutions, write_data_dir
+
+BENCHMARKS = [
+    "get_active_resolutions",
+    "export_csv",
+    "clean_for_graphing",
+    "generate_heatmap",
+    "generate_minimaps",
+    "backpopulate",
+    "backpopulate_mapping",
+]
+
+
+def time_runs(func, repeats, setup=None):
+    """
+    Runs func repeats times (after calling setup, if given, before each run) with its output silenced, and returns
+    its timings in seconds.
+    """
+    runs = []
+    for _ in range(repeats):
+        if setup:
+            setup()
+        with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+            t0 = time.perf_counter()
+            func()
+            runs.append(time.perf_counter() - t0)
+    return {"best": min(runs), "mean": sum(runs) / len(runs), "runs": runs}
+
+
+def get_backpopulate_answers(df, all_res_dict):
+    """
+    Returns the answers to every prompt backpopulate_data.py asks when importing all columns of the cleaned dataset df
+    into an empty store as new, expired resolutions.
+    """
+    res_cols = [col for col in df.columns[1:] if col in all_res_dict]
+    answers = ["all"]
+    for col in res_cols:
+        is_binary = all_res_dict[col]["is_binary"]
+        # Keep res_id, description, inactive, expired on the last date, binary or not
+        answers += ["Y", f"backpopulated {col}", "N", "Y", "Y" if is_binary else "N"]
+        if not is_binary:
+            # Keep each detail code (and multi-code combination) the first time it comes up
+            for value in df[col].unique():
+                if value not in (0, "0", "0.0") and value == value:
+                    answers += ["Y", f"activity {value}"]
+    return "\n".join(answers) + "\n"
+
+
+def get_backpopulate_mapping(df, all_res_dict):
+    """
+    Returns a mapping file (for backpopulate_data.py --mapping) that imports all columns of the cleaned dataset df the
+    same way as get_backpopulate_answers().
+    """
+    res_cols = [col for col in df.columns[1:] if col in all_res_dict]
+    return {
+        "resolutions": {
+            col: {
+                "description": f"backpopulated {col}",
+                "is_active": False,
+                "expiration": "last",
+                "is_binary": all_res_dict[col]["is_binary"],
+                "codes": {code: f"activity {code}" for code in all_res_dict[col]["res_detail_codes"]},
+            }
+            for col in res_cols
+        }
+    }
+
+
+def run_benchmarks(params, repeats, workers, only=None):
+    """
+    Builds a synthetic store from params in a throwaway workspace and times each benchmark in it.
+    Returns a dict of results keyed by benchmark name.
+    """
+    import pandas as pd
+    from matplotlib import pyplot as plt
+
+    from export import export_csv
+    from utils.export_utils import CLEANED_FORMAT, build_cleaned_frame, clean_for_graphing, get_filename, \
+        get_years_list
+    from utils.graph_utils import generate_heatmap, generate_minimaps
+    from utils.resolution_utils import get_active_resolutions
+
+    all_res_dict = make_resolutions(**params)
+    start_date_str = f"1/1/{params['end_year'] - params['num_years'] + 1}"
+    end_date_str = f"12/31/{params['end_year']}"
+    years_list = get_years_list(start_date_str, end_date_str)
+    export_path = f"data/exports/res_{get_filename(start_date_str)}_{get_filename(end_date_str)}.csv"
+
+    results = {}
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as workspace:
+        os.chdir(workspace)
+        try:
+            write_data_dir(workspace, all_res_dict)
+            benchmarks = only or BENCHMARKS
+
+            def remove_export():
+                if os.path.exists(export_path):
+                    os.remove(export_path)
+
+            if "get_active_resolutions" in benchmarks:
+                results["get_active_resolutions"] = time_runs(get_active_resolutions, repeats)
+            if "export_csv" in benchmarks:
+                results["export_csv"] = time_runs(
+                    lambda: export_csv(start_date_str, end_date_str), repeats, setup=remove_export
+                )
+            if "clean_for_graphing" in benchmarks:
+                if not os.path.exists(export_path):
+                    with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+                        export_csv(start_date_str, end_date_str)
+                results["clean_for_graphing"] = time_runs(
+                    lambda: clean_for_graphing(export_path, file_format=CLEANED_FORMAT), repeats
+                )
+
+            with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+                df = build_cleaned_frame(all_res_dict, start_date_str, end_date_str)
+            if "generate_heatmap" in benchmarks:
+                results["generate_heatmap"] = time_runs(
+                    lambda: generate_heatmap(df, years_list=years_list), repeats, setup=lambda: plt.close("all")
+                )
+            if "generate_minimaps" in benchmarks:
+                results["generate_minimaps"] = time_runs(
+                    lambda: generate_minimaps(df, years_list=years_list, workers=workers, columns="all"), repeats,
+                    setup=lambda: plt.close("all")
+                )
+            plt.close("all")
+
+            if "backpopulate" in benchmarks or "backpopulate_mapping" in benchmarks:
+                # The script runs from the scripts folder against ../data, so it gets its own workspace layout
+                os.makedirs("backpopulate/data/cleaned")
+                os.makedirs("backpopulate/scripts")
+                cleaned_filename = "synthetic.csv"
+                df.to_csv(f"backpopulate/data/cleaned/{cleaned_filename}", index=False)
+                cleaned_df = pd.read_csv(f"backpopulate/data/cleaned/{cleaned_filename}")
+                answers = get_backpopulate_answers(cleaned_df, all_res_dict)
+                mapping_path = f"{workspace}/backpopulate/mapping.json"
+                with open(mapping_path, "w") as f:
+                    json.dump(get_backpopulate_mapping(cleaned_df, all_res_dict), f)
+
+                def reset_store():
+                    write_data_dir(f"{workspace}/backpopulate", {})
+
+                def backpopulate(args=(), stdin=""):
+                    subprocess.run(
+                        [sys.executable, os.path.join(repo_dir, "scripts", "backpopulate_data.py"), cleaned_filename,
+                         *args],
+                        cwd=f"{workspace}/backpopulate/scripts",
+                        input=stdin,
+                        capture_output=True,
+                        text=True,
+                        check=True,
+                    )
+
+                if "backpopulate" in benchmarks:
+                    results["backpopulate"] = time_runs(lambda: backpopulate(stdin=answers), repeats,
+                                                        setup=reset_store)
+                if "backpopulate_mapping" in benchmarks:
+                    results["backpopulate_mapping"] = time_runs(
+                        lambda: backpopulate(args=["--mapping", mapping_path]), repeats, setup=reset_store
+                    )
+        finally:
+            os.chdir(cwd)
+    return results
+
+
+def get_commit():
+    """
+    Returns the short hash of the checked out commit, or None outside of a git checkout.
+    """
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=repo_dir, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_results(results, baseline=None):
+    """
+    Prints the best timing of each benchmark, alongside the timing from a baseline run (if given).
+    """
+    print("{0:24}  {1:>10}  {2:>10}  {3:>8}".format("BENCHMARK", "BEST (s)", "BASELINE", "CHANGE"))
+    for name, result in results.items():
+        row = "{0:24}  {1:10.3f}".format(name, result["best"])
+        if baseline and name in baseline["results"]:
+            old = baseline["results"][name]["best"]
+            row += "  {0:10.3f}  {1:+7.1f}%".format(old, (result["best"] - old) / old * 100)
+        print(row)
+
+
+parser = argparse.ArgumentParser(description="Time the core pipelines against a synthetic store.")
+parser.add_argument("--resolutions", type=int, default=20, help="number of resolutions (default 20)")
+parser.add_argument("--years", type=int, default=5, help="years of history (default 5)")
+parser.add_argument("--binary-ratio", type=float, default=0.5, help="share of binary resolutions (default 0.5)")
+parser.add_argument("--codes", type=int, default=4, help="detail codes per categorical resolution (default 4)")
+parser.add_argument("--seed", type=int, default=0)
+parser.add_argument("--repeats", type=int, default=3)
+parser.add_argument("--workers", type=int, default=1, help="processes to render minimaps with (default 1)")
+parser.add_argument("--only", nargs="+", choices=BENCHMARKS, help="run only these benchmarks")
+parser.add_argument("--output", help="where to save results (default benchmarks/results/{timestamp}.json)")
+parser.add_argument("--compare", metavar="RESULTS", help="results of a previous run to compare against")
+args = parser.parse_args()
+
+params = {
+    "num_res": args.resolutions,
+    "num_years": args.years,
+    "binary_ratio": args.binary_ratio,
+    "num_codes": args.codes,
+    "end_year": 2022,
+    "seed": args.seed,
+}
+print(f"*** Benchmarking {args.resolutions} resolutions x {args.years} years (best of {args.repeats})")
+results = run_benchmarks(params, args.repeats, args.workers, only=args.only)
+
+baseline = None
+if args.compare:
+    with open(args.compare, "r") as f:
+        baseline = json.load(f)
+print_results(results, baseline)
+
+report = {
+    "timestamp": datetime.now().isoformat(timespec="seconds"),
+    "commit": get_commit(),
+    "python": platform.python_version(),
+    "platform": platform.platform(),
+    "params": {**params, "repeats": args.repeats, "workers": args.workers},
+    "results": results,
+}
+output = args.output
+if not output:
+    results_path = os.path.join(benchmarks_dir, "results")
+    if not os.path.exists(results_path):
+        os.makedirs(results_path)
+    output = os.path.join(results_path, f"{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+with open(output, "w") as f:
+    json.dump(report, f, indent=4)
+print(f"*** Saved results to {output}")
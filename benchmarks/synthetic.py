@@ -0,0 +1,64 @@
+import json
+import os
+import random
+import string
+from datetime import date, timedelta
+
+
+def make_resolutions(num_res=20, num_years=5, binary_ratio=0.5, num_codes=4, fill_rate=0.95, multi_code_rate=0.1,
+                     inactive_ratio=0.2, end_year=2022, seed=0):
+    """
+    Returns a synthetic dict of all resolutions, in the same format as data/resolutions.json.
+
+    num_res resolutions are logged daily across num_years years of history ending on 12/31/{end_year}. The first
+    binary_ratio of them are binary and the rest are categorical, each with num_codes detail codes (with multi_code_rate
+    of logged categorical days recording two codes, e.g. "R,B"). Each resolution was logged on fill_rate of its days,
+    and the last inactive_ratio of resolutions expired on 12/31/{end_year}.
+    """
+    rng = random.Random(seed)
+    start = date(end_year - num_years + 1, 1, 1)
+    end = date(end_year, 12, 31)
+    days = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+    date_strs = [f"{d.month}/{d.day}/{d.year}" for d in days]
+    codes = string.ascii_uppercase[:num_codes]
+
+    num_binary = round(num_res * binary_ratio)
+    num_active = num_res - round(num_res * inactive_ratio)
+    all_res_dict = {}
+    for i in range(num_res):
+        is_binary = i < num_binary
+        # Each resolution favors a different rate of success so that heatmaps aren't uniform noise
+        success_rate = rng.uniform(0.3, 0.9)
+        data = {}
+        for date_str in date_strs:
+            if rng.random() > fill_rate:
+                continue
+            met = rng.random() < success_rate
+            if is_binary or not met:
+                data[date_str] = met
+            elif num_codes > 1 and rng.random() < multi_code_rate:
+                data[date_str] = ",".join(rng.sample(codes, 2))
+            else:
+                data[date_str] = rng.choice(codes)
+        all_res_dict[f"res_{i}"] = {
+            "res_descript": f"synthetic resolution {i}",
+            "res_creation_date": date_strs[0],
+            "is_active": i < num_active,
+            "res_expiration_date": None if i < num_active else date_strs[-1],
+            "is_binary": is_binary,
+            "res_detail_codes": {} if is_binary else {code: f"activity {code}" for code in codes},
+            "data": data,
+        }
+    return all_res_dict
+
+
+def write_data_dir(root, all_res_dict):
+    """
+    Creates an app data dir under root holding all_res_dict as data/resolutions.json, and returns its path.
+    """
+    data_dir = os.path.join(root, "data")
+    if not os.path.exists(data_dir):
+        os.makedirs(data_dir)
+    with open(os.path.join(data_dir, "resolutions.json"), "w") as f:
+        json.dump(all_res_dict, f, indent=4)
+    return data_dir
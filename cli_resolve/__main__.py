@@ -1,7 +1,23 @@
+import os
+import sys
+
+# Make the app's modules importable when run as a package (`python -m cli_resolve`) as well as a directory
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from commands import get_parser, run_command
 from menu import Menu
+from utils import profiling
+from utils.log_utils import configure_logging
 
 
 def main():
+    args = get_parser().parse_args()
+    configure_logging(1 if args.verbose else -1 if args.quiet else 0)
+    if args.profile:
+        profiling.enable(args.profile, args.profile_output)
+    # Run a single command non-interactively if one is given (e.g. from cron), otherwise show the menu
+    if args.command:
+        sys.exit(run_command(args))
     while True:
         menu = Menu()
         menu.print_menu()
@@ -0,0 +1,229 @@
+import argparse
+import os
+import sys
+
+from utils.input_utils import format_detail_codes, parse_boolean_string, parse_date_string, parse_detail_codes
+from utils.profiling import PROFILE_FORMATS
+from utils.resolution_utils import expire_resolutions, get_active_resolutions, get_all_resolutions, toggle_resolution
+from utils.snapshots import KEEP_DAILY, KEEP_LAST, KEEP_MONTHLY
+from utils.storage import get_store
+
+# Exit codes
+EXIT_OK = 0
+EXIT_ERROR = 1
+
+
+def log_command(args):
+    """
+    Logs values for active resolutions on a given date, e.g. `log --date 1/5/2022 exercise=Y skincare=N`.
+    Resolutions that aren't mentioned are left as they are.
+    """
+    log_date = parse_date_string(args.date)
+    if log_date is None:
+        raise ValueError("Cannot log resolutions for date=never")
+
+    all_res_dict = get_all_resolutions()
+    expired_res = expire_resolutions(all_res_dict)
+    active_res = get_active_resolutions(all_res_dict)
+
+    entries = []
+    for entry in args.entries:
+        res_id, sep, value = entry.partition("=")
+        if not sep:
+            raise ValueError(f"Invalid entry={entry}; entries should be in the form of 'res_id=value'")
+        if res_id not in active_res:
+            raise ValueError(f"No active resolution with res_id={res_id}")
+        res = active_res[res_id]
+        if res["is_binary"]:
+            response = parse_boolean_string(value)
+        elif value.upper() == "N":
+            response = False
+        else:
+            # New detail codes need a description, so they can only be added interactively
+            undefined = [code for code in parse_detail_codes(value) if code not in res["res_detail_codes"]]
+            if undefined:
+                raise ValueError(f"Undefined detail code(s) {undefined} for res_id={res_id}; "
+                                 f"log them interactively first to define them")
+            response = format_detail_codes(value)
+        entries.append((res_id, log_date, response))
+
+    for res_id, date_str, response in entries:
+        active_res[res_id]["data"][date_str] = response
+        print(f"*** Logged {res_id}={response} for {date_str}")
+    logged_res = {res_id: active_res[res_id] for res_id, _, _ in entries}
+    get_store().update(resolutions={**expired_res, **logged_res}, entries=entries)
+    return EXIT_OK
+
+
+def export_csv_command(args):
+    """
+    Exports a CSV of app data from START to END (or brings an existing export up to date with --incremental).
+    """
+    # Each command imports what it needs when it runs, so that logging never loads the graphing stack
+    from export import write_csv_export
+    from utils.export_utils import get_filename
+
+    start_date_str = parse_date_string(args.start, year_start=True)
+    end_date_str = parse_date_string(args.end, year_end=True)
+    filepath = f"data/exports/res_{get_filename(start_date_str)}_{get_filename(end_date_str)}.csv"
+    if os.path.exists(filepath) and not args.force and not args.incremental:
+        print(f"There is already a CSV file for start={start_date_str} end={end_date_str}; "
+              f"use --force to save over it", file=sys.stderr)
+        return EXIT_ERROR
+    if not write_csv_export(start_date_str, end_date_str, incremental=args.incremental):
+        return EXIT_ERROR
+    return EXIT_OK
+
+
+def graph_command(args):
+    """
+    Exports a heatmap (and optionally minimaps) of app data from START to END.
+    """
+    from export import graph_resolutions
+
+    start_date_str = parse_date_string(args.start, year_start=True)
+    end_date_str = parse_date_string(args.end, year_end=True)
+    if not graph_resolutions(start_date_str, end_date_str, event_type=args.events,
+                             export_minimaps=args.minimaps is not None, minimap_columns=args.minimaps,
+                             workers=args.workers, renderer=args.renderer):
+        return EXIT_ERROR
+    if args.show:
+        import matplotlib.pyplot as plt
+        plt.show()
+    return EXIT_OK
+
+
+def toggle_command(args):
+    """
+    Flips the active status of a resolution.
+    """
+    all_res_dict = get_all_resolutions()
+    if args.res_id not in all_res_dict:
+        raise ValueError(f"No resolution with res_id={args.res_id}")
+    res_expiration_date = parse_date_string(args.expires)
+    res = toggle_resolution(all_res_dict[args.res_id], res_expiration_date)
+    get_store().update(resolutions={args.res_id: res})
+    status = "active" if res["is_active"] else "inactive"
+    print(f"*** Toggled {args.res_id} to {status} (expires: {res['res_expiration_date'] or 'never'})")
+    return EXIT_OK
+
+
+def snapshots_list_command(args):
+    """
+    Lists the snapshots of app data, oldest first.
+    """
+    store = get_store()
+    summaries = store.snapshots.list_snapshots()
+    if not summaries:
+        print("No snapshots yet")
+        return EXIT_OK
+    print("{0:24}  {1:19}  {2:>11}  {3:>7}  {4}".format("ID", "CREATED", "RESOLUTIONS", "ENTRIES", "LABEL"))
+    for summary in summaries:
+        print("{0:24}  {1:19}  {2:11}  {3:7}  {4}".format(summary["id"], summary["created"],
+                                                          summary["num_resolutions"], summary["num_entries"],
+                                                          summary["label"] or ""))
+    print(f"*** {len(summaries)} snapshots taking up {store.snapshots.disk_usage() / 1024:.1f} KB")
+    return EXIT_OK
+
+
+def snapshots_restore_command(args):
+    """
+    Replaces app data with a snapshot (after snapshotting the current data, so the restore can be undone).
+    """
+    store = get_store()
+    store.restore(args.snapshot_id)
+    print(f"*** Restored snapshot {args.snapshot_id}")
+    return EXIT_OK
+
+
+def snapshots_prune_command(args):
+    """
+    Deletes the snapshots that fall outside of the retention policy.
+    """
+    pruned = get_store().snapshots.prune(keep_last=args.keep_last, keep_daily=args.keep_daily,
+                                         keep_monthly=args.keep_monthly)
+    print(f"*** Pruned {len(pruned)} snapshots")
+    return EXIT_OK
+
+
+def get_parser():
+    """
+    Returns the argument parser for running Resolve without the interactive menu.
+    """
+    parser = argparse.ArgumentParser(
+        prog="cli_resolve",
+        description="Run without a command to use the interactive menu.",
+    )
+    verbosity = parser.add_mutually_exclusive_group()
+    verbosity.add_argument("-v", "--verbose", action="store_true",
+                           help="show everything that is read along the way (e.g. each day of each exported resolution)")
+    verbosity.add_argument("-q", "--quiet", action="store_true", help="don't report progress")
+    parser.add_argument("--profile", choices=PROFILE_FORMATS,
+                        help="time each stage (and track peak memory): print a breakdown on exit ('text') or save it "
+                             "as JSON or as a Chrome trace")
+    parser.add_argument("--profile-output", metavar="PATH",
+                        help="where to save a JSON or Chrome trace profile (default data/exports/profile*.json)")
+    subparsers = parser.add_subparsers(dest="command")
+
+    log_parser = subparsers.add_parser("log", help="log resolutions for a day")
+    log_parser.add_argument("entries", nargs="+", metavar="res_id=value",
+                            help="Y/N for binary resolutions; N or detail codes (e.g. R,B) for the rest")
+    log_parser.add_argument("--date", default="today", help="'MM/DD/YYYY' or 'today' (default)")
+    log_parser.set_defaults(func=log_command)
+
+    range_help = "'MM/DD/YYYY', or a year on its own"
+    export_parser = subparsers.add_parser("export-csv", help="export app data as a CSV")
+    export_parser.add_argument("start", help=range_help)
+    export_parser.add_argument("end", help=range_help)
+    export_parser.add_argument("--force", action="store_true", help="save over an existing export")
+    export_parser.add_argument("--incremental", action="store_true",
+                               help="bring an existing export up to date by only writing the days since the last "
+                                    "day it held data for, instead of rewriting it when possible")
+    export_parser.set_defaults(func=export_csv_command)
+
+    graph_parser = subparsers.add_parser("graph", help="export heatmaps of app data")
+    graph_parser.add_argument("start", help=range_help)
+    graph_parser.add_argument("end", help=range_help)
+    graph_parser.add_argument("--events", help="type of events to overlay (e.g. trips)")
+    graph_parser.add_argument("--minimaps", metavar="COLUMNS",
+                              help="comma-separated resolutions to create minimaps from, or 'all', 'binary', "
+                                   "'nonbinary'")
+    graph_parser.add_argument("--workers", type=int, help="number of processes to render minimaps with")
+    graph_parser.add_argument("--renderer", help="how to draw graphs: 'seaborn' (default) or 'fast', which draws each "
+                                                 "graph as an image and is much quicker for long date ranges")
+    graph_parser.add_argument("--show", action="store_true", help="open the graphs once exported")
+    graph_parser.set_defaults(func=graph_command)
+
+    toggle_parser = subparsers.add_parser("toggle", help="toggle whether a resolution is active")
+    toggle_parser.add_argument("res_id")
+    toggle_parser.add_argument("--expires", default="never",
+                               help="expiration date when toggling to active ('MM/DD/YYYY' or 'never' (default))")
+    toggle_parser.set_defaults(func=toggle_command)
+
+    snapshots_parser = subparsers.add_parser("snapshots", help="list, restore or prune snapshots of app data")
+    snapshots_subparsers = snapshots_parser.add_subparsers(dest="snapshots_command", required=True)
+    snapshots_subparsers.add_parser("list", help="list snapshots, oldest first").set_defaults(
+        func=snapshots_list_command)
+    restore_parser = snapshots_subparsers.add_parser("restore", help="replace app data with a snapshot")
+    restore_parser.add_argument("snapshot_id", help="id of the snapshot (see `snapshots list`)")
+    restore_parser.set_defaults(func=snapshots_restore_command)
+    prune_parser = snapshots_subparsers.add_parser("prune", help="delete snapshots outside of the retention policy")
+    prune_parser.add_argument("--keep-last", type=int, default=KEEP_LAST,
+                              help=f"number of most recent snapshots to keep (default {KEEP_LAST})")
+    prune_parser.add_argument("--keep-daily", type=int, default=KEEP_DAILY,
+                              help=f"number of most recent days to keep a snapshot of (default {KEEP_DAILY})")
+    prune_parser.add_argument("--keep-monthly", type=int, default=KEEP_MONTHLY,
+                              help=f"number of most recent months to keep a snapshot of (default {KEEP_MONTHLY})")
+    prune_parser.set_defaults(func=snapshots_prune_command)
+    return parser
+
+
+def run_command(args):
+    """
+    Runs the command parsed into args non-interactively and returns its exit code.
+    """
+    try:
+        return args.func(args)
+    except (ValueError, FileNotFoundError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return EXIT_ERROR
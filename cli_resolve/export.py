@@ -1,7 +1,9 @@
+from utils.date_utils import date_string_to_ordinal, ordinal_to_date_string
 from utils.resolution_utils import get_all_resolutions
 from utils.export_utils import *
-from utils.graph_utils import *
+from utils.input_utils import *
 from utils.menu_utils import *
+from utils.profiling import profiled, span
 
 INSTRUCTIONS = "Enter the start and end dates ('MM/DD/YYYY') for which you would like to make an export.\n" \
                "--if you specify only the year, all data from that year will be included\n" \
@@ -14,7 +16,7 @@ def export_csv(start_date_str=None, end_date_str=None):
     Export CSV from app data.
     """
     print("*** Exporting CSV")
-    # User input is requested if this function is not called from export_graph()
+    # User input is requested if no date range is passed in
     if not start_date_str or not end_date_str:
         print(f"INSTRUCTIONS: {INSTRUCTIONS}")
         start_date_str = handle_input(prompt="start date: ", response_type="datestring", year_start=True)
@@ -30,56 +32,76 @@ def export_csv(start_date_str=None, end_date_str=None):
         if not override:
             return go_home_message()
 
+    if not write_csv_export(start_date_str, end_date_str):
+        return go_home_message()
+
+
+@profiled("export csv")
+def write_csv_export(start_date_str, end_date_str, incremental=False):
+    """
+    Export CSV from app data for the provided date range, without asking for any user input.
+    Returns False if there was no data to export.
+
+    In incremental mode, if there's already an export for the range with the same columns, only the rows after the last
+    day it held data for are rewritten (see get_appendable_ordinal()); otherwise the export is rewritten in full. Both
+    modes write a row for every day of the range.
+    """
+    fname_start = get_filename(start_date_str)
+    fname_end = get_filename(end_date_str)
     print(f"*** Exporting data: {start_date_str} - {end_date_str}")
 
     # Get a list of the resolutions that have any data within the time range of interest
-    curr_date_str = start_date_str
-    curr_date = datetime.strptime(curr_date_str, "%m/%d/%Y")
-    end_date = datetime.strptime(end_date_str, "%m/%d/%Y")
+    start_ordinal = date_string_to_ordinal(start_date_str)
+    end_ordinal = date_string_to_ordinal(end_date_str)
 
-    all_res_dict = get_all_resolutions()
+    with span("load resolutions"):
+        all_res_dict = get_all_resolutions()
 
     fieldnames = ["date"]
-    res_fields = get_res_fieldnames(all_res_dict, start_date_str, end_date)
+    res_fields = get_res_fieldnames(all_res_dict, start_ordinal, end_ordinal)
     if len(res_fields) < 1:
         print(f"Found no data from {start_date_str} to {end_date_str}")
-        return go_home_message()
+        return False
     fieldnames = fieldnames + res_fields
 
-    write_new_csv_with_header(fieldnames, fname_start, fname_end)
-    # Go through all the resolutions that have some data for the date range and write the CSV row-by-row
-    while curr_date <= end_date:
-        curr_data = {"date": curr_date_str}
-        for res in res_fields:
-            log_data = all_res_dict[res]["data"]
-            try:
-                data_on_date = log_data[curr_date_str]
-                if data_on_date is False:
-                    datapoint = {res: 0}
-                elif data_on_date is True:
-                    datapoint = {res: 1}
-                else:  # non-boolean value
-                    datapoint = {res: data_on_date}
-                print(f"*** Data found for resolution={res} on date={curr_date_str}!")
-            except KeyError:
-                print(f"resolution={res} does not have data for date={curr_date_str}, recording as 0")
-                datapoint = {res: 0}
-            curr_data.update(datapoint)
-        write_res_row(fieldnames, curr_data, fname_start, fname_end)
-        curr_date += timedelta(days=1)
-        curr_date_str = datetime.strftime(curr_date, "%-m/%-d/%Y")
+    filepath = f"data/exports/res_{fname_start}_{fname_end}.csv"
+    last_ordinal = get_last_data_ordinal(all_res_dict, res_fields, start_ordinal, end_ordinal)
+    appendable_ordinal = None
+    if incremental:
+        with span("check existing export"):
+            appendable_ordinal = get_appendable_ordinal(filepath, all_res_dict, res_fields, start_ordinal, end_ordinal)
+
+    if appendable_ordinal is not None and appendable_ordinal >= last_ordinal:
+        print(f"*** {filepath} is already up to date")
+        return True
+    # Rows after the high-water mark hold no data yet, so they can be cut off and written again with the new days
+    if appendable_ordinal is not None and truncate_export_rows(filepath, end_ordinal - appendable_ordinal,
+                                                               ordinal_to_date_string(appendable_ordinal)):
+        print(f"*** Appending {last_ordinal - appendable_ordinal} day(s) of new data to {filepath}")
+        with span("append rows"), open_export_appender(filepath, fieldnames) as writer:
+            for row in iter_export_rows(all_res_dict, res_fields, appendable_ordinal + 1, end_ordinal):
+                writer.writerow(row)
+    else:
+        # Go through all the resolutions that have some data for the date range and stream the CSV row-by-row
+        with span("write rows"), open_export_writer(fieldnames, fname_start, fname_end) as writer:
+            for row in iter_export_rows(all_res_dict, res_fields, start_ordinal, end_ordinal):
+                writer.writerow(row)
+    write_export_meta(filepath, all_res_dict, res_fields, start_ordinal, end_ordinal, last_ordinal)
+    return True
 
 
 def export_graph():
     """
     Generate and export heatmaps from app data.
     """
+    # The graphing stack (pandas, seaborn, matplotlib) is only loaded once a graph is requested
+    from utils.graph_utils import export_graph_from_file, plt
+
     print(f"INSTRUCTIONS: {INSTRUCTIONS}{GRAPH_INSTRUCTIONS}")
     start_date_str = handle_input(prompt="start date: ", response_type="datestring", year_start=True)
     if start_date_str == "file":
         return export_graph_from_file()
     end_date_str = handle_input(prompt="end date: ", response_type="datestring", year_end=True)
-    years_list = get_years_list(start_date_str, end_date_str)
 
     display_events = handle_input(prompt="Do you want event data overlaid on this graph? (Y/N): ",
                                   response_type="boolean")
@@ -90,34 +112,37 @@ def export_graph():
     export_minimaps = handle_input(prompt="Do you want minimaps for select resolutions? (Y/N): ",
                                    response_type="boolean")
 
-    fname_start = get_filename(start_date_str)
-    fname_end = get_filename(end_date_str)
+    if not graph_resolutions(start_date_str, end_date_str, event_type=event_type, export_minimaps=export_minimaps):
+        return go_home_message()
+    plt.show()
 
-    # Generate graph from existing cleaned CSV, or export a CSV first and then generate graph
-    cleaned_filepath = f"data/cleaned/res_{fname_start}_{fname_end}.csv"
-    exports_filepath = f"data/exports/res_{fname_start}_{fname_end}.csv"
-
-    already_cleaned = os.path.exists(cleaned_filepath)
-
-    if already_cleaned:
-        last_generated_ts = datetime.fromtimestamp(os.path.getmtime(cleaned_filepath))
-        regenerate = handle_input(
-            prompt=f"Clean data for this graph last generated {last_generated_ts}. Do you want to rerun? (Y/N): ",
-            response_type="boolean"
-        )
-        if not regenerate:
-            generate_heatmap(cleaned_filepath, years_list=years_list, notable_days=event_type)
-            if export_minimaps:
-                generate_minimaps(cleaned_filepath, years_list=years_list)
-            plt.show()
-    if not already_cleaned or regenerate:
-        try:
-            export_csv(start_date_str, end_date_str)
-            clean_for_graphing(exports_filepath)
-            generate_heatmap(cleaned_filepath, years_list=years_list, notable_days=event_type)
-            if export_minimaps:
-                generate_minimaps(cleaned_filepath, years_list=years_list)
-            plt.show()
-        except FileNotFoundError as e:
-            print(f"File not found: {e}")
-            return go_home_message()
+
+@profiled("graph")
+def graph_resolutions(start_date_str, end_date_str, event_type=None, export_minimaps=False, minimap_columns=None,
+                      workers=None, renderer=None):
+    """
+    Generate and export heatmaps from app data for the provided date range.
+    Minimaps are generated from minimap_columns if provided, otherwise the user is asked which columns to use.
+    renderer picks how graphs are drawn ("seaborn" or "fast"; see graph_utils.RENDERERS).
+    Returns False if there was no data to graph.
+    """
+    with span("import graphing stack"):
+        from utils.graph_utils import generate_heatmap, generate_minimaps, load_calendar_grid
+
+    years_list = get_years_list(start_date_str, end_date_str)
+
+    # Reuse the cached cleaned dataset if the data hasn't changed, otherwise build it straight from app data, and lay it
+    # out as a calendar grid once for all of the renderers
+    with span("load resolutions"):
+        all_res_dict = get_all_resolutions()
+    df = get_cleaned_frame(all_res_dict, start_date_str, end_date_str,
+                           columns=None if export_minimaps else HEATMAP_COLUMNS)
+    if df is None:
+        print(f"Found no data from {start_date_str} to {end_date_str}")
+        return False
+    detail_codes = {res_id: list(res["res_detail_codes"]) for res_id, res in all_res_dict.items()}
+    grid = load_calendar_grid(df, detail_codes=detail_codes)
+    generate_heatmap(grid, years_list=years_list, notable_days=event_type, renderer=renderer)
+    if export_minimaps:
+        generate_minimaps(grid, years_list=years_list, workers=workers, columns=minimap_columns, renderer=renderer)
+    return True
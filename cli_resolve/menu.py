@@ -1,5 +1,15 @@
 from resolution import *
-from export import *
+
+
+def run_export(name):
+    """
+    Returns a menu function that runs export.{name}, importing the export module (and the graphing stack behind it)
+    only once it is picked.
+    """
+    def run():
+        import export
+        return getattr(export, name)()
+    return run
 
 
 class Menu:
@@ -19,11 +29,11 @@ class Menu:
             },
             "4": {
                 "text": "export csv",
-                "function": export_csv,
+                "function": run_export("export_csv"),
             },
             "5": {
                 "text": "export graph",
-                "function": export_graph,
+                "function": run_export("export_graph"),
             }
         }
 
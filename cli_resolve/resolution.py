@@ -1,20 +1,29 @@
+from utils.date_utils import today_date_string
 from utils.input_utils import *
 from utils.resolution_utils import *
 from utils.menu_utils import *
+from utils.storage import get_store
 
 
 def log_resolutions():
     """
     Log entry for all active resolutions.
     """
-    active_res = get_active_resolutions()
+    # Load once and share the in-memory copy with the expiry sweep, so that a logging session costs one read and one
+    # write in total
+    all_res_dict = get_all_resolutions()
+    expired_res = expire_resolutions(all_res_dict)
+    active_res = get_active_resolutions(all_res_dict)
     if not active_res:
+        if expired_res:
+            get_store().update(resolutions=expired_res)
         print("You don't have any active resolutions!")
         return go_home_message()
 
     log_date = handle_input(prompt="What is the date for this entry? ('today' or 'MM/DD/YYYY'): ",
                             response_type="datestring")
 
+    entries = []
     for res, val in active_res.items():
         # Get Y/N response for binary resolution
         if val['is_binary']:
@@ -29,14 +38,11 @@ def log_resolutions():
                            "or 'N' for no."
             response = handle_input(prompt=prompt, response_type="code", instructions=instructions, codes=codes)
             val['data'][log_date] = response
+        entries.append((res, log_date, response))
 
-    # Persist to file
+    # Persist the new entries, along with any detail codes added along the way
     print("*** Saving new logs")
-    with open("data/resolutions.json", "r") as f:
-        all_res_dict = json.load(f)
-        all_res_dict.update(active_res)
-    with open("data/resolutions.json", "w") as f:
-        json.dump(all_res_dict, f, indent=4)
+    get_store().update(resolutions={**expired_res, **active_res}, entries=entries)
     print(f"*** Saved logs for {log_date}!")
     return go_home_message()
 
@@ -53,7 +59,7 @@ def add_resolution():
                 print(f"`{res_id}` already exists")
                 continue
             res_descript = handle_input(prompt="Describe this resolution: ")
-            res_creation_date = date.today()
+            res_creation_date = today_date_string()
             is_active = True
             res_expiration_date = handle_input(
                 prompt="When does this resolution expire? ('MM/DD/YYYY' or 'never' for no "
@@ -83,7 +89,7 @@ def add_resolution():
         res_dict = {
             res_id: {
                 "res_descript": res_descript,
-                "res_creation_date": res_creation_date.strftime("%-m/%-d/%Y"),
+                "res_creation_date": res_creation_date,
                 "is_active": is_active,
                 "res_expiration_date": res_expiration_date,
                 "is_binary": is_binary,
@@ -97,8 +103,7 @@ def add_resolution():
         if confirm:
             print(f"*** Adding new resolution={res_id}")
             all_res_dict.update(res_dict)
-            with open("data/resolutions.json", "w+") as f:
-                json.dump(all_res_dict, f, indent=4)
+            get_store().update(resolutions=res_dict)
             print("*** Added new resolution!")
             return go_home_message()
         else:
@@ -124,21 +129,17 @@ def toggle_active_resolutions():
         if res_key == "menu":
             break
         try:
-            # Flip the status and save back to disk
-            all_res_dict[res_key]["is_active"] = not all_res_dict[res_key]["is_active"]
-            # Set expiration date to today if toggling to inactive
+            # Ask for expiration date if toggling to active (toggling to inactive expires the resolution today)
+            res_expiration_date = None
             if not all_res_dict[res_key]["is_active"]:
-                all_res_dict[res_key]["res_expiration_date"] = date.today().strftime("%-m/%-d/%Y")
-            # Ask for expiration date if toggling to active
-            else:
                 res_expiration_date = handle_input(
                     prompt="When does this resolution expire? ('MM/DD/YYYY' or 'never' for no "
                            "expiration): ",
                     response_type="datestring"
                 )
-                all_res_dict[res_key]["res_expiration_date"] = res_expiration_date
-            with open("data/resolutions.json", "w") as f:
-                json.dump(all_res_dict, f, indent=4)
+            # Flip the status and save back to disk
+            toggle_resolution(all_res_dict[res_key], res_expiration_date)
+            get_store().update(resolutions={res_key: all_res_dict[res_key]})
             print(f"*** Toggled active status of `{res_key}`!\n")
         except KeyError as e:
             print(f"No such resolution key={e}\n")
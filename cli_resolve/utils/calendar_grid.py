@@ -0,0 +1,123 @@
+from calendar import monthrange
+
+import numpy as np
+
+from .resolution_arrays import encode_detail_codes
+
+MONTHS_PER_YEAR = 12
+DAYS_PER_MONTH = 31
+
+
+class CalendarGrid:
+    """
+    Cleaned dataset laid out the way heatmaps display it, built once and shared by every graph drawn from it.
+
+    values is a float array of shape (columns, months, 31): one layer per column of the dataset ("Resolutions Met"
+    followed by each resolution), one row per month from the first month of the dataset to the last (years x 12 for
+    whole years), and one column per day of the month. Days that don't exist (e.g. Feb 30) are flagged by the invalid
+    mask, and they, along with days outside of the dataset or without a value, hold NaN.
+
+    Non-binary resolutions are stored as bitmasks of their detail codes (see resolution_arrays.CategoricalDays), with
+    the codes behind each bit in codes.
+    """
+
+    def __init__(self, columns, rows, values, invalid, codes=None, start_date_str=None, end_date_str=None):
+        self.columns = list(columns)
+        self.rows = list(rows)
+        self.values = values
+        self.invalid = invalid
+        self.codes = codes or {}
+        self.start_date_str = start_date_str
+        self.end_date_str = end_date_str
+        self._layers = {col: i for i, col in enumerate(self.columns)}
+
+    @classmethod
+    def from_frame(cls, df, detail_codes=None):
+        """
+        Builds the grid from a cleaned dataset (see export_utils.clean_frame), with the detail codes of non-binary
+        resolutions numbered in the order given by detail_codes (resolution -> list of codes), if known.
+        """
+        if detail_codes is None:
+            detail_codes = {}
+        years = df["Year"].to_numpy(dtype=int)
+        months = df["Month"].to_numpy(dtype=int)
+        days = df["Day"].to_numpy(dtype=int)
+        start_year, start_month = int(years[0]), int(months[0])
+        end_year, end_month = int(years[-1]), int(months[-1])
+        first_row = start_year * MONTHS_PER_YEAR + start_month - 1
+        rows = [divmod(row, MONTHS_PER_YEAR) for row in range(first_row, end_year * MONTHS_PER_YEAR + end_month)]
+        rows = [(year, month + 1) for year, month in rows]
+
+        columns = [col for col in df.columns if col not in ("date", "Year", "Month", "Day")]
+        values = np.full((len(columns), len(rows), DAYS_PER_MONTH), np.nan)
+        row_idx = years * MONTHS_PER_YEAR + months - 1 - first_row
+        day_idx = days - 1
+        codes = {}
+        for layer, col in enumerate(columns):
+            col_values = df[col]
+            if col != "Resolutions Met" and "bool" not in col:
+                masks, codes[col] = encode_detail_codes(col_values, detail_codes.get(col, ()))
+                col_values = np.where(col_values.isna().to_numpy(), np.nan, masks.astype(float))
+            values[layer, row_idx, day_idx] = np.asarray(col_values, dtype=float)
+
+        return cls(columns, rows, values, get_invalid_days(rows), codes=codes,
+                   start_date_str=df["date"].iloc[0], end_date_str=df["date"].iloc[-1])
+
+    @property
+    def years(self):
+        return sorted({year for year, _ in self.rows})
+
+    def layer(self, col):
+        """
+        Returns the (months, 31) slice of the grid holding col.
+        """
+        return self.values[self._layers[col]]
+
+    def select(self, cols):
+        """
+        Returns a grid holding only cols (e.g. to hand a single resolution to a worker process).
+        """
+        idx = [self._layers[col] for col in cols]
+        return CalendarGrid(cols, self.rows, self.values[idx], self.invalid,
+                            codes={col: self.codes[col] for col in cols if col in self.codes},
+                            start_date_str=self.start_date_str, end_date_str=self.end_date_str)
+
+    def get_row(self, year, month):
+        """
+        Returns the row of the grid holding month of year, or None if it falls outside of the grid.
+        """
+        row = (year - self.rows[0][0]) * MONTHS_PER_YEAR + month - self.rows[0][1]
+        return row if 0 <= row < len(self.rows) else None
+
+    def unique(self, col):
+        """
+        Returns the distinct values of col over the days with a value, as they appear in the cleaned dataset.
+        """
+        layer = self.layer(col)
+        found = np.unique(layer[~np.isnan(layer)])
+        if col not in self.codes:
+            return found.astype(int)
+        codes = self.codes[col]
+        return [",".join(code for bit, code in enumerate(codes) if int(mask) & (1 << bit)) or 0 for mask in found]
+
+    def to_frame(self, layer):
+        """
+        Returns a (months, 31) array laid out like the grid as a DataFrame indexed by Month (for a single year) or by
+        Year and Month, with Day columns, as df.pivot() would.
+        """
+        import pandas as pd
+
+        if len(self.years) == 1:
+            index = pd.Index([month for _, month in self.rows], name="Month")
+        else:
+            index = pd.MultiIndex.from_tuples(self.rows, names=["Year", "Month"])
+        columns = pd.Index(range(1, DAYS_PER_MONTH + 1), name="Day")
+        return pd.DataFrame(layer, index=index, columns=columns)
+
+
+def get_invalid_days(rows):
+    """
+    Returns a bool mask of shape (len(rows), 31) that is True for the days that don't exist in each (year, month) row.
+    """
+    days_in_month = np.array([monthrange(year, month)[1] for year, month in rows])
+    return np.arange(1, DAYS_PER_MONTH + 1) > days_in_month[:, None]
@@ -0,0 +1,116 @@
+from bisect import bisect_left, bisect_right, insort
+
+from .date_utils import date_string_to_ordinal
+
+
+class ResolutionData(dict):
+    """
+    Dict of the data logged for a single resolution, keyed by 'M/D/YYYY' date strings.
+
+    Behaves like (and serializes as) a plain dict, but also keeps a sorted index of the ordinal day numbers of its keys,
+    so that range-membership and range-slice queries are answered by binary search instead of walking the calendar.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._keys_by_ordinal = {date_string_to_ordinal(key): key for key in self}
+        self.ordinals = sorted(self._keys_by_ordinal)
+
+    def __reduce__(self):
+        # Pickle as a plain dict rebuilt through __init__, since unpickling a dict subclass sets its items before the
+        # index exists
+        return ResolutionData, (dict(self),)
+
+    def __setitem__(self, key, value):
+        if key not in self:
+            self._index_key(key)
+        super().__setitem__(key, value)
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self._unindex_key(key)
+
+    def update(self, *args, **kwargs):
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def pop(self, key, *args):
+        if key in self:
+            self._unindex_key(key)
+        return super().pop(key, *args)
+
+    def popitem(self):
+        key, value = super().popitem()
+        self._unindex_key(key)
+        return key, value
+
+    def clear(self):
+        super().clear()
+        self._keys_by_ordinal = {}
+        self.ordinals = []
+
+    def _index_key(self, key):
+        ordinal = date_string_to_ordinal(key)
+        if ordinal not in self._keys_by_ordinal:
+            insort(self.ordinals, ordinal)
+        self._keys_by_ordinal[ordinal] = key
+
+    def _unindex_key(self, key):
+        ordinal = date_string_to_ordinal(key)
+        if self._keys_by_ordinal.get(ordinal) == key:
+            del self._keys_by_ordinal[ordinal]
+            del self.ordinals[bisect_left(self.ordinals, ordinal)]
+
+    def key_for(self, ordinal):
+        """
+        Returns the date string this data is keyed by on the day ordinal, or None if there's no data that day.
+        """
+        return self._keys_by_ordinal.get(ordinal)
+
+    @property
+    def min_ordinal(self):
+        return self.ordinals[0] if self.ordinals else None
+
+    @property
+    def max_ordinal(self):
+        return self.ordinals[-1] if self.ordinals else None
+
+    def has_data_between(self, start_ordinal, end_ordinal):
+        """
+        Returns True if there is any data from start_ordinal to end_ordinal (inclusive).
+        """
+        i = bisect_left(self.ordinals, start_ordinal)
+        return i < len(self.ordinals) and self.ordinals[i] <= end_ordinal
+
+    def ordinals_between(self, start_ordinal, end_ordinal):
+        """
+        Returns the sorted ordinals of all days with data from start_ordinal to end_ordinal (inclusive).
+        """
+        i = bisect_left(self.ordinals, start_ordinal)
+        j = bisect_right(self.ordinals, end_ordinal)
+        return self.ordinals[i:j]
+
+    def items_between(self, start_ordinal, end_ordinal):
+        """
+        Returns (date string, value) pairs in date order for all days with data from start_ordinal to end_ordinal
+        (inclusive).
+        """
+        return [
+            (self._keys_by_ordinal[ordinal], self[self._keys_by_ordinal[ordinal]])
+            for ordinal in self.ordinals_between(start_ordinal, end_ordinal)
+        ]
+
+
+def index_resolutions(all_res_dict):
+    """
+    Attaches a date index to the data of every resolution in all_res_dict (in place) and returns all_res_dict.
+    """
+    for entry in all_res_dict.values():
+        if not isinstance(entry["data"], ResolutionData):
+            entry["data"] = ResolutionData(entry["data"])
+    return all_res_dict
@@ -0,0 +1,63 @@
+from datetime import date
+from functools import lru_cache
+
+# Dates are read and written as 'M/D/YYYY' strings (the keys of data/resolutions.json and the dates users type in), but
+# everything in between works on proleptic Gregorian ordinals: plain ints where the next day is always ordinal + 1.
+
+
+@lru_cache(maxsize=None)
+def date_string_to_ordinal(date_str):
+    """
+    Takes an 'M/D/YYYY' date string (zero-padded or not) and returns its proleptic Gregorian ordinal (day number).
+    Raises ValueError if date_str isn't a valid date in that format.
+    """
+    try:
+        month, day, year = date_str.split("/")
+        # 1-2 digit months and days, and 4-digit years from 1000 on only (e.g. no '1/5/22' or '1/5/0022', which would
+        # be silently taken for dates in 22 AD)
+        if not (is_ascii_number(month, 1, 2) and is_ascii_number(day, 1, 2) and is_ascii_number(year, 4, 4)
+                and year[0] != "0"):
+            raise ValueError
+        return date(int(year), int(month), int(day)).toordinal()
+    except ValueError:
+        raise ValueError(f"Invalid date={date_str}; date input should be in the form of 'MM/DD/YYYY'")
+
+
+def is_ascii_number(text, min_digits, max_digits):
+    """
+    Returns whether text is made up of min_digits to max_digits ASCII digits and nothing else.
+    """
+    return min_digits <= len(text) <= max_digits and text.isascii() and text.isdigit()
+
+
+@lru_cache(maxsize=None)
+def ordinal_to_date_string(ordinal):
+    """
+    Takes a day's ordinal and returns it as an 'M/D/YYYY' date string (not zero-padded), as stored in app data.
+    """
+    day = date.fromordinal(ordinal)
+    return f"{day.month}/{day.day}/{day.year}"
+
+
+def today_ordinal():
+    return date.today().toordinal()
+
+
+def today_date_string():
+    return ordinal_to_date_string(today_ordinal())
+
+
+@lru_cache(maxsize=None)
+def get_year_start(year):
+    """
+    Returns the ordinal of Jan 1 of year.
+    """
+    return date(year, 1, 1).toordinal()
+
+
+def split_ordinal(ordinal):
+    """
+    Returns the (year, day of year index) of a day's ordinal, with Jan 1 at index 0.
+    """
+    year = date.fromordinal(ordinal).year
+    return year, ordinal - get_year_start(year)
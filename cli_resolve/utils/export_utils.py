@@ -1,7 +1,44 @@
-from datetime import datetime, timedelta
+from contextlib import contextmanager
 import csv
-import pandas as pd
+import hashlib
+import importlib.util
+import json
+import logging
 import os
+import re
+
+from .date_index import ResolutionData
+from .date_utils import date_string_to_ordinal, ordinal_to_date_string
+from .log_utils import ProgressLogger, get_logger
+from .profiling import profiled, span
+
+logger = get_logger("export")
+
+# pandas and numpy are imported by the functions that clean data, so exporting CSVs doesn't pay for loading them
+
+# Size of the write buffer used when streaming rows into an export
+EXPORT_BUFFER_SIZE = 1024 * 1024
+
+# Values that mean a resolution was (or wasn't) met, whether they come from app data or from a CSV read as text
+FALSY_VALUES = [0, "0", "0.0", "", False, "False"]
+TRUTHY_VALUES = [True, "True"]
+
+# Cleaned datasets for graphing are cached in data/cleaned under a hash of the data they were built from.
+# Bump the version whenever the cleaning logic changes so that existing caches are rebuilt.
+CLEANED_CACHE_VERSION = 2
+# Once cached datasets take up more than this many bytes, the least recently used ones are evicted
+CLEANED_CACHE_MAX_BYTES = 50 * 1024 * 1024
+CLEANED_CACHE_PATTERN = re.compile(r"^res_(?P<range>.+_.+)_(?P<digest>[0-9a-f]{16})\.(csv|parquet)$")
+
+# Cleaned datasets are stored as Parquet (a columnar format that can be loaded column by column) when pyarrow is
+# installed, and as CSV otherwise
+CLEANED_FORMAT = "parquet" if importlib.util.find_spec("pyarrow") else "csv"
+# Columns that generate_heatmap() needs from a cleaned dataset
+HEATMAP_COLUMNS = ["date", "Year", "Month", "Day", "Resolutions Met"]
+
+# Each export is accompanied by a {export name}.meta.json sidecar recording what it holds, so that incremental exports
+# can tell whether new days can simply be appended. Bump the version whenever the export format changes.
+EXPORT_META_VERSION = 3
 
 
 def get_filename(date_str):
@@ -11,57 +48,229 @@ def get_filename(date_str):
     return "-".join(date_str.split("/"))
 
 
-def get_res_fieldnames(res_dict, start_date_str, end_date):
+@profiled("find resolutions with data")
+def get_res_fieldnames(res_dict, start_ordinal, end_ordinal):
     """
-    Gets a list of res_id's that contains data that falls within the provided date range.
+    Gets a list of res_id's that contains data that falls within the provided date range (as ordinals, inclusive).
     """
     res_fields = []
     for res_id, entry in res_dict.items():
         log_data = entry["data"]
-        has_data = check_data_against_range(log_data, start_date_str, end_date)
+        has_data = check_data_against_range(log_data, start_ordinal, end_ordinal)
         if has_data:
             res_fields.append(res_id)
     return res_fields
 
 
-def check_data_against_range(data, start_date_str, end_date):
+def check_data_against_range(data, start_ordinal, end_ordinal):
     """
-    Checks the data attached to a resolution to see whether any of it falls within the provided date range.
+    Checks the data attached to a resolution to see whether any of it falls within the provided date range (as
+    ordinals, inclusive).
+    Uses the resolution's date index, so this is a binary search rather than a walk through every day in the range.
     """
-    curr_date = datetime.strptime(start_date_str, "%m/%d/%Y")
-    while curr_date <= end_date:
-        curr_date_str = datetime.strftime(curr_date, "%-m/%-d/%Y")
-        if curr_date_str in data:
-            # We're happy as long as there's a single date with data
-            return True
-        curr_date += timedelta(days=1)
-    return False
+    if not isinstance(data, ResolutionData):
+        data = ResolutionData(data)
+    return data.has_data_between(start_ordinal, end_ordinal)
 
 
-def write_new_csv_with_header(fieldnames, fname_start, fname_end):
+def iter_export_rows(all_res_dict, res_fields, start_ordinal, end_ordinal):
     """
-    Write header for the CSV to be exported.
+    Yields one row per day from start_ordinal to end_ordinal (inclusive) with the data of each resolution in res_fields.
+
+    Rows are dicts in the following format:
+    e.g. { "date": "MM/DD/YYYY", "res_A": 0, "res_B": 1, "res_C": "R" }
+
+    Data values can be 0, 1, or a detail code. Days without data are recorded as 0.
+    Progress is logged at most once a second; what was found for each resolution on each day is only logged at debug
+    level (and not even formatted otherwise).
+    """
+    res_data = []
+    for res in res_fields:
+        log_data = all_res_dict[res]["data"]
+        res_data.append((res, log_data if isinstance(log_data, ResolutionData) else ResolutionData(log_data)))
+
+    debug = logger.isEnabledFor(logging.DEBUG)
+    progress = ProgressLogger(logger, "Exported", total=end_ordinal - start_ordinal + 1)
+    cells_found = 0
+    for ordinal in range(start_ordinal, end_ordinal + 1):
+        curr_date_str = ordinal_to_date_string(ordinal)
+        curr_data = {"date": curr_date_str}
+        for res, log_data in res_data:
+            key = log_data.key_for(ordinal)
+            if key is None:
+                if debug:
+                    logger.debug("resolution=%s does not have data for date=%s, recording as 0", res, curr_date_str)
+                curr_data[res] = 0
+                continue
+            data_on_date = log_data[key]
+            if data_on_date is False:
+                curr_data[res] = 0
+            elif data_on_date is True:
+                curr_data[res] = 1
+            else:  # non-boolean value
+                curr_data[res] = data_on_date
+            cells_found += 1
+            if debug:
+                logger.debug("*** Data found for resolution=%s on date=%s!", res, curr_date_str)
+        progress.update()
+        yield curr_data
+    progress.done(f" x {len(res_fields)} resolutions ({cells_found} entries found)")
+
+
+@contextmanager
+def open_export_writer(fieldnames, fname_start, fname_end):
+    """
+    Opens a single buffered CSV writer for the export file and writes the header.
+
+    Rows are streamed into a temporary file next to the export, which atomically replaces
+    data/exports/res_{fname_start}_{fname_end}.csv once the block exits cleanly. If anything goes wrong mid-export, the
+    temporary file is discarded and any previous export is left untouched.
+
+    Rows passed to the writer are dicts in the following format:
+    e.g. { "date": "MM/DD/YYYY", "res_A": 0, "res_B": 1, "res_C": "R" }
+
+    Data values can be 0, 1, or a detail code.
     """
     path = "data/exports"
     if not os.path.exists(path):
         os.makedirs(path)
-    with open(f"{path}/res_{fname_start}_{fname_end}.csv", "w", newline="") as f:
-        w = csv.DictWriter(f, fieldnames=fieldnames)
-        w.writeheader()
+    filepath = f"{path}/res_{fname_start}_{fname_end}.csv"
+    tmp_filepath = f"{filepath}.tmp"
+    try:
+        with open(tmp_filepath, "w", newline="", buffering=EXPORT_BUFFER_SIZE) as f:
+            w = csv.DictWriter(f, fieldnames=fieldnames)
+            w.writeheader()
+            yield w
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_filepath, filepath)
+    except BaseException:
+        if os.path.exists(tmp_filepath):
+            os.remove(tmp_filepath)
+        raise
 
 
-def write_res_row(fieldnames, curr_data, fname_start, fname_end):
+@contextmanager
+def open_export_appender(filepath, fieldnames):
     """
-    Write a row for the CSV to be exported using curr_data.
+    Opens a single buffered CSV writer that appends rows to the end of an existing export (without a header).
+    """
+    with open(filepath, "a", newline="", buffering=EXPORT_BUFFER_SIZE) as f:
+        yield csv.DictWriter(f, fieldnames=fieldnames)
+        f.flush()
+        os.fsync(f.fileno())
 
-    curr_data is a dict in the following format:
-    e.g. { "date": "MM/DD/YYYY", "res_A": 0, "res_B": 1, "res_C": "R" }
 
-    Data values can be 0, 1, or a detail code.
+def get_export_meta_path(filepath):
+    return f"{os.path.splitext(filepath)[0]}.meta.json"
+
+
+def get_export_digests(all_res_dict, res_fields, start_ordinal, end_ordinal):
+    """
+    Returns a hash of the data of each resolution in res_fields from start_ordinal to end_ordinal (inclusive), so that
+    days added, removed, or edited since an export was written can be told apart.
     """
-    with open(f"data/exports/res_{fname_start}_{fname_end}.csv", "a", newline="") as f:
-        w = csv.DictWriter(f, fieldnames=fieldnames)
-        w.writerow(curr_data)
+    digests = {}
+    for res_id in res_fields:
+        data = all_res_dict[res_id]["data"]
+        if not isinstance(data, ResolutionData):
+            data = ResolutionData(data)
+        items = data.items_between(start_ordinal, end_ordinal)
+        digests[res_id] = hashlib.sha256(json.dumps(items).encode()).hexdigest()[:16]
+    return digests
+
+
+def write_export_meta(filepath, all_res_dict, res_fields, start_ordinal, end_ordinal, written_through):
+    """
+    Records the columns of the export at filepath, the range it covers, the last day it holds data for (its high-water
+    mark), a hash of the data of each resolution it holds, and its size (so that an export that was modified or torn
+    since can be told apart).
+    """
+    meta = {
+        "version": EXPORT_META_VERSION,
+        "fieldnames": ["date"] + res_fields,
+        "start": ordinal_to_date_string(start_ordinal),
+        "end": ordinal_to_date_string(end_ordinal),
+        "written_through": ordinal_to_date_string(written_through),
+        "digests": get_export_digests(all_res_dict, res_fields, start_ordinal, written_through),
+        "size": os.path.getsize(filepath),
+    }
+    meta_path = get_export_meta_path(filepath)
+    tmp_meta_path = f"{meta_path}.tmp"
+    with open(tmp_meta_path, "w") as f:
+        json.dump(meta, f, indent=4)
+    os.replace(tmp_meta_path, meta_path)
+
+
+def get_appendable_ordinal(filepath, all_res_dict, res_fields, start_ordinal, end_ordinal):
+    """
+    Returns the high-water mark of the existing export at filepath: the last day (as an ordinal) it holds data for, so
+    that only the rows after it need to be rewritten. Returns None if the export has to be rewritten instead: when there
+    is no export (or no record of what it holds), when its columns or range changed, or when any of the data it holds
+    was added, removed, or edited since.
+
+    Exported days are only hashed, not written again: checking costs about as much as loading the data did.
+    """
+    meta_path = get_export_meta_path(filepath)
+    if not os.path.exists(filepath) or not os.path.exists(meta_path):
+        return None
+    try:
+        with open(meta_path, "r") as f:
+            meta = json.load(f)
+        written_through = date_string_to_ordinal(meta["written_through"])
+    except (json.JSONDecodeError, KeyError, ValueError):
+        return None
+    if meta.get("version") != EXPORT_META_VERSION or meta.get("fieldnames") != ["date"] + res_fields:
+        return None
+    if meta.get("start") != ordinal_to_date_string(start_ordinal) or meta.get("end") != ordinal_to_date_string(
+            end_ordinal):
+        return None
+    if meta.get("size") != os.path.getsize(filepath):
+        return None
+    if meta.get("digests") != get_export_digests(all_res_dict, res_fields, start_ordinal, written_through):
+        return None
+    return written_through
+
+
+def truncate_export_rows(filepath, num_rows, last_date_str):
+    """
+    Cuts the last num_rows rows off the export at filepath, so that it ends with the row for last_date_str.
+    Only the end of the file is read. Returns False (leaving the export untouched) if the row left last isn't the one
+    for last_date_str.
+    """
+    with open(filepath, "r+b") as f:
+        size = f.seek(0, os.SEEK_END)
+        # Gather enough of the end of the file to hold the rows being cut and the row before them
+        tail = b""
+        pos = size
+        while pos > 0 and tail.count(b"\n") < num_rows + 2:
+            step = min(64 * 1024, pos)
+            pos -= step
+            f.seek(pos)
+            tail = f.read(step) + tail
+        lines = tail.split(b"\n")
+        # The file ends with a newline, so the last element is empty
+        kept_lines = lines[:len(lines) - 1 - num_rows]
+        if len(kept_lines) < 2 or not kept_lines[-1].startswith(f"{last_date_str},".encode()):
+            return False
+        f.truncate(pos + sum(len(line) + 1 for line in kept_lines))
+    return True
+
+
+def get_last_data_ordinal(all_res_dict, res_fields, start_ordinal, end_ordinal):
+    """
+    Returns the last day (as an ordinal) from start_ordinal to end_ordinal that any resolution in res_fields has data
+    for.
+    """
+    last_ordinal = start_ordinal
+    for res_id in res_fields:
+        data = all_res_dict[res_id]["data"]
+        if not isinstance(data, ResolutionData):
+            data = ResolutionData(data)
+        ordinals = data.ordinals_between(start_ordinal, end_ordinal)
+        if ordinals:
+            last_ordinal = max(last_ordinal, ordinals[-1])
+    return last_ordinal
 
 
 def get_years_list(start_date_str, end_date_str):
@@ -78,49 +287,247 @@ def get_years_list(start_date_str, end_date_str):
     return years_list
 
 
-def clean_for_graphing(filepath):
+@profiled("clean for graphing")
+def clean_for_graphing(filepath, file_format="csv"):
     """
-    Wrangle CSV data in data/exports and save the cleaned CSV to data/cleaned.
+    Wrangle CSV data in data/exports and save the cleaned dataset to data/cleaned, either as CSV or as Parquet.
     """
+    import pandas as pd
+
     print("*** Cleaning data")
     filename = filepath.split("data/exports/")[1]
-    df = pd.read_csv(filepath)
-    data_start = 1
-    data_end = len(df.columns) - 1
-
-    df[['Month', 'Day', 'Year']] = df['date'].str.split('/', expand=True)
-
-    df['Month'] = df['Month'].astype(int)
-    df['Day'] = df['Day'].astype(int)
-    df['Year'] = df['Year'].astype(int)
-
-    # Replace falsy values with 0's, otherwise the boolean conversion will return True for "0" and "0.0"
-    df.fillna(0, inplace=True)
-    clean_binary_dict = {
-        '0': 0,
-        '0.0': 0,
-        'False': 0,
-        False: 0,
-        'True': 1,
-        True: 1,
-    }
-    df.replace(clean_binary_dict, inplace=True)
-
-    # Create new column that sums up total resolutions met per day
-    resolution_bools = df.iloc[:, data_start:data_end + 1].astype(bool)
-    df['Resolutions Met'] = resolution_bools.sum(axis=1)
-
-    # Create new boolean columns from categorical resolutions
-    start = data_start
-    while start < data_end + 1:
-        end = start + 1
-        col_name = df.iloc[:, start:end].columns.values[0]
-        df[f"{col_name}_bool"] = df.iloc[:, start:end].astype(bool)
-        df[f"{col_name}_bool"] = df[f"{col_name}_bool"].astype(int)
-        start += 1
-
-    # Save cleaned df as CSV
+    df = clean_frame(pd.read_csv(filepath))
+
+    # Save cleaned df
+    path = "data/cleaned"
+    if not os.path.exists(path):
+        os.makedirs(path)
+    write_cleaned(df, f"{path}/{os.path.splitext(filename)[0]}.{file_format}")
+
+
+@profiled("write cleaned data")
+def write_cleaned(df, filepath):
+    """
+    Save a cleaned dataset to filepath, as Parquet or CSV depending on the file extension.
+    """
+    if filepath.endswith(".parquet"):
+        compact_dtypes(df).to_parquet(filepath, index=False)
+    else:
+        df.to_csv(filepath, index=False)
+
+
+@profiled("read cleaned data")
+def read_cleaned(filepath, columns=None):
+    """
+    Load a cleaned dataset from a Parquet or CSV file, optionally loading only the given columns.
+    Integer and boolean columns are loaded with compact dtypes.
+    """
+    import pandas as pd
+
+    if filepath.endswith(".parquet"):
+        return pd.read_parquet(filepath, columns=columns)
+    return compact_dtypes(pd.read_csv(filepath, usecols=columns))
+
+
+def compact_dtypes(df):
+    """
+    Returns df with integer and boolean columns downcast to the smallest integer dtypes that hold them, and mixed
+    resolution columns (e.g. 0's alongside detail codes) stored as text.
+    """
+    import pandas as pd
+
+    dtypes = {}
+    for col in df.columns:
+        if col in ("Month", "Day"):
+            dtypes[col] = "int8"
+        elif col in ("Year", "Resolutions Met"):
+            dtypes[col] = "int16"
+        elif col.endswith("_bool") or df[col].dtype == bool:
+            dtypes[col] = "uint8"
+        elif pd.api.types.is_integer_dtype(df[col]):
+            dtypes[col] = pd.to_numeric(df[col], downcast="integer").dtype
+        elif df[col].dtype == object:
+            dtypes[col] = str
+    return df.astype(dtypes)
+
+
+@profiled("build cleaned data")
+def build_cleaned_frame(all_res_dict, start_date_str, end_date_str):
+    """
+    Builds the cleaned dataset for graphing straight from app data, without writing or reading any CSVs.
+    Returns None if no resolution has data within the date range.
+    """
+    import pandas as pd
+
+    start_ordinal = date_string_to_ordinal(start_date_str)
+    end_ordinal = date_string_to_ordinal(end_date_str)
+    res_fields = get_res_fieldnames(all_res_dict, start_ordinal, end_ordinal)
+    if len(res_fields) < 1:
+        return None
+    print("*** Cleaning data")
+    with span("collect columns"):
+        columns = {"date": [ordinal_to_date_string(ordinal) for ordinal in range(start_ordinal, end_ordinal + 1)]}
+        for res in res_fields:
+            columns[res] = get_export_column(all_res_dict[res], start_ordinal, end_ordinal)
+        df = pd.DataFrame(columns)
+    return clean_frame(df)
+
+
+def get_export_column(res, start_ordinal, end_ordinal):
+    """
+    Returns the values that an export records for res on each day from start_ordinal to end_ordinal (inclusive): 0, 1,
+    or a detail code, with days without data recorded as 0.
+    Resolutions are read off their BinaryDays or CategoricalDays arrays in one go rather than looked up day by day, so
+    detail codes come out in a consistent form (e.g. "r, b" is recorded as "R,B").
+    """
+    from .resolution_arrays import BinaryDays, CategoricalDays
+
+    if res["is_binary"]:
+        return BinaryDays.from_data(res["data"], start_ordinal, end_ordinal).met_between(start_ordinal,
+                                                                                         end_ordinal).astype(int)
+    days = CategoricalDays.from_data(res["data"], start_ordinal, end_ordinal, res["res_detail_codes"])
+    return days.values_between(start_ordinal, end_ordinal)
+
+
+def get_range_digest(all_res_dict, start_date_str, end_date_str):
+    """
+    Returns a hash of all resolution data that falls within the provided date range.
+    Cleaned datasets built from the same data share the same digest, whatever else has changed in app data.
+    """
+    start_ordinal = date_string_to_ordinal(start_date_str)
+    end_ordinal = date_string_to_ordinal(end_date_str)
+    digest = hashlib.sha256(f"v{CLEANED_CACHE_VERSION}".encode())
+    for res_id, entry in all_res_dict.items():
+        data = entry["data"]
+        if not isinstance(data, ResolutionData):
+            data = ResolutionData(data)
+        items = data.items_between(start_ordinal, end_ordinal)
+        if items:
+            digest.update(json.dumps([res_id, items]).encode())
+    return digest.hexdigest()[:16]
+
+
+@profiled("get cleaned data")
+def get_cleaned_frame(all_res_dict, start_date_str, end_date_str, columns=None):
+    """
+    Returns the cleaned dataset for graphing, reusing the cached copy in data/cleaned if the data in the date range is
+    unchanged since it was built, and building (and caching) it otherwise.
+    When reusing a cached copy, only the given columns are loaded (all columns by default).
+    Returns None if no resolution has data within the date range.
+    """
     path = "data/cleaned"
+    fname_range = f"{get_filename(start_date_str)}_{get_filename(end_date_str)}"
+    digest = get_range_digest(all_res_dict, start_date_str, end_date_str)
+    cached_filepath = f"{path}/res_{fname_range}_{digest}.{CLEANED_FORMAT}"
+
+    if os.path.exists(cached_filepath):
+        print(f"*** Reusing cleaned data from {cached_filepath}")
+        os.utime(cached_filepath)  # mark as recently used
+        return normalize_cleaned_dtypes(read_cleaned(cached_filepath, columns=columns), all_res_dict)
+
+    df = build_cleaned_frame(all_res_dict, start_date_str, end_date_str)
+    if df is None:
+        return None
+    df = normalize_cleaned_dtypes(df, all_res_dict)
+
     if not os.path.exists(path):
         os.makedirs(path)
-    df.to_csv(f"{path}/{filename}", index=False)
+    # Keep the real extension on the temporary file so that the right format is written
+    tmp_filepath = f"{path}/.tmp_{os.path.basename(cached_filepath)}"
+    write_cleaned(df, tmp_filepath)
+    os.replace(tmp_filepath, cached_filepath)
+    evict_cleaned_cache(path, keep=cached_filepath)
+    return df
+
+
+def normalize_cleaned_dtypes(df, all_res_dict):
+    """
+    Returns a cleaned dataset with compact dtypes and the columns of non-binary resolutions as text (e.g. 0 as "0"), so
+    that it holds the same dtypes whether it was just built or read back from the cache (where a non-binary column
+    with no codes in the date range would otherwise come back as numbers).
+    """
+    text_cols = {col: str for col in df.columns if col in all_res_dict and not all_res_dict[col]["is_binary"]}
+    return compact_dtypes(df).astype(text_cols)
+
+
+def evict_cleaned_cache(path, keep):
+    """
+    Removes cached datasets in path that were built from outdated data for the same date range as keep, then removes the
+    least recently used cached datasets until they fit within CLEANED_CACHE_MAX_BYTES.
+    Files in path that were not created by the cache (e.g. converted legacy data) are never touched.
+    """
+    keep_range = CLEANED_CACHE_PATTERN.match(os.path.basename(keep)).group("range")
+    cached = []
+    for filename in os.listdir(path):
+        match = CLEANED_CACHE_PATTERN.match(filename)
+        filepath = f"{path}/{filename}"
+        if not match or filepath == keep:
+            continue
+        if match.group("range") == keep_range:
+            os.remove(filepath)
+        else:
+            cached.append((os.path.getmtime(filepath), os.path.getsize(filepath), filepath))
+
+    total_bytes = os.path.getsize(keep) + sum(size for _, size, _ in cached)
+    for _, size, filepath in sorted(cached):
+        if total_bytes <= CLEANED_CACHE_MAX_BYTES:
+            break
+        os.remove(filepath)
+        total_bytes -= size
+
+
+@profiled("clean frame")
+def clean_frame(df):
+    """
+    Wrangle exported data (a "date" column followed by one column per resolution) into the cleaned dataset used for
+    graphing.
+
+    Works on all resolution columns at once: dates are parsed a single time, falsy values are found with one mask, and
+    the _bool columns are built together and concatenated in one go rather than inserted column by column.
+    """
+    import numpy as np
+    import pandas as pd
+
+    res_cols = list(df.columns[1:])
+    dates = pd.to_datetime(df["date"], format="%m/%d/%Y")
+
+    # Falsy values are normalized to 0's, otherwise the boolean conversion would return True for "0" and "0.0".
+    # Numeric columns only need missing values filled, so the (much slower) value matching is limited to text columns
+    res = df[res_cols]
+    numeric_cols = res.select_dtypes(include=["number", "bool"]).columns
+    text_cols = res.columns.difference(numeric_cols, sort=False)
+
+    numeric = res[numeric_cols].fillna(0).astype({col: int for col in numeric_cols if res[col].dtype == bool})
+    # Text columns are matched as one 2D object array rather than column by column
+    text_values = res[text_cols].to_numpy(dtype=object)
+    text_falsy = pd.isna(text_values)
+    for value in FALSY_VALUES:
+        text_falsy |= text_values == value
+    text_truthy = np.zeros_like(text_falsy)
+    for value in TRUTHY_VALUES:
+        text_truthy |= text_values == value
+    text_values = np.where(text_falsy, 0, np.where(text_truthy, 1, text_values))
+    text = pd.DataFrame(text_values, index=res.index, columns=text_cols)
+    text_falsy = pd.DataFrame(text_falsy, index=res.index, columns=text_cols)
+
+    res = pd.concat([numeric, text], axis=1)[res_cols]
+    resolution_bools = pd.concat([numeric != 0, ~text_falsy], axis=1)[res_cols]
+
+    return pd.concat(
+        [
+            df[["date"]],
+            res,
+            pd.DataFrame(
+                {
+                    "Month": dates.dt.month.astype(int),
+                    "Day": dates.dt.day.astype(int),
+                    "Year": dates.dt.year.astype(int),
+                    # Total resolutions met per day
+                    "Resolutions Met": resolution_bools.sum(axis=1),
+                },
+                index=df.index,
+            ),
+            resolution_bools.astype(int).add_suffix("_bool"),
+        ],
+        axis=1,
+    )
@@ -1,11 +1,26 @@
 import json
 import math
 import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
 import pandas as pd
 import seaborn as sns
 from matplotlib import pyplot as plt
-from .export_utils import get_years_list
+from matplotlib.cm import ScalarMappable
+from matplotlib.colors import ListedColormap, Normalize
+from matplotlib.ticker import FixedLocator, FuncFormatter, IndexLocator
+from .calendar_grid import CalendarGrid
+from .export_utils import HEATMAP_COLUMNS, read_cleaned
 from .input_utils import *
+from .profiling import profiled, span
+from .resolution_arrays import categorize_masks
+
+# Environment variable setting the number of processes used to render minimaps (set it to render them in parallel)
+MINIMAP_WORKERS_ENV_VAR = "RESOLVE_MINIMAP_WORKERS"
+# How graphs are drawn: "seaborn" draws each day as a vector cell with sns.heatmap(), while "fast" draws the whole grid as
+# a single image (rasterized inside the PDF) with computed ticks, which renders and saves much faster for long ranges
+RENDERERS = ["seaborn", "fast"]
+RENDERER = os.environ.get("RESOLVE_RENDERER", "seaborn")
 
 
 def print_files(list_of_files):
@@ -20,6 +35,28 @@ def print_files(list_of_files):
     print(files)
 
 
+def load_cleaned_data(data, columns=None):
+    """
+    Returns the cleaned dataset for graphing, given either a path to a cleaned CSV/Parquet file or an already cleaned
+    DataFrame. Only the given columns are loaded from file (all columns by default).
+    """
+    if isinstance(data, pd.DataFrame):
+        return data
+    return read_cleaned(data, columns=columns)
+
+
+def load_calendar_grid(data, columns=None, detail_codes=None):
+    """
+    Returns the calendar grid that graphs are drawn from, given either an already built CalendarGrid, an already cleaned
+    DataFrame, or a path to a cleaned CSV/Parquet file (from which only the given columns are loaded).
+    """
+    if isinstance(data, CalendarGrid):
+        return data
+    df = load_cleaned_data(data, columns=columns)
+    with span("build calendar grid"):
+        return CalendarGrid.from_frame(df, detail_codes=detail_codes)
+
+
 def export_graph_from_file():
     """
     Generate and export heatmaps from existing file.
@@ -36,45 +73,118 @@ def export_graph_from_file():
 
     export_minimaps = handle_input(prompt="Do you want minimaps for select resolutions? (Y/N): ",
                                    response_type="boolean")
-    generate_heatmap(filepath)
+    grid = load_calendar_grid(filepath, columns=None if export_minimaps else HEATMAP_COLUMNS)
+    generate_heatmap(grid)
     if export_minimaps:
-        generate_minimaps(filepath)
+        generate_minimaps(grid)
     plt.show()
 
 
-def generate_heatmap(filepath, years_list=None, notable_days=None):
+def get_renderer(renderer=None):
+    """
+    Returns the renderer to draw graphs with (defaults to RENDERER).
+    """
+    renderer = renderer or RENDERER
+    if renderer not in RENDERERS:
+        raise ValueError(f"Unknown renderer={renderer}; expected one of {RENDERERS}")
+    return renderer
+
+
+def get_minimap_workers(workers=None):
+    """
+    Returns the number of processes to render minimaps with (defaults to RESOLVE_MINIMAP_WORKERS, or 1 if it's unset).
+    """
+    if workers is None:
+        value = os.environ.get(MINIMAP_WORKERS_ENV_VAR, "1")
+        try:
+            workers = int(value)
+        except ValueError:
+            raise ValueError(f"{MINIMAP_WORKERS_ENV_VAR}={value} is not a number of processes") from None
+    if workers < 1:
+        raise ValueError(f"Minimap workers={workers} must be at least 1")
+    return workers
+
+
+def set_cell_ticks(axis, label_func):
+    """
+    Puts a tick in the middle of every row/column of a grid drawn with draw_heatmap_raster(), labeled with
+    label_func(index). Labels are computed as the axis is drawn rather than set one by one.
+    """
+    axis.set_major_locator(IndexLocator(base=1, offset=0.5))
+    axis.set_major_formatter(FuncFormatter(lambda x, pos: label_func(int(x))))
+
+
+def draw_heatmap_raster(df_map, ax, cmap, vmin=None, cbar_kws=None):
+    """
+    Draws df_map onto ax as a single image, laid out the same way as sns.heatmap() (one unit per cell, first row at the
+    top, no spines) so that anything overlaid on it lines up the same. Saved PDFs embed the image at one pixel per cell
+    rather than drawing a vector cell per day.
+    Returns ax.
+    """
+    values = df_map.to_numpy(dtype=float)
+    num_rows, num_cols = values.shape
+    image = ax.imshow(
+        values,
+        cmap=cmap,
+        vmin=np.nanmin(values) if vmin is None else vmin,
+        vmax=np.nanmax(values),
+        interpolation="none",
+        extent=(0, num_cols, num_rows, 0),
+    )
+    ax.set_xlim(0, num_cols)
+    ax.set_ylim(num_rows, 0)
+    for spine in ax.spines.values():
+        spine.set_visible(False)
+    colorbar = ax.figure.colorbar(image, ax=ax, **(cbar_kws or {}))
+    colorbar.outline.set_linewidth(0)
+
+    columns = list(df_map.columns)
+    set_cell_ticks(ax.xaxis, lambda x: columns[x] if 0 <= x < num_cols else "")
+    ax.set_xlabel(df_map.columns.name or "")
+    ax.set_ylabel("-".join(df_map.index.names))
+    return ax
+
+
+@profiled("heatmap")
+def generate_heatmap(filepath, years_list=None, notable_days=None, renderer=None):
     """
     Generate a heatmap from data in which values denote # of resolutions met that day.
+    Data can be passed in as the path to a cleaned CSV/Parquet file, an already cleaned DataFrame, or a CalendarGrid
+    built from one.
     Graph is displayed on-screen as well as temporarily saved to data/exports as temp_graph.pdf.
+    renderer picks how the heatmap is drawn (see RENDERERS; defaults to RENDERER).
 
     For aesthetic reasons, maps with multi-year data are displayed differently from maps containing data from a single
     year. If the name of a valid JSON file is passed into notable_days, annotations will be overlaid onto the map.
     """
-    df = pd.read_csv(filepath)
+    renderer = get_renderer(renderer)
+    grid = load_calendar_grid(filepath, columns=HEATMAP_COLUMNS)
     if not years_list:
-        start_date_str = df["date"][0]
-        end_date_str = df["date"][len(df) - 1]
-        years_list = get_years_list(start_date_str, end_date_str)
+        years_list = grid.years
     num_years = len(years_list)
+    df_map = grid.to_frame(grid.layer("Resolutions Met"))
+    title = f"{grid.start_date_str} - {grid.end_date_str}"
 
     if num_years == 1:
         # Date range within single year
         print("*** Generating heatmap")
         plt.rcParams["figure.figsize"] = (12, 8)
 
-        df_map = df.pivot(index="Month", columns="Day", values="Resolutions Met")
-        nyr_map = sns.heatmap(
-            df_map,
-            cmap="inferno",
-            square=True,
-            vmin=0,
-            cbar_kws={'orientation': 'horizontal'},
-            xticklabels=True,
-            yticklabels=True,
-        )
-        nyr_map.set(
-            title=f"{df['date'][0]} - {df['date'][len(df['date']) - 1]}"
-        )
+        if renderer == "fast":
+            nyr_map = draw_heatmap_raster(df_map, plt.gca(), "inferno", vmin=0, cbar_kws={'orientation': 'horizontal'})
+            months = list(df_map.index)
+            set_cell_ticks(nyr_map.yaxis, lambda y: months[y] if 0 <= y < len(months) else "")
+        else:
+            nyr_map = sns.heatmap(
+                df_map,
+                cmap="inferno",
+                square=True,
+                vmin=0,
+                cbar_kws={'orientation': 'horizontal'},
+                xticklabels=True,
+                yticklabels=True,
+            )
+        nyr_map.set(title=title)
         plt.xticks(rotation=0)
         plt.yticks(rotation=0)
     else:
@@ -84,37 +194,33 @@ def generate_heatmap(filepath, years_list=None, notable_days=None):
         graph_height = inches_per_year * num_years
         plt.rcParams["figure.figsize"] = (12, graph_height)
 
-        df_map = df.pivot(index=["Year", "Month"], columns="Day", values="Resolutions Met")
-        nyr_map = sns.heatmap(
-            df_map,
-            cmap="inferno",
-            square=True,
-            cbar_kws={
-                'orientation': 'horizontal',
-                'fraction': 0.04,
-                'pad': 0.08
-            },
-            xticklabels=True,
-            yticklabels=True,
-        )
-        nyr_map.set(
-            title=f"{df['date'][0]} - {df['date'][len(df['date']) - 1]}"
-        )
+        cbar_kws = {
+            'orientation': 'horizontal',
+            'fraction': 0.04,
+            'pad': 0.08
+        }
+        if renderer == "fast":
+            nyr_map = draw_heatmap_raster(df_map, plt.gca(), "inferno", cbar_kws=cbar_kws)
+        else:
+            nyr_map = sns.heatmap(
+                df_map,
+                cmap="inferno",
+                square=True,
+                cbar_kws=cbar_kws,
+                xticklabels=True,
+                yticklabels=True,
+            )
+        nyr_map.set(title=title)
 
         # Generate special tick labels that display the year for only the first month of that year
-        start_year = df["Year"][0]
-        end_year = df["Year"][len(df["Year"]) - 1]
-        start_month = 1
-        end_month = 12
-        year_month_labs = []
-        for year in range(start_year, end_year + 1):
-            for month in range(start_month, end_month + 1):
-                if month == 1:
-                    year_month_labs.append(f"{year} - {month}")
-                else:
-                    year_month_labs.append(month)
-        nyr_map.set_xticklabels(nyr_map.get_xticklabels(), rotation=0)
-        nyr_map.set_yticklabels(year_month_labs, rotation=0)
+        year_month_labs = [f"{year} - {month}" if month == 1 else month for year, month in grid.rows]
+        if renderer == "fast":
+            set_cell_ticks(nyr_map.yaxis,
+                           lambda row: year_month_labs[row] if 0 <= row < len(year_month_labs) else "")
+            nyr_map.tick_params(axis="both", labelrotation=0)
+        else:
+            nyr_map.set_xticklabels(nyr_map.get_xticklabels(), rotation=0)
+            nyr_map.set_yticklabels(year_month_labs, rotation=0)
 
     if notable_days:
         # Load from JSON file passed into parameter
@@ -127,14 +233,11 @@ def generate_heatmap(filepath, years_list=None, notable_days=None):
                 month = int(date_list[0])
                 day = int(date_list[1])
                 year = int(date_list[2])
-                if num_years == 1:
-                    date_coords = (day - 1, month - 1)
-                else:
-                    months_in_year = 12
-                    year_idx = years_list.index(year)
-                    year_month = (year_idx * months_in_year) + month
-                    date_coords = (day - 1, year_month - 1)
-                rect = plt.Rectangle(date_coords,
+                # Each day is a unit square of the grid, so its coords are just its row and column
+                row = grid.get_row(year, month)
+                if row is None:
+                    continue
+                rect = plt.Rectangle((day - 1, row),
                                      width=1,
                                      height=1,
                                      color="white",
@@ -144,7 +247,7 @@ def generate_heatmap(filepath, years_list=None, notable_days=None):
                                      alpha=0.6)
                 nyr_map.add_patch(rect)
                 nyr_map.text(day - 0.5,
-                             month - 0.5 if num_years == 1 else year_month - 0.5,
+                             row + 0.5,
                              descript,
                              horizontalalignment='left',
                              verticalalignment='center',
@@ -155,40 +258,51 @@ def generate_heatmap(filepath, years_list=None, notable_days=None):
             print(f"No such file: {e}")
 
     print("*** Saving to data/exports folder")
-    plt.savefig("data/exports/temp_graph.pdf", orientation='portrait')
+    path = "data/exports"
+    if not os.path.exists(path):
+        os.makedirs(path)
+    with span("savefig"):
+        plt.savefig(f"{path}/temp_graph.pdf", orientation='portrait')
 
 
-def get_resolution_choice_set(df):
+def get_resolution_choice_set(grid):
     """
-    Returns a list of resolution columns from the given dataframe (excluding columns that are not resolutions, such as
-    date columns).
+    Returns a list of resolution columns from the given calendar grid (excluding columns that are not resolutions, such
+    as the number of resolutions met).
     """
     non_options = ["date", "Month", "Day", "Year", "Resolutions Met"]
-    return [x for x in df if x not in non_options]
+    return [x for x in grid.columns if x not in non_options]
 
 
-def get_resolution_columns_and_values(df):
+def get_resolution_columns_and_values(grid):
     """
     Returns a formatted string containing all options for generating minimaps.
     First column contains the resolution column name.
     Second column contains a preview of the values in that column.
     """
-    choice_set = get_resolution_choice_set(df)
+    choice_set = get_resolution_choice_set(grid)
     options = ""
     for col in choice_set:
-        values = df[col].unique()
+        values = grid.unique(col)
         options += "{0:20}  {1}".format(col, values)
         options += "\n"
     return options
 
 
-def get_columns(prompt, df):
+def get_columns(prompt, grid):
     """
     Returns a list of validated columns from which to generate minimaps.
     """
-    cols = input(prompt)
+    return parse_columns(input(prompt), grid)
+
+
+def parse_columns(cols, grid):
+    """
+    Takes a comma-separated list of columns (or 'all', 'binary', 'nonbinary') and returns the list of validated columns
+    from which to generate minimaps.
+    """
     cols = "".join(cols.split())  # remove whitespace
-    all_options = get_resolution_choice_set(df)
+    all_options = get_resolution_choice_set(grid)
 
     if cols.lower() == "all":
         return all_options
@@ -250,35 +364,171 @@ def calculate_grid_dimensions(num_maps):
     return num_cols, num_rows
 
 
-def generate_minimaps(filename, years_list=None):
+@profiled("prepare minimap")
+def prepare_minimap_panel(grid, res):
+    """
+    Slices the data for a single resolution out of the calendar grid, as the Month (or Year-Month) x Day grid displayed
+    by its minimap.
+
+    Returns a dict with the grid, along with how to color it: non-binary resolutions are encoded as integers (with 0 as
+    the first category) and use a qualitative colormap with a cbar, while binary resolutions are displayed in black and
+    white. Detail codes are numbered in the order the calendar grid was built with, and days with more than one code
+    share a single "multiple" category.
+    """
+    values = grid.layer(res)
+    # Use qualitative colormap to display non-binary resolutions and show cbar
+    if res in grid.codes:
+        # Detail codes are stored as bitmasks, so that multi-code days are told apart by their bits rather than by string
+        has_value = ~np.isnan(values)
+        category_values, categories = categorize_masks(values[has_value].astype(np.uint64), grid.codes[res])
+        values = np.full(values.shape, np.nan)
+        values[has_value] = category_values
+        n = len(categories)
+        # Generate colors based on a cmap, with 0's as white and multi-code days in gray
+        if n > 2:
+            num_colors = n - 1 - (categories[-1] == "multiple")
+            colors = ["white"] + sns.color_palette("turbo", num_colors)
+            if categories[-1] == "multiple":
+                colors.append("dimgray")
+        else:  # if there's only 2 categories (including 0) it might as well be binary
+            colors = ["white", "black"]
+        display_cbar = True
+    else:
+        categories = []
+        colors = "binary"
+        display_cbar = False
+
+    return {
+        "res": res,
+        "df_map": grid.to_frame(values),
+        "categories": categories,
+        "colors": colors,
+        "display_cbar": display_cbar,
+    }
+
+
+def get_minimap_cmap(panel):
+    """
+    Returns the colormap and normalization used to color a minimap, matching what sns.heatmap() derives from the same
+    panel.
+    """
+    df_map = panel["df_map"]
+    cmap = ListedColormap(panel["colors"]) if isinstance(panel["colors"], list) else plt.get_cmap(panel["colors"])
+    norm = Normalize(vmin=df_map.min().min(), vmax=df_map.max().max())
+    return cmap, norm
+
+
+def render_minimap_panel(grid, res):
+    """
+    Prepares and rasterizes the minimap for a single resolution into an RGBA pixel grid (one pixel per day).
+    Runs in a worker process when minimaps are rendered in parallel, so only plain data is returned.
+    """
+    panel = prepare_minimap_panel(grid, res)
+    cmap, norm = get_minimap_cmap(panel)
+    panel["rgba"] = cmap(norm(panel["df_map"].values))
+    return panel
+
+
+def draw_minimap_raster(panel, ax):
+    """
+    Draws a minimap rasterized by render_minimap_panel() onto ax, laid out the same way as sns.heatmap().
+    Returns ax along with the minimap's cbar (None for binary resolutions).
+    """
+    df_map = panel["df_map"]
+    num_rows, num_cols = df_map.shape
+    ax.imshow(panel["rgba"], interpolation="none", extent=(0, num_cols, num_rows, 0))
+    ax.set_xlim(0, num_cols)
+    ax.set_ylim(num_rows, 0)
+    colorbar = None
+    if panel["display_cbar"]:
+        cmap, norm = get_minimap_cmap(panel)
+        colorbar = ax.figure.colorbar(
+            ScalarMappable(norm=norm, cmap=cmap),
+            ax=ax,
+            orientation="horizontal",
+            fraction=0.03,
+            pad=0.08
+        )
+    # Tick positions are computed and labels are only formatted for the ticks that end up drawn, rather than creating a
+    # labeled tick for every row and column
+    xlabels = list(df_map.columns)
+    ylabels = list(df_map.index)
+    xstep = get_auto_tick_step(ax, num_cols, axis=0)
+    ystep = get_auto_tick_step(ax, num_rows, axis=1)
+    ax.xaxis.set_major_locator(FixedLocator(np.arange(0, num_cols, xstep) + 0.5))
+    ax.xaxis.set_major_formatter(FuncFormatter(lambda x, pos: format_cell_label(xlabels, x)))
+    ax.yaxis.set_major_locator(FixedLocator(np.arange(0, num_rows, ystep) + 0.5))
+    ax.yaxis.set_major_formatter(FuncFormatter(lambda y, pos: format_cell_label(ylabels, y)))
+    return ax, colorbar
+
+
+def format_cell_label(labels, position):
+    """
+    Returns the label of the row/column of a grid at position (e.g. 2020-1 for the row at 0.5 in a Year-Month grid).
+    """
+    idx = int(position)
+    if not 0 <= idx < len(labels):
+        return ""
+    label = labels[idx]
+    return "-".join(str(part) for part in label) if isinstance(label, tuple) else str(label)
+
+
+def get_auto_tick_step(ax, num_labels, axis):
+    """
+    Returns how many rows/columns apart tick labels should be so that they don't overlap, using the same heuristic as
+    sns.heatmap(xticklabels="auto", yticklabels="auto").
+    """
+    bbox = ax.get_window_extent().transformed(ax.figure.dpi_scale_trans.inverted())
+    size = [bbox.width, bbox.height][axis]
+    fontsize = [ax.xaxis, ax.yaxis][axis].get_major_ticks()[0].label1.get_size()
+    max_ticks = int(size // (fontsize / 72))
+    return max(num_labels // max_ticks + 1, 1) if max_ticks >= 1 else num_labels
+
+
+@profiled("minimaps")
+def generate_minimaps(filename, years_list=None, workers=None, columns=None, detail_codes=None, renderer=None):
     """
     Generate mini heatmaps from data.
     Each minimap corresponds to a resolution, and values indicate whether the resolution was met that day.
     Minimaps can display both binary and non-binary data.
+    With more than one worker (defaults to RESOLVE_MINIMAP_WORKERS), each minimap is sliced and rasterized in its own
+    process and the results are assembled into the same grid. Minimaps rendered that way are drawn as images, as they
+    are with the "fast" renderer (see RENDERERS; defaults to RENDERER).
+    Columns to create minimaps from can be passed in as a comma-separated list (or 'all', 'binary', 'nonbinary');
+    otherwise, the user is asked to pick them.
+    detail_codes maps resolutions to their detail codes, which sets the order of their categories (otherwise codes are
+    ordered as they first show up in the data) when the calendar grid is built here.
+    Data can be passed in as the path to a cleaned CSV/Parquet file, an already cleaned DataFrame, or a CalendarGrid
+    built from one.
     Graph is displayed on-screen as well as temporarily saved to data/exports as temp_minimaps.pdf.
     """
-    df = pd.read_csv(filename)
+    renderer = get_renderer(renderer)
+    workers = get_minimap_workers(workers)
+    grid = load_calendar_grid(filename, detail_codes=detail_codes)
     if not years_list:
-        start_date_str = df["date"][0]
-        end_date_str = df["date"][len(df) - 1]
-        years_list = get_years_list(start_date_str, end_date_str)
+        years_list = grid.years
     num_years = len(years_list)
 
-    options = get_resolution_columns_and_values(df)
-    print(f"\nPreview of data from uploaded dataset:\n{options}")
-
-    instructions = "Enter a comma-separated list of columns to create minimaps from (e.g. exercise,skincare).\n" \
-                   "You may also enter:\n" \
-                   "--'all' to use all columns, \n" \
-                   "--'binary' to use all boolean columns, or\n" \
-                   "--'nonbinary' to use all non-boolean columns\n"
-    print(f"INSTRUCTIONS: {instructions}")
-    col_list = []
-    while len(col_list) == 0:
-        col_list = get_columns(
-            "Which resolutions do you want to create minimaps from?: ",
-            df
-        )
+    if columns:
+        col_list = parse_columns(columns, grid)
+        if len(col_list) == 0:
+            raise ValueError(f"No valid columns to create minimaps from in `{columns}`")
+    else:
+        options = get_resolution_columns_and_values(grid)
+        print(f"\nPreview of data from uploaded dataset:\n{options}")
+
+        instructions = "Enter a comma-separated list of columns to create minimaps from (e.g. exercise,skincare).\n" \
+                       "You may also enter:\n" \
+                       "--'all' to use all columns, \n" \
+                       "--'binary' to use all boolean columns, or\n" \
+                       "--'nonbinary' to use all non-boolean columns\n"
+        print(f"INSTRUCTIONS: {instructions}")
+        col_list = []
+        while len(col_list) == 0:
+            col_list = get_columns(
+                "Which resolutions do you want to create minimaps from?: ",
+                grid
+            )
 
     # Calculate the smallest squarish grid that will hold all plots
     num_maps = len(col_list)
@@ -293,54 +543,59 @@ def generate_minimaps(filename, years_list=None):
         sharex=True,
         sharey=True
     )
+    # Slice and rasterize each minimap in a worker process when rendering in parallel
+    if workers > 1:
+        with span("render minimaps in workers"), ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(render_minimap_panel, grid.select([res]), res)
+                for res in col_list
+            ]
+            results = []
+            for future in futures:
+                try:
+                    results.append(future.result())
+                except Exception as e:
+                    results.append(e)
+    else:
+        results = col_list
+
     i = 0
     j = 0
-    for res in col_list:
+    for result in results:
         try:
-            if num_years == 1:
-                df_map = df.pivot(index="Month", columns="Day", values=res)
-            else:
-                df_map = df.pivot(index=["Year", "Month"], columns="Day", values=res)
-
-            # Use qualitative colormap to display non-binary resolutions and show cbar
-            # TODO: display differently days in which multiple non-binary resolutions were fulfilled
-            if "bool" not in res:
-                # Get categories from categorical data
-                categories = pd.unique(df_map.values.ravel())
-                categories = [x for x in categories if not pd.isnull(x)]
-                cat_to_int = {j: i for i, j in enumerate(categories)}
-                n = len(cat_to_int)
-                df_map = df_map.replace(cat_to_int)
-                # Generate colors based on a cmap, with 0's as white
-                if n > 2:
-                    palette = sns.color_palette("turbo", n - 1)
-                    colors = ["white"] + palette
-                else:  # if there's only 2 categories (including 0) it might as well be binary
-                    colors = ["white", "black"]
-                display_cbar = True
+            if isinstance(result, Exception):
+                raise result
+            ax = axes[i][j] if num_maps > 2 else axes[j] if num_maps == 2 else axes
+            if workers > 1:
+                panel = result
+                nyr_map, colorbar = draw_minimap_raster(panel, ax)
+            elif renderer == "fast":
+                panel = render_minimap_panel(grid, result)
+                nyr_map, colorbar = draw_minimap_raster(panel, ax)
             else:
-                colors = "binary"
-                display_cbar = False
-
-            nyr_map = sns.heatmap(
-                df_map,
-                cmap=colors,
-                square=True,
-                cbar=display_cbar,
-                cbar_kws={
-                    "orientation": "horizontal",
-                    "fraction": 0.03,
-                    "pad": 0.08
-                },
-                ax=axes[i][j] if num_maps > 2 else axes[j] if num_maps == 2 else axes
-            )
+                panel = prepare_minimap_panel(grid, result)
+                nyr_map = sns.heatmap(
+                    panel["df_map"],
+                    cmap=panel["colors"],
+                    square=True,
+                    cbar=panel["display_cbar"],
+                    cbar_kws={
+                        "orientation": "horizontal",
+                        "fraction": 0.03,
+                        "pad": 0.08
+                    },
+                    ax=ax
+                )
+                colorbar = nyr_map.collections[0].colorbar
+            res = panel["res"]
+            display_cbar = panel["display_cbar"]
+            n = len(panel["categories"])
 
             # Modify cbar for categorical resolutions
             if display_cbar:
-                colorbar = nyr_map.collections[0].colorbar
                 r = colorbar.vmax - colorbar.vmin
                 colorbar.set_ticks([colorbar.vmin + r / n * (0.5 + i) for i in range(n)])
-                colorbar.set_ticklabels(list(cat_to_int.keys()))
+                colorbar.set_ticklabels(panel["categories"])
 
             # Turn off labels on minimaps
             nyr_map.set(
@@ -401,4 +656,8 @@ def generate_minimaps(filename, years_list=None):
         plt.ylabel("Year-Month")
 
     print("*** Saving to data/exports folder")
-    plt.savefig("data/exports/temp_minimaps.pdf", dpi=300)
+    path = "data/exports"
+    if not os.path.exists(path):
+        os.makedirs(path)
+    with span("savefig"):
+        plt.savefig(f"{path}/temp_minimaps.pdf", dpi=300)
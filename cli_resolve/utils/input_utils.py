@@ -1,6 +1,6 @@
 import sys
-from datetime import date, datetime
 
+from .date_utils import date_string_to_ordinal, ordinal_to_date_string, today_date_string
 from .resolution_utils import print_detail_codes, add_detail_code
 
 
@@ -28,31 +28,36 @@ def get_date_string_response(prompt, year_start=False, year_end=False):
     while True:
         command = input(prompt)
         try:
-            if command.lower() == "today":
-                return date.today().strftime("%-m/%-d/%Y")
-            if command.lower() == "never":
-                return None
-            if command.lower() == "file":
-                return "file"
-            if year_start:
-                command = f"1/1/{command}"
-            if year_end:
-                command = f"12/31/{command}"
-            validate_date_string(command)
-            return command
+            return parse_date_string(command, year_start=year_start, year_end=year_end)
         except ValueError as e:
             print(f"Invalid input: {e}")
             continue
 
 
+def parse_date_string(command, year_start=False, year_end=False):
+    """
+    Takes a date input and returns it as a date string in the form of "M/D/YYYY" (the form dates are stored in).
+    Also accepts 'today', 'never' (returned as None), and 'file'. If year_start or year_end is set, a year on its own
+    stands for the first or last day of that year.
+    """
+    if command.lower() == "today":
+        return today_date_string()
+    if command.lower() == "never":
+        return None
+    if command.lower() == "file":
+        return "file"
+    if year_start and "/" not in command:
+        command = f"1/1/{command}"
+    if year_end and "/" not in command:
+        command = f"12/31/{command}"
+    return ordinal_to_date_string(date_string_to_ordinal(command))
+
+
 def validate_date_string(date_string):
     """
     Validates date input strings to ensure that they are in 'MM/DD/YYYY' format.
     """
-    try:
-        datetime.strptime(date_string, "%m/%d/%Y")
-    except ValueError:
-        raise ValueError(f"Invalid date={date_string}; date input should be in the form of 'MM/DD/YYYY'")
+    date_string_to_ordinal(date_string)
 
 
 def get_boolean_response(prompt):
@@ -62,17 +67,24 @@ def get_boolean_response(prompt):
     while True:
         command = input(prompt)
         try:
-            if command.upper() == "Y":
-                return True
-            elif command.upper() == "N":
-                return False
-            else:
-                raise ValueError("Input should be 'Y' or 'N'")
+            return parse_boolean_string(command)
         except ValueError as e:
             print(f"Invalid input: {e}")
             continue
 
 
+def parse_boolean_string(command):
+    """
+    Takes a Y/N answer and returns the corresponding boolean.
+    """
+    if command.upper() == "Y":
+        return True
+    elif command.upper() == "N":
+        return False
+    else:
+        raise ValueError("Input should be 'Y' or 'N'")
+
+
 def get_detail_code_response(prompt, existing_codes):
     """
     Gets a valid detail code response.
@@ -84,20 +96,37 @@ def get_detail_code_response(prompt, existing_codes):
             if command.upper() == "N":
                 return False
 
-            code_list = command.split(",")
             # Check that each code is already a defined code, or add it now
-            for char in code_list:
-                code = char.upper()
-                if len(char) > 1:
-                    raise ValueError(f"Code should be of len=1; found len={len(char)} for code `{char}`")
+            for code in parse_detail_codes(command):
                 if code not in existing_codes:
                     existing_codes.update(add_detail_code(code))
-            return command
+            return format_detail_codes(command)
         except ValueError as e:
             print(f"Invalid input: {e}")
             continue
 
 
+def parse_detail_codes(command):
+    """
+    Takes a comma-separated list of detail codes and returns the list of (uppercased) codes.
+    """
+    codes = []
+    for char in command.split(","):
+        char = char.strip()
+        if len(char) != 1:
+            raise ValueError(f"Code should be of len=1; found len={len(char)} for code `{char}`")
+        codes.append(char.upper())
+    return codes
+
+
+def format_detail_codes(command):
+    """
+    Takes a comma-separated list of detail codes and returns it in the form logged codes are stored in, however it was
+    typed (e.g. "r, b" -> "R,B").
+    """
+    return ",".join(parse_detail_codes(command))
+
+
 def handle_input(prompt, response_type=None, **kwargs):
     """
     Generic function for handling user input.
@@ -0,0 +1,63 @@
+import logging
+import sys
+import time
+
+# Name of the logger that all of the app's loggers hang off
+LOGGER_NAME = "resolve"
+# Seconds between progress updates of long-running loops
+PROGRESS_INTERVAL = 1.0
+
+
+def get_logger(name):
+    """
+    Returns the app's logger for a module (e.g. get_logger("export") -> resolve.export).
+    """
+    return logging.getLogger(f"{LOGGER_NAME}.{name}")
+
+
+def configure_logging(verbosity=0):
+    """
+    Sends the app's log messages to stdout alongside everything else it prints.
+    verbosity of 0 shows progress summaries, 1 or more adds per-day detail (debug), and -1 or less shows warnings only.
+    """
+    if verbosity > 0:
+        level = logging.DEBUG
+    elif verbosity < 0:
+        level = logging.WARNING
+    else:
+        level = logging.INFO
+    logger = logging.getLogger(LOGGER_NAME)
+    if not logger.handlers:
+        handler = logging.StreamHandler(sys.stdout)
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(handler)
+    logger.setLevel(level)
+    logger.propagate = False
+
+
+class ProgressLogger:
+    """
+    Reports progress through a loop of known length at most once every PROGRESS_INTERVAL seconds (at info level), so
+    that long loops stay quiet but not silent.
+    """
+
+    def __init__(self, logger, action, total, unit="days"):
+        self.logger = logger
+        self.action = action
+        self.total = total
+        self.unit = unit
+        self.count = 0
+        self.enabled = logger.isEnabledFor(logging.INFO)
+        self.last_report = time.monotonic()
+
+    def update(self, n=1):
+        self.count += n
+        if self.enabled:
+            now = time.monotonic()
+            if now - self.last_report >= PROGRESS_INTERVAL:
+                self.last_report = now
+                self.logger.info("*** %s %d/%d %s (%d%%)", self.action, self.count, self.total, self.unit,
+                                 self.count * 100 // max(self.total, 1))
+
+    def done(self, details=""):
+        self.logger.info("*** %s %d %s%s", self.action, self.count, self.unit, details)
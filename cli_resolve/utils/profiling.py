@@ -0,0 +1,184 @@
+import atexit
+import functools
+import json
+import os
+import sys
+import time
+from contextlib import nullcontext
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+PROFILE_FORMATS = ["text", "json", "chrome"]
+# Where reports are written when no output path is given
+PROFILE_PATHS = {
+    "json": "data/exports/profile.json",
+    "chrome": "data/exports/profile_trace.json",
+}
+
+_enabled = False
+_spans = []
+_stack = []
+_origin = time.perf_counter()
+
+# Shared no-op span handed out while profiling is off, so that instrumented code costs a flag check and nothing more
+_NULL_SPAN = nullcontext()
+
+
+def get_peak_rss():
+    """
+    Returns the peak resident set size of this process so far, in bytes (or 0 where it can't be measured).
+    """
+    if resource is None:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS reports bytes, Linux reports kilobytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class Span:
+    """
+    Times a stage of work (along with the growth in peak RSS while it ran) and records it once the stage is over.
+    Spans opened inside another span are recorded as its children.
+    """
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        _stack.append(self.name)
+        self.path = "/".join(_stack)
+        self.depth = len(_stack) - 1
+        self.rss_start = get_peak_rss()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        end = time.perf_counter()
+        peak_rss = get_peak_rss()
+        _stack.pop()
+        _spans.append({
+            "name": self.name,
+            "path": self.path,
+            "depth": self.depth,
+            "start": self.start - _origin,
+            "duration": end - self.start,
+            "peak_rss": peak_rss,
+            "rss_growth": peak_rss - self.rss_start,
+        })
+        return False
+
+
+def span(name):
+    """
+    Returns a context manager that records the enclosed block as a stage named name while profiling is on.
+    """
+    if not _enabled:
+        return _NULL_SPAN
+    return Span(name)
+
+
+def profiled(name):
+    """
+    Decorator that records every call to the decorated function as a stage named name while profiling is on.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            with Span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def enable(report_format="text", output=None):
+    """
+    Turns profiling on for the rest of the process and reports the recorded stages when the process exits.
+    """
+    global _enabled
+    if report_format not in PROFILE_FORMATS:
+        raise ValueError(f"Unknown profile format={report_format}; expected one of {PROFILE_FORMATS}")
+    _enabled = True
+    atexit.register(report, report_format, output)
+
+
+def get_spans():
+    """
+    Returns the recorded spans in the order they started.
+    """
+    return sorted(_spans, key=lambda s: s["start"])
+
+
+def format_text_report(spans):
+    """
+    Returns a stage breakdown of spans as an indented table, with repeated stages (e.g. one per minimap) added up.
+    """
+    stages = {}
+    for s in spans:
+        stage = stages.setdefault(s["path"], {"name": s["name"], "depth": s["depth"], "calls": 0, "duration": 0,
+                                              "peak_rss": 0, "rss_growth": 0})
+        stage["calls"] += 1
+        stage["duration"] += s["duration"]
+        stage["peak_rss"] = max(stage["peak_rss"], s["peak_rss"])
+        stage["rss_growth"] += s["rss_growth"]
+    total = sum(stage["duration"] for stage in stages.values() if stage["depth"] == 0)
+
+    lines = ["{0:40}  {1:>6}  {2:>10}  {3:>6}  {4:>14}".format("STAGE", "CALLS", "TIME (s)", "%", "PEAK RSS (MB)")]
+    for stage in stages.values():
+        name = "  " * stage["depth"] + stage["name"]
+        share = stage["duration"] / total * 100 if total else 0
+        lines.append("{0:40}  {1:6}  {2:10.3f}  {3:6.1f}  {4:8.1f} {5:>+5.0f}".format(
+            name, stage["calls"], stage["duration"], share, stage["peak_rss"] / 1024 ** 2,
+            stage["rss_growth"] / 1024 ** 2
+        ))
+    return "\n".join(lines)
+
+
+def format_chrome_trace(spans):
+    """
+    Returns spans as a Chrome trace (viewable in chrome://tracing or https://ui.perfetto.dev).
+    """
+    pid = os.getpid()
+    return {
+        "traceEvents": [
+            {
+                "name": s["name"],
+                "ph": "X",
+                "ts": s["start"] * 1e6,
+                "dur": s["duration"] * 1e6,
+                "pid": pid,
+                "tid": 0,
+                "args": {"peak_rss_mb": round(s["peak_rss"] / 1024 ** 2, 1),
+                         "rss_growth_mb": round(s["rss_growth"] / 1024 ** 2, 1)},
+            }
+            for s in spans
+        ],
+        "displayTimeUnit": "ms",
+    }
+
+
+def report(report_format="text", output=None):
+    """
+    Prints the stage breakdown, or writes it as JSON or as a Chrome trace to output.
+    """
+    spans = get_spans()
+    if not spans:
+        return
+    if report_format == "text":
+        print(f"\n*** Profile\n{format_text_report(spans)}")
+        return
+
+    output = output or PROFILE_PATHS[report_format]
+    path = os.path.dirname(output)
+    if path and not os.path.exists(path):
+        os.makedirs(path)
+    with open(output, "w") as f:
+        if report_format == "json":
+            json.dump({"spans": spans}, f, indent=4)
+        else:
+            json.dump(format_chrome_trace(spans), f)
+    print(f"*** Saved profile to {output}")
@@ -0,0 +1,269 @@
+import numpy as np
+
+from .date_index import ResolutionData
+from .date_utils import get_year_start, split_ordinal
+from .export_utils import FALSY_VALUES
+
+# Every year gets an array long enough for a leap year; Dec 31 of a common year simply leaves the last slot unused
+DAYS_PER_YEAR = 366
+
+
+def iter_year_slices(start_ordinal, end_ordinal):
+    """
+    Yields (year, first index, last index + 1) for each year overlapping start_ordinal to end_ordinal (inclusive).
+    """
+    start_year, start_idx = split_ordinal(start_ordinal)
+    end_year, end_idx = split_ordinal(end_ordinal)
+    for year in range(start_year, end_year + 1):
+        first = start_idx if year == start_year else 0
+        last = end_idx + 1 if year == end_year else get_year_start(year + 1) - get_year_start(year)
+        yield year, first, last
+
+
+def fill_years(days, data, start_ordinal, end_ordinal, encode):
+    """
+    Fills in the year arrays of days (a BinaryDays or CategoricalDays) with encode(value) for every day of data from
+    start_ordinal to end_ordinal (inclusive), a year at a time rather than a day at a time.
+    Each distinct value is only encoded once.
+    """
+    if not isinstance(data, ResolutionData):
+        data = ResolutionData(data)
+    ordinals = data.ordinals_between(start_ordinal, end_ordinal)
+    if not ordinals:
+        return days
+    encoded = {}
+    values = []
+    for ordinal in ordinals:
+        value = data[data.key_for(ordinal)]
+        # Keyed by type too, so that e.g. True and 1 aren't taken for the same value
+        key = (type(value), value)
+        if key not in encoded:
+            encoded[key] = encode(value)
+        values.append(encoded[key])
+    ordinals = np.asarray(ordinals)
+    values = np.asarray(values)
+    for year, _, _ in iter_year_slices(int(ordinals[0]), int(ordinals[-1])):
+        year_start = get_year_start(year)
+        i, j = np.searchsorted(ordinals, [year_start, get_year_start(year + 1)])
+        if i == j:
+            continue
+        year_values, logged = days._get_year(year)
+        year_values[ordinals[i:j] - year_start] = values[i:j]
+        logged[ordinals[i:j] - year_start] = True
+    return days
+
+
+def is_met(value):
+    """
+    Returns whether a binary value records the resolution as met.
+    """
+    return value is not None and value not in FALSY_VALUES
+
+
+class BinaryDays:
+    """
+    Compact in-memory model of a binary resolution's data.
+
+    For each year with data, a bool array indexed by day of year records whether the resolution was met, and a second
+    "has entry" mask records which days were logged at all. That's 2 bytes per day instead of a dict entry keyed by a
+    date string, and range queries become array slices instead of dict lookups.
+    """
+
+    def __init__(self):
+        self.met = {}
+        self.logged = {}
+
+    @classmethod
+    def from_data(cls, data, start_ordinal, end_ordinal):
+        """
+        Builds the model from the days from start_ordinal to end_ordinal (inclusive) of a resolution's data dict (keyed
+        by 'M/D/YYYY' date strings).
+        """
+        return fill_years(cls(), data, start_ordinal, end_ordinal, is_met)
+
+    def _get_year(self, year):
+        if year not in self.met:
+            self.met[year] = np.zeros(DAYS_PER_YEAR, dtype=bool)
+            self.logged[year] = np.zeros(DAYS_PER_YEAR, dtype=bool)
+        return self.met[year], self.logged[year]
+
+    def _between(self, arrays, start_ordinal, end_ordinal):
+        parts = []
+        for year, first, last in iter_year_slices(start_ordinal, end_ordinal):
+            if year in arrays:
+                parts.append(arrays[year][first:last])
+            else:
+                parts.append(np.zeros(last - first, dtype=bool))
+        return np.concatenate(parts)
+
+    def met_between(self, start_ordinal, end_ordinal):
+        """
+        Returns a bool array with one element per day from start_ordinal to end_ordinal (inclusive), True on the days
+        the resolution was met.
+        """
+        return self._between(self.met, start_ordinal, end_ordinal)
+
+    def logged_between(self, start_ordinal, end_ordinal):
+        """
+        Returns a bool array with one element per day from start_ordinal to end_ordinal (inclusive), True on the days
+        that were logged.
+        """
+        return self._between(self.logged, start_ordinal, end_ordinal)
+
+
+def get_mask_dtype(num_codes):
+    """
+    Returns the smallest unsigned integer dtype with a bit for each of num_codes detail codes.
+    """
+    for dtype in (np.uint8, np.uint16, np.uint32, np.uint64):
+        if num_codes <= np.iinfo(dtype).bits:
+            return dtype
+    raise ValueError(f"Too many detail codes={num_codes}; at most 64 are supported")
+
+
+def parse_codes(value):
+    """
+    Returns the detail codes recorded in a categorical value (e.g. "R,B" -> ["R", "B"]), or [] for days the resolution
+    wasn't met.
+    """
+    if value is None or value != value or value in FALSY_VALUES:
+        return []
+    return [code.strip().upper() for code in str(value).split(",") if code.strip()]
+
+
+class CategoricalDays:
+    """
+    Compact in-memory model of a non-binary resolution's data.
+
+    Detail codes are numbered in the order of the resolution's res_detail_codes (codes that only show up in the data
+    are numbered after them). For each year with data, an unsigned int array indexed by day of year holds a bitmask of
+    the codes recorded that day, so days with several codes (e.g. "R,B") are stored as a combination of their codes
+    rather than as a category of their own. A second "has entry" mask records which days were logged at all.
+    """
+
+    def __init__(self, codes=()):
+        self.codes = []
+        self.code_bits = {}
+        self.dtype = np.uint8
+        self.masks = {}
+        self.logged = {}
+        for code in codes:
+            self.add_code(code)
+
+    @classmethod
+    def from_data(cls, data, start_ordinal, end_ordinal, detail_codes=()):
+        """
+        Builds the model from the days from start_ordinal to end_ordinal (inclusive) of a resolution's data dict (keyed
+        by 'M/D/YYYY' date strings) and its detail codes.
+        """
+        days = cls(detail_codes)
+        return fill_years(days, data, start_ordinal, end_ordinal, days.encode)
+
+    def add_code(self, code):
+        """
+        Adds code to the code dictionary (if it isn't in it yet) and returns its bit.
+        """
+        code = code.upper()
+        if code not in self.code_bits:
+            dtype = get_mask_dtype(len(self.codes) + 1)
+            if dtype != self.dtype:
+                self.dtype = dtype
+                self.masks = {year: masks.astype(dtype) for year, masks in self.masks.items()}
+            self.code_bits[code] = 1 << len(self.codes)
+            self.codes.append(code)
+        return self.code_bits[code]
+
+    def encode(self, value):
+        """
+        Returns the bitmask of the codes recorded in value.
+        """
+        mask = 0
+        for code in parse_codes(value):
+            mask |= self.add_code(code)
+        return mask
+
+    def decode(self, mask):
+        """
+        Returns the value stored in data/resolutions.json for a bitmask: its codes joined by commas, or False for none.
+        """
+        mask = int(mask)
+        if not mask:
+            return False
+        return ",".join(code for code in self.codes if mask & self.code_bits[code])
+
+    def _get_year(self, year):
+        if year not in self.masks:
+            self.masks[year] = np.zeros(DAYS_PER_YEAR, dtype=self.dtype)
+            self.logged[year] = np.zeros(DAYS_PER_YEAR, dtype=bool)
+        return self.masks[year], self.logged[year]
+
+    def _between(self, arrays, dtype, start_ordinal, end_ordinal):
+        parts = []
+        for year, first, last in iter_year_slices(start_ordinal, end_ordinal):
+            if year in arrays:
+                parts.append(arrays[year][first:last].astype(dtype, copy=False))
+            else:
+                parts.append(np.zeros(last - first, dtype=dtype))
+        return np.concatenate(parts)
+
+    def masks_between(self, start_ordinal, end_ordinal):
+        """
+        Returns the bitmask of codes recorded on each day from start_ordinal to end_ordinal (inclusive).
+        """
+        return self._between(self.masks, self.dtype, start_ordinal, end_ordinal)
+
+    def logged_between(self, start_ordinal, end_ordinal):
+        """
+        Returns a bool array with one element per day from start_ordinal to end_ordinal (inclusive), True on the days
+        that were logged.
+        """
+        return self._between(self.logged, bool, start_ordinal, end_ordinal)
+
+    def values_between(self, start_ordinal, end_ordinal):
+        """
+        Returns the value an export records on each day from start_ordinal to end_ordinal (inclusive): the recorded
+        codes (e.g. "R,B"), or 0 for days without any.
+        """
+        masks = self.masks_between(start_ordinal, end_ordinal)
+        uniques, inverse = np.unique(masks, return_inverse=True)
+        decoded = np.array([self.decode(mask) or 0 for mask in uniques], dtype=object)
+        return decoded[inverse]
+
+
+def encode_detail_codes(values, codes=()):
+    """
+    Encodes a column of categorical values (as found in a cleaned dataset) as bitmasks over a code dictionary that
+    starts with codes. Missing values are encoded as 0.
+    Returns (bitmasks, list of codes).
+    """
+    import pandas as pd
+
+    labels, uniques = pd.factorize(values)
+    days = CategoricalDays(codes)
+    unique_masks = [days.encode(value) for value in uniques]
+    # Missing values are labeled -1, which picks up the trailing 0
+    unique_masks = np.array(unique_masks + [0], dtype=days.dtype)
+    return unique_masks[labels], days.codes
+
+
+def categorize_masks(masks, codes):
+    """
+    Maps bitmasks to display categories numbered from 0: no codes (if any day has none), then each code that shows up
+    on its own (in the order of codes), then "multiple" for days with more than one code.
+    Returns (category of each day, list of category labels).
+    """
+    categories = np.zeros(len(masks), dtype=float)
+    labels = []
+    empty = masks == 0
+    if empty.any():
+        labels.append(0)
+    for bit, code in enumerate(codes):
+        single = masks == (1 << bit)
+        if single.any():
+            categories[single] = len(labels)
+            labels.append(code)
+    multiple = (masks & (masks - 1)) != 0
+    if multiple.any():
+        categories[multiple] = len(labels)
+        labels.append("multiple")
+    return categories, labels
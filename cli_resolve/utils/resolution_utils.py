@@ -1,5 +1,5 @@
-import json
-from datetime import datetime
+from .date_utils import date_string_to_ordinal, today_date_string, today_ordinal
+from .storage import get_store
 
 
 def add_detail_code(char):
@@ -15,30 +15,55 @@ def get_all_resolutions():
     """
     Returns dict of all resolutions.
     """
-    with open("data/resolutions.json", "r") as f:
-        all_res_dict = json.load(f)
-    return all_res_dict
+    return get_store().load()
 
 
-def get_active_resolutions():
+def expire_resolutions(all_res_dict):
     """
-    Returns a dict with all currently active resolutions.
-    Automatically inactivates resolutions past their expiration date.
+    Inactivates (in memory) every active resolution in all_res_dict that is past its expiration date.
+    Returns a dict of the resolutions that were inactivated, so that they can be persisted in a single write.
     """
-    with open("data/resolutions.json", "r") as f:
-        all_res_dict = json.load(f)
-    active_res_dict = {}
+    today = today_ordinal()
+    expired_res_dict = {}
     for key, val in all_res_dict.items():
         if val["is_active"]:
-            # Check against expiration date first and update active status if expired
             expiry = val["res_expiration_date"]
-            if not expiry or datetime.strptime(expiry, "%m/%d/%Y") > datetime.today():
-                active_res_dict[key] = val
-            else:
+            if expiry and date_string_to_ordinal(expiry) <= today:
                 val["is_active"] = False
-                with open("data/resolutions.json", "w") as f:
-                    json.dump(all_res_dict, f, indent=4)
-    return active_res_dict
+                expired_res_dict[key] = val
+    return expired_res_dict
+
+
+def get_active_resolutions(all_res_dict=None):
+    """
+    Returns a dict with all currently active resolutions.
+    Automatically inactivates resolutions past their expiration date, saving them to the store in a single write.
+
+    If an already loaded all_res_dict is passed in, it is swept in memory only and saving is left to the caller, so
+    that the expiry sweep can share the caller's read and write (see log_resolutions()).
+    """
+    store = get_store()
+    is_loaded_here = all_res_dict is None
+    if is_loaded_here:
+        all_res_dict = store.load()
+    expired_res_dict = expire_resolutions(all_res_dict)
+    if expired_res_dict and is_loaded_here:
+        store.update(resolutions=expired_res_dict)
+    return {key: val for key, val in all_res_dict.items() if val["is_active"]}
+
+
+def toggle_resolution(res, res_expiration_date=None):
+    """
+    Flips the is_active status of a resolution (in memory).
+    Resolutions toggled to inactive expire today, while resolutions toggled to active expire on res_expiration_date
+    (None for no expiration).
+    """
+    res["is_active"] = not res["is_active"]
+    if not res["is_active"]:
+        res["res_expiration_date"] = today_date_string()
+    else:
+        res["res_expiration_date"] = res_expiration_date
+    return res
 
 
 def print_detail_codes(detail_codes):
@@ -0,0 +1,237 @@
+import hashlib
+import json
+import os
+import zlib
+from datetime import datetime
+
+from .date_index import index_resolutions
+
+SNAPSHOTS_DIRNAME = "snapshots"
+# Snapshot ids are the time they were taken, so that sorting them by name sorts them by age
+SNAPSHOT_ID_FORMAT = "%Y%m%d-%H%M%S-%f"
+# Seconds between the snapshots taken before logging (full saves always take one)
+SNAPSHOT_INTERVAL = 24 * 60 * 60
+
+# Retention policy: the most recent snapshots are always kept, along with the newest snapshot of each of the most
+# recent days and months that have any
+KEEP_LAST = 10
+KEEP_DAILY = 14
+KEEP_MONTHLY = 12
+
+
+class SnapshotStore:
+    """
+    Deduplicated, compressed snapshots of all resolutions, kept in data/snapshots.
+
+    Each resolution is split into chunks: its settings, and its data for each year. Chunks are compressed and stored
+    once under objects/, named after the SHA-256 of their contents, so a chunk that hasn't changed since an earlier
+    snapshot (e.g. every past year of a resolution) costs nothing to snapshot again. A snapshot itself is a small
+    manifest in manifests/ listing the chunks that make up each resolution.
+
+    Manifests are written after all of their chunks, so an interrupted snapshot only ever leaves behind unreferenced
+    chunks, which are cleaned up the next time snapshots are pruned.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.objects_path = f"{path}/objects"
+        self.manifests_path = f"{path}/manifests"
+
+    def take(self, all_res_dict, label=None, prune=True):
+        """
+        Snapshots all_res_dict, then (if prune) prunes old snapshots with the default retention policy.
+        Returns the id of the snapshot, which is the id of the latest snapshot if it holds the same resolutions.
+        """
+        resolutions = {}
+        num_entries = 0
+        for res_id, res in all_res_dict.items():
+            settings = {key: value for key, value in res.items() if key != "data"}
+            years = {}
+            for date_str, value in res["data"].items():
+                years.setdefault(date_str[date_str.rfind("/") + 1:], {})[date_str] = value
+            resolutions[res_id] = {
+                "settings": self._write_object(settings),
+                "years": [[year, self._write_object(data)] for year, data in years.items()],
+            }
+            num_entries += len(res["data"])
+
+        latest_id = self.latest()
+        if latest_id is not None and self.read_manifest(latest_id)["resolutions"] == resolutions:
+            return latest_id
+
+        now = datetime.now()
+        snapshot_id = now.strftime(SNAPSHOT_ID_FORMAT)
+        manifest = {
+            "id": snapshot_id,
+            "created": now.isoformat(timespec="seconds"),
+            "label": label,
+            "num_resolutions": len(resolutions),
+            "num_entries": num_entries,
+            "resolutions": resolutions,
+        }
+        if not os.path.exists(self.manifests_path):
+            os.makedirs(self.manifests_path)
+        write_file(f"{self.manifests_path}/{snapshot_id}.json", json.dumps(manifest).encode())
+        if prune:
+            self.prune()
+        return snapshot_id
+
+    def load(self, snapshot_id):
+        """
+        Returns the dict of all resolutions held by the snapshot with snapshot_id, with a date index attached to each
+        resolution's data.
+        """
+        all_res_dict = {}
+        for res_id, chunks in self.read_manifest(snapshot_id)["resolutions"].items():
+            res = self._read_object(chunks["settings"])
+            res["data"] = {}
+            for _, digest in chunks["years"]:
+                res["data"].update(self._read_object(digest))
+            all_res_dict[res_id] = res
+        return index_resolutions(all_res_dict)
+
+    def snapshot_ids(self):
+        """
+        Returns the ids of all snapshots, oldest first.
+        """
+        if not os.path.exists(self.manifests_path):
+            return []
+        return sorted(filename[:-len(".json")] for filename in os.listdir(self.manifests_path)
+                      if filename.endswith(".json"))
+
+    def latest(self):
+        """
+        Returns the id of the most recent snapshot, or None if there are none.
+        """
+        snapshot_ids = self.snapshot_ids()
+        return snapshot_ids[-1] if snapshot_ids else None
+
+    def is_due(self, interval=SNAPSHOT_INTERVAL):
+        """
+        Returns whether the most recent snapshot is more than interval seconds old (or there are none).
+        """
+        latest_id = self.latest()
+        if latest_id is None:
+            return True
+        return (datetime.now() - datetime.strptime(latest_id, SNAPSHOT_ID_FORMAT)).total_seconds() > interval
+
+    def read_manifest(self, snapshot_id):
+        manifest_path = f"{self.manifests_path}/{snapshot_id}.json"
+        if not os.path.exists(manifest_path):
+            raise ValueError(f"No snapshot with id={snapshot_id}")
+        with open(manifest_path, "r") as f:
+            return json.load(f)
+
+    def list_snapshots(self):
+        """
+        Returns a summary (id, created, label, num_resolutions, num_entries) of each snapshot, oldest first.
+        """
+        summaries = []
+        for snapshot_id in self.snapshot_ids():
+            manifest = self.read_manifest(snapshot_id)
+            summaries.append({key: manifest[key] for key in ("id", "created", "label", "num_resolutions",
+                                                             "num_entries")})
+        return summaries
+
+    def prune(self, keep_last=KEEP_LAST, keep_daily=KEEP_DAILY, keep_monthly=KEEP_MONTHLY):
+        """
+        Deletes the snapshots that fall outside of the retention policy, along with the chunks that no remaining
+        snapshot refers to.
+        Returns the ids of the deleted snapshots.
+        """
+        snapshot_ids = self.snapshot_ids()
+        keep = select_snapshots_to_keep(snapshot_ids, keep_last, keep_daily, keep_monthly)
+        pruned = [snapshot_id for snapshot_id in snapshot_ids if snapshot_id not in keep]
+        for snapshot_id in pruned:
+            os.remove(f"{self.manifests_path}/{snapshot_id}.json")
+        if pruned:
+            self.collect_garbage()
+        return pruned
+
+    def collect_garbage(self):
+        """
+        Deletes the chunks (and leftovers of interrupted writes) that no snapshot refers to.
+        Returns the number of files deleted.
+        """
+        referenced = set()
+        for snapshot_id in self.snapshot_ids():
+            for chunks in self.read_manifest(snapshot_id)["resolutions"].values():
+                referenced.add(chunks["settings"])
+                referenced.update(digest for _, digest in chunks["years"])
+
+        num_deleted = 0
+        if not os.path.exists(self.objects_path):
+            return num_deleted
+        for prefix in os.listdir(self.objects_path):
+            prefix_path = f"{self.objects_path}/{prefix}"
+            filenames = os.listdir(prefix_path)
+            for filename in filenames:
+                if prefix + filename not in referenced:
+                    os.remove(f"{prefix_path}/{filename}")
+                    num_deleted += 1
+            if not os.listdir(prefix_path):
+                os.rmdir(prefix_path)
+        return num_deleted
+
+    def disk_usage(self):
+        """
+        Returns the number of bytes taken up by all snapshots.
+        """
+        total = 0
+        for root, _, filenames in os.walk(self.path):
+            total += sum(os.path.getsize(os.path.join(root, filename)) for filename in filenames)
+        return total
+
+    def _write_object(self, obj):
+        """
+        Stores obj as a compressed JSON chunk (unless an identical chunk is already stored) and returns its digest.
+        """
+        content = json.dumps(obj, separators=(",", ":")).encode()
+        digest = hashlib.sha256(content).hexdigest()
+        object_dir = f"{self.objects_path}/{digest[:2]}"
+        object_path = f"{object_dir}/{digest[2:]}"
+        if not os.path.exists(object_path):
+            if not os.path.exists(object_dir):
+                os.makedirs(object_dir)
+            write_file(object_path, zlib.compress(content))
+        return digest
+
+    def _read_object(self, digest):
+        with open(f"{self.objects_path}/{digest[:2]}/{digest[2:]}", "rb") as f:
+            content = zlib.decompress(f.read())
+        if hashlib.sha256(content).hexdigest() != digest:
+            raise ValueError(f"Snapshot chunk={digest} is corrupted")
+        return json.loads(content)
+
+
+def write_file(path, content):
+    """
+    Writes content (bytes) to path through a temporary file, so that a crash mid-write never leaves a truncated file.
+    """
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(content)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def select_snapshots_to_keep(snapshot_ids, keep_last=KEEP_LAST, keep_daily=KEEP_DAILY, keep_monthly=KEEP_MONTHLY):
+    """
+    Returns the set of snapshot_ids (oldest first) kept by the retention policy: the keep_last most recent ones, plus
+    the newest one of each of the keep_daily most recent days and the keep_monthly most recent months with snapshots.
+    """
+    keep = set(snapshot_ids[-keep_last:]) if keep_last > 0 else set()
+    days = set()
+    months = set()
+    for snapshot_id in reversed(snapshot_ids):
+        # Ids start with YYYYMMDD
+        day = snapshot_id[:8]
+        month = snapshot_id[:6]
+        if day not in days and len(days) < keep_daily:
+            days.add(day)
+            keep.add(snapshot_id)
+        if month not in months and len(months) < keep_monthly:
+            months.add(month)
+            keep.add(snapshot_id)
+    return keep
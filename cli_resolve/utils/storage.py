@@ -0,0 +1,425 @@
+import json
+import os
+import sqlite3
+
+from .date_index import ResolutionData, index_resolutions
+from .date_utils import date_string_to_ordinal
+from .snapshots import SNAPSHOTS_DIRNAME, SnapshotStore
+
+# Environment variable used to pick a storage backend explicitly ('json', 'journal' or 'sqlite')
+STORAGE_ENV_VAR = "RESOLVE_STORAGE"
+JSON_FILENAME = "resolutions.json"
+JOURNAL_FILENAME = "resolutions.journal.jsonl"
+SQLITE_FILENAME = "resolutions.db"
+
+# Size (in bytes) past which the journal is folded into resolutions.json
+JOURNAL_COMPACTION_THRESHOLD = 256 * 1024
+
+# Keys of a resolution dict other than its logged data
+SETTINGS_KEYS = [
+    "res_descript",
+    "res_creation_date",
+    "is_active",
+    "res_expiration_date",
+    "is_binary",
+    "res_detail_codes",
+]
+
+
+class ResolutionStore:
+    """
+    Base class for the places that resolutions can be persisted to.
+
+    Resolutions are loaded and saved as the same dict that has always lived in data/resolutions.json:
+    e.g. { "res_id": { "res_descript": ..., "is_active": ..., ..., "data": { "M/D/YYYY": value } } }
+
+    When the store has a SnapshotStore, what's saved is snapshotted before every full save, and before logging once
+    the latest snapshot is more than a day old.
+    """
+    path = None
+    snapshots = None
+
+    def load(self):
+        """
+        Returns dict of all resolutions, with a date index attached to each resolution's data.
+        """
+        raise NotImplementedError
+
+    def save(self, all_res_dict, label="save"):
+        """
+        Replaces everything in the store with all_res_dict, after snapshotting what was there (labelled with label).
+        """
+        self.take_snapshot(label)
+        self._write(all_res_dict)
+
+    def update(self, resolutions=None, entries=None):
+        """
+        Persists the settings (everything but the data) of each resolution in the resolutions dict, along with a list
+        of log entries in the form of (res_id, date_str, value) tuples. Resolutions that are not stored yet are added
+        with no data.
+        """
+        raise NotImplementedError
+
+    def restore(self, snapshot_id):
+        """
+        Replaces everything in the store with the resolutions held by the snapshot with snapshot_id. What was there
+        is snapshotted first, so a restore can itself be undone.
+        """
+        self.save(self.snapshots.load(snapshot_id), label=f"before restoring {snapshot_id}")
+
+    def take_snapshot(self, label=None):
+        """
+        Snapshots what is currently saved, if the store has snapshots and anything has been saved.
+        Returns the id of the snapshot, or None if none was taken.
+        """
+        if self.snapshots is None:
+            return None
+        saved = self._read_saved()
+        if not saved:
+            return None
+        return self.snapshots.take(saved, label=label)
+
+    def _take_periodic_snapshot(self):
+        if self.snapshots is not None and self.snapshots.is_due():
+            self.take_snapshot("periodic")
+
+    def _read_saved(self):
+        """
+        Returns the dict of all resolutions as currently saved (without touching anything cached), or None if nothing
+        has been saved yet.
+        """
+        raise NotImplementedError
+
+    def _write(self, all_res_dict):
+        """
+        Replaces everything in the store with all_res_dict.
+        """
+        raise NotImplementedError
+
+
+class JSONStore(ResolutionStore):
+    """
+    Stores all resolutions in a single JSON file, which is read and rewritten in full.
+    """
+
+    def __init__(self, path, snapshots=None):
+        self.path = path
+        self.snapshots = snapshots
+        self._cache = None
+
+    def load(self):
+        with open(self.path, "r") as f:
+            self._cache = index_resolutions(json.load(f))
+        return self._cache
+
+    def _read_saved(self):
+        if not os.path.exists(self.path):
+            return None
+        with open(self.path, "r") as f:
+            return json.load(f)
+
+    def _write(self, all_res_dict):
+        # Write to a temporary file first so that a crash mid-write never leaves a truncated resolutions.json
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(all_res_dict, f, indent=4)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        self._cache = all_res_dict
+
+    def update(self, resolutions=None, entries=None):
+        # Apply changes on top of the most recently loaded copy so that a session only reads the file once
+        all_res_dict = self._cache if self._cache is not None else self.load()
+        self._take_periodic_snapshot()
+        apply_update(all_res_dict, resolutions, entries)
+        self._write(all_res_dict)
+
+
+class JournalStore(JSONStore):
+    """
+    Stores resolutions as a base file (resolutions.json) plus an append-only journal of the changes made since.
+
+    Each log entry (and each change to a resolution's settings) is appended to the journal as a single JSON line and
+    fsynced, so saving a day's log costs the same no matter how much history there is. Loading replays the journal
+    over the base file. Once the journal grows past JOURNAL_COMPACTION_THRESHOLD bytes, it is folded into a new base
+    file.
+
+    A record torn by a crash mid-append can only be the last line of the journal; it is skipped on replay and cut off
+    before the next append.
+    """
+
+    def __init__(self, path, journal_path, compaction_threshold=JOURNAL_COMPACTION_THRESHOLD, snapshots=None):
+        super().__init__(path, snapshots=snapshots)
+        self.journal_path = journal_path
+        self.compaction_threshold = compaction_threshold
+
+    def load(self):
+        return self._replay_journal(super().load())
+
+    def _read_saved(self):
+        all_res_dict = super()._read_saved()
+        if all_res_dict is None:
+            return None
+        return self._replay_journal(all_res_dict)
+
+    def _write(self, all_res_dict):
+        # The base file is replaced before the journal is emptied; replaying a journal over a base file that already
+        # contains its records is harmless
+        super()._write(all_res_dict)
+        with open(self.journal_path, "w"):
+            pass
+
+    def update(self, resolutions=None, entries=None):
+        records = []
+        for res_id, res in (resolutions or {}).items():
+            records.append({"res_id": res_id, "settings": {key: res[key] for key in SETTINGS_KEYS}})
+        for res_id, date_str, value in entries or []:
+            records.append({"date": date_str, "res_id": res_id, "value": value})
+
+        self._take_periodic_snapshot()
+        with open(self.journal_path, "a+b") as f:
+            self._truncate_torn_record(f)
+            f.write("".join(json.dumps(record) + "\n" for record in records).encode())
+            f.flush()
+            os.fsync(f.fileno())
+            journal_size = f.tell()
+
+        if self._cache is not None:
+            apply_update(self._cache, resolutions, entries)
+        if journal_size > self.compaction_threshold:
+            self.compact()
+
+    def compact(self):
+        """
+        Folds the journal into a new base file (resolutions.json).
+        """
+        print("*** Compacting resolutions journal")
+        # Compaction doesn't change what's saved, so it doesn't take a snapshot
+        self._write(self.load())
+
+    def _replay_journal(self, all_res_dict):
+        """
+        Applies the records of the journal to all_res_dict (in place) and returns all_res_dict.
+        """
+        for record in self._read_journal():
+            if "settings" in record:
+                apply_update(all_res_dict, resolutions={record["res_id"]: record["settings"]})
+            else:
+                apply_update(all_res_dict, entries=[(record["res_id"], record["date"], record["value"])])
+        return all_res_dict
+
+    def _read_journal(self):
+        if not os.path.exists(self.journal_path):
+            return []
+        records = []
+        with open(self.journal_path, "r") as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    print(f"Skipping incomplete journal record: {line.strip()}")
+        return records
+
+    @staticmethod
+    def _truncate_torn_record(f):
+        """
+        Cuts the journal file f (opened in binary append+read mode) back to the end of its last complete line.
+        """
+        size = f.seek(0, os.SEEK_END)
+        pos = size
+        while pos > 0:
+            step = min(4096, pos)
+            pos -= step
+            f.seek(pos)
+            newline_idx = f.read(step).rfind(b"\n")
+            if newline_idx != -1:
+                pos += newline_idx + 1
+                break
+        if pos < size:
+            f.truncate(pos)
+        f.seek(pos)
+
+
+class SQLiteStore(ResolutionStore):
+    """
+    Stores resolutions in an embedded SQLite database, with one indexed row per (res_id, date) log entry.
+    Logging a day's entries only touches the rows being written.
+    """
+
+    def __init__(self, path, snapshots=None):
+        self.path = path
+        self.snapshots = snapshots
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS resolutions (
+                res_id TEXT PRIMARY KEY,
+                res_descript TEXT,
+                res_creation_date TEXT,
+                is_active INTEGER NOT NULL,
+                res_expiration_date TEXT,
+                is_binary INTEGER NOT NULL,
+                res_detail_codes TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS entries (
+                res_id TEXT NOT NULL,
+                day INTEGER NOT NULL,
+                date TEXT NOT NULL,
+                value TEXT NOT NULL,
+                PRIMARY KEY (res_id, day)
+            ) WITHOUT ROWID;
+            """
+        )
+
+    def load(self):
+        all_res_dict = {}
+        rows = self.conn.execute(
+            "SELECT res_id, res_descript, res_creation_date, is_active, res_expiration_date, is_binary, "
+            "res_detail_codes FROM resolutions ORDER BY rowid"
+        )
+        for res_id, descript, creation, is_active, expiration, is_binary, codes in rows:
+            all_res_dict[res_id] = {
+                "res_descript": descript,
+                "res_creation_date": creation,
+                "is_active": bool(is_active),
+                "res_expiration_date": expiration,
+                "is_binary": bool(is_binary),
+                "res_detail_codes": json.loads(codes),
+                "data": {},
+            }
+        for res_id, date_str, value in self.conn.execute("SELECT res_id, date, value FROM entries ORDER BY res_id, day"):
+            all_res_dict[res_id]["data"][date_str] = json.loads(value)
+        for res in all_res_dict.values():
+            res["data"] = ResolutionData(res["data"])
+        return all_res_dict
+
+    def _read_saved(self):
+        return self.load()
+
+    def _write(self, all_res_dict):
+        with self.conn:
+            self.conn.execute("DELETE FROM entries")
+            self.conn.execute("DELETE FROM resolutions")
+            self._upsert_settings(all_res_dict)
+            self._upsert_entries(
+                (res_id, date_str, value)
+                for res_id, res in all_res_dict.items()
+                for date_str, value in res["data"].items()
+            )
+
+    def update(self, resolutions=None, entries=None):
+        self._take_periodic_snapshot()
+        with self.conn:
+            if resolutions:
+                self._upsert_settings(resolutions)
+            if entries:
+                self._upsert_entries(entries)
+
+    def close(self):
+        self.conn.close()
+
+    def _upsert_settings(self, resolutions):
+        self.conn.executemany(
+            "INSERT INTO resolutions (res_id, res_descript, res_creation_date, is_active, res_expiration_date, "
+            "is_binary, res_detail_codes) VALUES (?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT (res_id) DO UPDATE SET res_descript=excluded.res_descript, "
+            "res_creation_date=excluded.res_creation_date, is_active=excluded.is_active, "
+            "res_expiration_date=excluded.res_expiration_date, is_binary=excluded.is_binary, "
+            "res_detail_codes=excluded.res_detail_codes",
+            [
+                (
+                    res_id,
+                    res["res_descript"],
+                    res["res_creation_date"],
+                    bool(res["is_active"]),
+                    res["res_expiration_date"],
+                    bool(res["is_binary"]),
+                    json.dumps(res["res_detail_codes"]),
+                )
+                for res_id, res in resolutions.items()
+            ]
+        )
+
+    def _upsert_entries(self, entries):
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO entries (res_id, day, date, value) VALUES (?, ?, ?, ?)",
+            (
+                (res_id, date_string_to_ordinal(date_str), date_str, json.dumps(value))
+                for res_id, date_str, value in entries
+            )
+        )
+
+
+def apply_update(all_res_dict, resolutions=None, entries=None):
+    """
+    Applies the same changes as ResolutionStore.update() to an in-memory dict of all resolutions.
+    """
+    for res_id, res in (resolutions or {}).items():
+        settings = {key: res[key] for key in SETTINGS_KEYS}
+        if res_id in all_res_dict:
+            all_res_dict[res_id].update(settings)
+        else:
+            all_res_dict[res_id] = {**settings, "data": ResolutionData()}
+    for res_id, date_str, value in entries or []:
+        all_res_dict[res_id]["data"][date_str] = value
+    return all_res_dict
+
+
+_stores = {}
+
+
+def get_store(data_dir="data", backend=None):
+    """
+    Returns the store holding the app data in data_dir.
+
+    The backend can be chosen with the RESOLVE_STORAGE environment variable ('json', 'journal' or 'sqlite').
+    Otherwise the SQLite database is used if one has been created (see scripts/migrate_to_sqlite.py), then the journal
+    if one has been started, falling back to the plain JSON file. Stores are shared for the lifetime of the process, and
+    snapshot into data_dir/snapshots whichever backend they use.
+    """
+    if not backend:
+        backend = os.environ.get(STORAGE_ENV_VAR)
+    if not backend:
+        if os.path.exists(f"{data_dir}/{SQLITE_FILENAME}"):
+            backend = "sqlite"
+        elif os.path.exists(f"{data_dir}/{JOURNAL_FILENAME}"):
+            backend = "journal"
+        else:
+            backend = "json"
+
+    key = (backend, data_dir)
+    if key not in _stores:
+        snapshots = SnapshotStore(f"{data_dir}/{SNAPSHOTS_DIRNAME}")
+        if backend == "json":
+            _stores[key] = JSONStore(f"{data_dir}/{JSON_FILENAME}", snapshots=snapshots)
+        elif backend == "journal":
+            _stores[key] = JournalStore(f"{data_dir}/{JSON_FILENAME}", f"{data_dir}/{JOURNAL_FILENAME}",
+                                        snapshots=snapshots)
+        elif backend == "sqlite":
+            _stores[key] = SQLiteStore(f"{data_dir}/{SQLITE_FILENAME}", snapshots=snapshots)
+        else:
+            raise ValueError(f"Unknown storage backend={backend}; expected 'json', 'journal' or 'sqlite'")
+    return _stores[key]
+
+
+def migrate_json_to_sqlite(data_dir="data"):
+    """
+    One-shot migration of data_dir/resolutions.json (along with any journal) into a new data_dir/resolutions.db SQLite
+    database.
+    Returns the number of resolutions migrated.
+    """
+    db_path = f"{data_dir}/{SQLITE_FILENAME}"
+    if os.path.exists(db_path):
+        raise FileExistsError(f"{db_path} already exists")
+    all_res_dict = JournalStore(f"{data_dir}/{JSON_FILENAME}", f"{data_dir}/{JOURNAL_FILENAME}").load()
+    SnapshotStore(f"{data_dir}/{SNAPSHOTS_DIRNAME}").take(all_res_dict, label="before migrating to sqlite")
+    # Build the database under a temporary name so a failed migration never leaves a half-filled database behind
+    tmp_db_path = f"{db_path}.tmp"
+    if os.path.exists(tmp_db_path):
+        os.remove(tmp_db_path)
+    store = SQLiteStore(tmp_db_path)
+    store.save(all_res_dict)
+    store.close()
+    os.replace(tmp_db_path, db_path)
+    return len(all_res_dict)
@@ -1,16 +1,28 @@
+import argparse
+import json
 import pandas as pd
 import os
 import sys
-import json
-from datetime import datetime
-import shutil
 
 # Set parent directory
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from cli_resolve.utils.date_utils import date_string_to_ordinal, ordinal_to_date_string
+from cli_resolve.utils.export_utils import FALSY_VALUES
 from cli_resolve.utils.input_utils import *
+from cli_resolve.utils.storage import get_store
+
+# Values that mark a day as met in binary legacy columns (anything else that isn't falsy makes a column non-binary)
+BINARY_TRUTHY_VALUES = [1, "1", "1.0", True, "True"]
 
-# INPUTS
-filename = sys.argv[1]
+
+def read_dataset(filepath):
+    """
+    Reads a cleaned CSV, keeping every value as text (so that codes like 1 and 2 aren't read as 1.0 and 2.0) and
+    storing dates the way the app does ('M/D/YYYY', not zero-padded).
+    """
+    df = pd.read_csv(filepath, dtype=str)
+    df["date"] = [ordinal_to_date_string(date_string_to_ordinal(date_str)) for date_str in df["date"]]
+    return df
 
 
 def get_resolution_choice_set(df):
@@ -47,162 +59,318 @@ def get_columns(prompt, df):
     return validated_list
 
 
-# Read the CSV
-filepath = f"../data/cleaned/{filename}"
-if not os.path.exists(filepath):
-    sys.exit(f"filepath={filepath} does not exist")
+def merge_resolution_dates(res, first_date, last_date):
+    """
+    Widens the creation and expiration dates of an existing resolution to cover data from first_date to last_date.
+    """
+    # Calculate res_creation_date (first date entry from current data OR res_creation_date of existing resolution,
+    # whichever is earlier)
+    exist_creation_date = res["res_creation_date"]
+    if date_string_to_ordinal(first_date) < date_string_to_ordinal(exist_creation_date):
+        res_creation_date = first_date
+    else:
+        res_creation_date = exist_creation_date
 
-df = pd.read_csv(filepath)
-options = get_resolution_columns_and_values(df)
-print(f"Preview of data from uploaded dataset:\n{options}\n")
+    # Expiration is last date entry from current data OR res_expiration_date of existing resolution, whichever is later
+    exist_expiration_date = res["res_expiration_date"]
+    if exist_expiration_date is not None:
+        if date_string_to_ordinal(last_date) > date_string_to_ordinal(exist_expiration_date):
+            res_expiration_date = last_date
+        else:
+            res_expiration_date = exist_expiration_date
+    else:
+        res_expiration_date = exist_expiration_date
 
-instructions = "Enter a comma-separated list of columns containing resolution data (e.g. exercise,skincare).\n" \
-               "Enter 'all' to use all columns.\n"
-print(f"INSTRUCTIONS: {instructions}")
-col_list = []
-while len(col_list) == 0:
-    col_list = get_columns(
-        "Which resolutions do you want to backpopulate?: ",
-        df
+    res.update(
+        {
+            "res_creation_date": res_creation_date,
+            "res_expiration_date": res_expiration_date,
+        }
     )
 
-# Load app data
-with open("../data/resolutions.json", "r") as f:
-    app_data = json.load(f)
 
-# Loop through each resolution column
-days = len(df)
-curr_day = 0
-curr_col = 0
-data_end = len(col_list) - 1
+def backpopulate_interactively(df, app_data):
+    """
+    Asks which columns to import and how, then backpopulates app_data with them one day at a time.
+    """
+    options = get_resolution_columns_and_values(df)
+    print(f"Preview of data from uploaded dataset:\n{options}\n")
 
-while curr_col <= data_end:
-    col_name = col_list[curr_col]
-    print(f"*** Adding data from resolution={col_name}")
+    instructions = "Enter a comma-separated list of columns containing resolution data (e.g. exercise,skincare).\n" \
+                   "Enter 'all' to use all columns.\n"
+    print(f"INSTRUCTIONS: {instructions}")
+    col_list = []
+    while len(col_list) == 0:
+        col_list = get_columns(
+            "Which resolutions do you want to backpopulate?: ",
+            df
+        )
 
-    # Check whether this resolution already exists in app data
-    exists = col_name.lower() in app_data
+    # Loop through each resolution column
+    days = len(df)
     first_date = df["date"][0]
     last_date = df["date"][days - 1]
 
-    if exists:
-        merge_data = handle_input(prompt=f"res={col_name} already exists. Merge with existing data? (Y/N): ",
-                                  response_type="boolean")
-        if merge_data:
-            print(f"*** Merging res={col_name}")
-            res_id = col_name.lower()
-            is_binary = app_data[res_id]["is_binary"]
-
-            # Calculate res_creation_date (first date entry from current data OR res_creation_date of existing
-            # resolution, whichever is earlier)
-            first_date_dt = datetime.strptime(first_date, "%m/%d/%Y")
-            exist_creation_date = app_data[res_id]["res_creation_date"]
-            exist_creation_date_dt = datetime.strptime(exist_creation_date, "%m/%d/%Y")
-            res_creation_date = first_date if first_date_dt < exist_creation_date_dt else exist_creation_date
-
-            # Expiration is last date entry from current data OR res_expiration_date of existing resolution,
-            # whichever is later
-            last_date_dt = datetime.strptime(last_date, "%m/%d/%Y")
-            exist_expiration_date = app_data[res_id]["res_expiration_date"]
-            if exist_expiration_date is not None:
-                exist_expiration_date_dt = datetime.strptime(exist_expiration_date, "%m/%d/%Y")
-                res_expiration_date = last_date if last_date_dt > exist_expiration_date_dt else exist_expiration_date
-            else:
-                res_expiration_date = exist_expiration_date
+    for col_name in col_list:
+        print(f"*** Adding data from resolution={col_name}")
 
-            app_data[res_id].update(
-                {
-                    "res_creation_date": res_creation_date,
-                    "res_expiration_date": res_expiration_date,
-                }
-            )
+        # Check whether this resolution already exists in app data
+        exists = col_name.lower() in app_data
 
-    # New resolution without precedent
-    if (not exists) or (not merge_data):
         if exists:
-            res_id = handle_input(f"Let's give this resolution a new res_id to differentiate it from {col_name}: ")
-        else:
-            keep_name = handle_input(prompt=f"Want to keep the res_id `{col_name}`? (Y/N): ", response_type="boolean")
-            if keep_name:
-                res_id = col_name
+            merge_data = handle_input(prompt=f"res={col_name} already exists. Merge with existing data? (Y/N): ",
+                                      response_type="boolean")
+            if merge_data:
+                print(f"*** Merging res={col_name}")
+                res_id = col_name.lower()
+                is_binary = app_data[res_id]["is_binary"]
+                merge_resolution_dates(app_data[res_id], first_date, last_date)
+
+        # New resolution without precedent
+        if (not exists) or (not merge_data):
+            if exists:
+                res_id = handle_input(f"Let's give this resolution a new res_id to differentiate it from {col_name}: ")
             else:
-                res_id = handle_input("Let's give this resolution a new res_id: ")
-        print(f"*** Creating a new resolution res={res_id}")
-        res_descript = handle_input("Provide a short description for this resolution: ")
-        res_creation_date = df.loc[[0], "date"].values[0]  # first date entry from current data
-        is_active = handle_input(prompt="Is this an active resolution? (Y/N): ", response_type="boolean")
-        is_expired = handle_input(prompt=f"Did this resolution expire on {last_date}? (Y/N): ", response_type="boolean")
-        if is_expired:
-            res_expiration_date = last_date
-        else:
-            res_expiration_date = handle_input(
-                prompt="When does this resolution expire? ('MM/DD/YYYY' or 'never' for no expiration): ",
-                response_type="datestring"
+                keep_name = handle_input(prompt=f"Want to keep the res_id `{col_name}`? (Y/N): ",
+                                         response_type="boolean")
+                if keep_name:
+                    res_id = col_name
+                else:
+                    res_id = handle_input("Let's give this resolution a new res_id: ")
+            print(f"*** Creating a new resolution res={res_id}")
+            res_descript = handle_input("Provide a short description for this resolution: ")
+            res_creation_date = first_date  # first date entry from current data
+            is_active = handle_input(prompt="Is this an active resolution? (Y/N): ", response_type="boolean")
+            is_expired = handle_input(prompt=f"Did this resolution expire on {last_date}? (Y/N): ",
+                                      response_type="boolean")
+            if is_expired:
+                res_expiration_date = last_date
+            else:
+                res_expiration_date = handle_input(
+                    prompt="When does this resolution expire? ('MM/DD/YYYY' or 'never' for no expiration): ",
+                    response_type="datestring"
+                )
+            is_binary = handle_input(
+                prompt="Is this resolution's outcome binary? (Y/N): ",
+                response_type="boolean",
+                instructions="Binary outcomes tell us whether or not you did something, while categorical outcomes "
+                             "tell us about the kind of thing you did.\n"
+                             "For example, for the resolution to exercise, "
+                             "a binary outcome is exercising, or not exercising. "
+                             "In contrast, a categorical outcome names the kind of exercise you did (e.g. "
+                             "run/bike/swim). "
             )
-        is_binary = handle_input(
-            prompt="Is this resolution's outcome binary? (Y/N): ",
-            response_type="boolean",
-            instructions="Binary outcomes tell us whether or not you did something, while categorical outcomes "
-                         "tell us about the kind of thing you did.\n"
-                         "For example, for the resolution to exercise, "
-                         "a binary outcome is exercising, or not exercising. "
-                         "In contrast, a categorical outcome names the kind of exercise you did (e.g. "
-                         "run/bike/swim). "
-        )
 
-        res = {
-            "res_descript": res_descript,
-            "res_creation_date": res_creation_date,
-            "is_active": is_active,
-            "res_expiration_date": res_expiration_date,
+            res = {
+                "res_descript": res_descript,
+                "res_creation_date": res_creation_date,
+                "is_active": is_active,
+                "res_expiration_date": res_expiration_date,
+                "is_binary": is_binary,
+                "res_detail_codes": {},
+                "data": {},
+            }
+            app_data[res_id] = res
+
+        # Populate the data dict for both merged and new resolutions
+        print("*** Backpopulating resolutions data")
+        detail_codes = app_data[res_id]["res_detail_codes"]
+        code_translator = {}  # keep track of recoded datapoints
+
+        for date, datapoint in zip(df["date"], df[col_name]):
+            # Binary and non-binary falsy value (values are read as text, and empty cells as NaN)
+            if pd.isna(datapoint) or not datapoint or datapoint == "0" or datapoint == "0.0":
+                datapoint = False
+            if is_binary:
+                if datapoint:  # binary truthy value
+                    datapoint = True
+            else:
+                if datapoint:  # non-binary truthy value
+                    # Check the translator first to see if previously encountered
+                    datapoint = code_translator.get(datapoint, datapoint)
+                    # Add to detail codes if seeing for first time
+                    if datapoint not in detail_codes:
+                        keep_code = handle_input(prompt=f"Keep the code `{datapoint}`? (Y/N): ",
+                                                 response_type="boolean")
+                        if keep_code:  # add new code to res_detail_codes without changing datapoint
+                            descript = handle_input(f"What activity does `{datapoint}` stand for?: ")
+                            detail_codes[datapoint] = descript
+                        else:  # add new code to res_detail_codes and change datapoint
+                            code = handle_input(f"Enter a 1-char code to replace `{datapoint}`: ").upper()
+                            if code not in detail_codes:
+                                descript = handle_input(f"What activity does `{code}` stand for?: ")
+                                detail_codes[code] = descript
+                            code_translator[datapoint] = code
+                            datapoint = code
+            app_data[res_id]["data"][date] = datapoint
+
+
+def load_mapping(path):
+    """
+    Reads a mapping file (JSON, or YAML if its name ends in .yaml/.yml) describing how to import each column, and
+    returns its dict of resolutions keyed by column. e.g.
+
+    resolutions:
+      exercise:
+        res_id: exercise        # defaults to the column name
+        merge: true             # merge into an existing resolution with the same res_id (default true)
+        description: daily exercise
+        is_active: false        # default false
+        expiration: last        # 'last' (last date in the file, the default), 'never', or 'MM/DD/YYYY'
+        is_binary: false        # defaults to whether the column only holds 0's and 1's
+        codes:                  # detail codes and what they stand for
+          R: run
+          B: bike
+        recode:                 # legacy values to replace with codes
+          running: R
+    """
+    if not os.path.exists(path):
+        sys.exit(f"mapping={path} does not exist")
+    with open(path, "r") as f:
+        if path.endswith((".yaml", ".yml")):
+            try:
+                import yaml
+            except ImportError:
+                sys.exit("Reading YAML mapping files requires PyYAML (`pip install pyyaml`); use a JSON mapping file "
+                         "instead")
+            mapping = yaml.safe_load(f)
+        else:
+            mapping = json.load(f)
+    if not isinstance(mapping, dict) or not isinstance(mapping.get("resolutions"), dict):
+        sys.exit(f"mapping={path} must hold a `resolutions` dict keyed by column")
+    return {col: spec or {} for col, spec in mapping["resolutions"].items()}
+
+
+def translate_code(value, recode):
+    """
+    Returns the detail codes recorded in a non-binary legacy value, with legacy values replaced through recode (e.g.
+    "running" -> "R", "r, b" -> "R,B").
+    """
+    value = str(value).strip()
+    if value in recode:
+        return recode[value]
+    codes = [code.strip() for code in value.split(",") if code.strip()]
+    return ",".join(recode.get(code, code).upper() for code in codes)
+
+
+def backpopulate_column(values, dates, res, recode):
+    """
+    Converts a whole legacy column at once and adds it to res (a resolution in app data): falsy values are recorded as
+    False, and the rest as True for binary resolutions or as detail codes translated through recode otherwise.
+    Returns the codes that weren't in res_detail_codes yet (they're added with themselves as their description).
+    """
+    falsy = values.isna() | values.isin(FALSY_VALUES)
+    if res["is_binary"]:
+        data = ~falsy
+    else:
+        # Each distinct legacy value is only translated once, then mapped onto the whole column
+        translations = {value: translate_code(value, recode) for value in values[~falsy].unique()}
+        data = values.map(translations).where(~falsy, False)
+    res["data"].update(zip(dates, data.tolist()))
+
+    new_codes = []
+    if not res["is_binary"]:
+        for value in translations.values():
+            for code in value.split(","):
+                if code not in res["res_detail_codes"]:
+                    res["res_detail_codes"][code] = code
+                    new_codes.append(code)
+    return new_codes
+
+
+def backpopulate_from_mapping(df, app_data, mapping, strict=False):
+    """
+    Backpopulates app_data with the columns of df described by mapping (see load_mapping()), without asking anything.
+    In strict mode, codes that the mapping doesn't describe are an error (see backpopulate_mapped_column()).
+    """
+    missing = [col for col in mapping if col not in df.columns]
+    if missing:
+        sys.exit(f"Columns={missing} from the mapping file are not in the dataset")
+
+    dates = df["date"].tolist()
+    for col_name, spec in mapping.items():
+        backpopulate_mapped_column(app_data, col_name, spec, df[col_name], dates, dates[0], dates[-1], strict=strict)
+
+
+def backpopulate_mapped_column(app_data, col_name, spec, values, dates, first_date, last_date, strict=False):
+    """
+    Adds a column's values (recorded on dates, which run from first_date to last_date) to app_data as described by its
+    spec from a mapping file: merged into an existing resolution, or as a new one.
+    Values recorded later in dates win over earlier ones on the same day.
+    Codes found in the column without a description (in the spec or the resolution) are described as themselves, or in
+    strict mode, exit the script with the list of them before anything is saved.
+    """
+    res_id = spec.get("res_id", col_name.lower())
+    if res_id in app_data and spec.get("merge", True):
+        print(f"*** Merging res={res_id} from column={col_name}")
+        merge_resolution_dates(app_data[res_id], first_date, last_date)
+    else:
+        if res_id in app_data:
+            sys.exit(f"res={res_id} already exists; set `merge: true` or give column={col_name} a new res_id")
+        print(f"*** Creating a new resolution res={res_id} from column={col_name}")
+        expiration = str(spec.get("expiration", "last"))
+        is_binary = spec.get("is_binary")
+        if is_binary is None:
+            is_binary = bool(values.isna().all() or values.dropna().isin(FALSY_VALUES + BINARY_TRUTHY_VALUES).all())
+        app_data[res_id] = {
+            "res_descript": spec.get("description", col_name),
+            "res_creation_date": first_date,
+            "is_active": spec.get("is_active", False),
+            "res_expiration_date": last_date if expiration == "last" else parse_date_string(expiration),
             "is_binary": is_binary,
             "res_detail_codes": {},
             "data": {},
         }
-        app_data[res_id] = res
-
-    # Populate the data dict for both merged and new resolutions
-    print("*** Backpopulating resolutions data")
-    detail_codes = app_data[res_id]["res_detail_codes"]
-    code_translator = {}  # keep track of recoded datapoints
-
-    while curr_day < days:
-        datapoint = df.loc[[curr_day], col_name].values[0]
-        if not datapoint or datapoint == "0" or datapoint == "0.0":  # binary and non-binary falsy value
-            datapoint = False
-        if is_binary:
-            if datapoint:  # binary truthy value
-                datapoint = True
-        else:
-            if datapoint:  # non-binary truthy value
-                # Check the translator first to see if previously encountered
-                datapoint = code_translator.get(datapoint, datapoint)
-                # Add to detail codes if seeing for first time
-                if datapoint not in detail_codes:
-                    keep_code = handle_input(prompt=f"Keep the code `{datapoint}`? (Y/N): ", response_type="boolean")
-                    if keep_code:  # add new code to res_detail_codes without changing datapoint
-                        descript = handle_input(f"What activity does `{datapoint}` stand for?: ")
-                        detail_codes[datapoint] = descript
-                    else:  # add new code to res_detail_codes and change datapoint
-                        code = handle_input(f"Enter a 1-char code to replace `{datapoint}`: ").upper()
-                        if code not in detail_codes:
-                            descript = handle_input(f"What activity does `{code}` stand for?: ")
-                            detail_codes[code] = descript
-                        code_translator[datapoint] = code
-                        datapoint = code
-        date = df["date"][curr_day]
-        app_data[res_id]["data"][date] = datapoint
-        curr_day += 1
-    curr_day = 0
-    curr_col += 1
-
-print("*** Making backup copy of current resolutions data before save")
-ts = int(datetime.now().timestamp())
-backups_path = "../data/backups"
-if not os.path.exists(backups_path):
-    os.makedirs(backups_path)
-shutil.copy("../data/resolutions.json", f"{backups_path}/resolutions_{ts}.json")
-print("*** Saving backpopulated resolutions data")
-with open("../data/resolutions.json", "w+") as f:
-    json.dump(app_data, f, indent=4)
-print("*** Saved!")
+
+    res = app_data[res_id]
+    if not res["is_binary"]:
+        res["res_detail_codes"].update({str(code).upper(): descript for code, descript in
+                                        spec.get("codes", {}).items()})
+    recode = {str(value): str(code).upper() for value, code in spec.get("recode", {}).items()}
+    new_codes = backpopulate_column(values, dates, res, recode)
+    if new_codes and strict:
+        sys.exit(f"Codes={new_codes} in column={col_name} have no description; describe them in the mapping file's "
+                 f"`codes` (or run without --strict to describe them as themselves)")
+    if new_codes:
+        print(f"*** Added codes={new_codes} to res={res_id}; describe them in the mapping file's `codes` to "
+              f"name them")
+    return res_id
+
+
+def save_app_data(store, app_data, label="before backpopulating"):
+    """
+    Snapshots the current resolutions data (see cli_resolve/utils/snapshots.py), then saves app_data in its place.
+    """
+    print("*** Snapshotting current resolutions data and saving backpopulated resolutions data")
+    store.save(app_data, label=label)
+    print("*** Saved! Run `python cli_resolve snapshots list` from the repo root to see snapshots")
+
+
+if __name__ == "__main__":
+    # INPUTS
+    parser = argparse.ArgumentParser(description="Import a cleaned CSV from data/cleaned into app data.")
+    parser.add_argument("filename", help="name of the cleaned CSV in data/cleaned")
+    parser.add_argument("--mapping", help="JSON/YAML file describing how to import each column, to import them all at "
+                                          "once without being asked")
+    parser.add_argument("--strict", action="store_true",
+                        help="with --mapping, stop without saving if a column holds codes the mapping doesn't "
+                             "describe, instead of describing them as themselves")
+    args = parser.parse_args()
+
+    # Read the CSV
+    filepath = f"../data/cleaned/{args.filename}"
+    if not os.path.exists(filepath):
+        sys.exit(f"filepath={filepath} does not exist")
+
+    df = read_dataset(filepath)
+    mapping = load_mapping(args.mapping) if args.mapping else None
+
+    # Load app data
+    store = get_store(data_dir="../data")
+    app_data = store.load()
+
+    if mapping is not None:
+        backpopulate_from_mapping(df, app_data, mapping, strict=args.strict)
+    else:
+        backpopulate_interactively(df, app_data)
+    save_app_data(store, app_data, label=f"before backpopulating {args.filename}")
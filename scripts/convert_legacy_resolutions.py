@@ -1,9 +1,12 @@
+import argparse
 import os
 import sys
 import pandas as pd
 
-# INPUTS
-filename = sys.argv[1]
+# Rows of the legacy CSV converted at a time, so that memory use stays flat however long the spreadsheet is
+CHUNK_SIZE = 50000
+# Legacy values that mean a resolution wasn't met (along with empty cells)
+FALSY_STRINGS = ["0", "0.0", "False"]
 
 
 def get_index_response(prompt, num_cols):
@@ -19,62 +22,111 @@ def get_index_response(prompt, num_cols):
             continue
 
 
-df = pd.read_csv(f"../data/legacy/{filename}")
-col_list = list(df.columns)
-cols = ""
-for idx, col_name in enumerate(col_list):
-    cols += "{0:20}  {1}".format(col_name, idx)
-    cols += "\n"
-print("{0:20}  {1}".format("COLUMN", "INDEX"))
-print(cols)
-
-data_start = get_index_response("Index of first column containing resolution data: ", len(col_list))
-data_end = get_index_response("Index of last column containing resolution data: ", len(col_list))
-
-# Make new df for saving just the data we want
-df_cleaned = pd.DataFrame()
-
-# Split a column called "Date" or "date"
-try:
-    df_cleaned[['Month', 'Day', 'Year']] = df['Date'].str.split('/', expand=True)
-except KeyError as e:
-    print(f"No column called={e}: trying 'date' instead")
-    df_cleaned[['Month', 'Day', 'Year']] = df['date'].str.split('/', expand=True)
-# Convert 2-digit year to 4-digit year
-df_cleaned['Year'] = ["20" + year if len(year) == 2 else year for year in df_cleaned['Year']]
-df_cleaned['date'] = df_cleaned[['Month', 'Day', 'Year']].apply(lambda row: '/'.join(row.values), axis=1)
-df_cleaned['Month'] = df_cleaned['Month'].astype(int)
-df_cleaned['Day'] = df_cleaned['Day'].astype(int)
-df_cleaned['Year'] = df_cleaned['Year'].astype(int)
-
-# Replace falsy values with 0's, otherwise the boolean convqersion will return True for "0" and "0.0"
-df.fillna(0, inplace=True)
-clean_binary_dict = {
-    '0': 0,
-    '0.0': 0,
-    'False': 0,
-    False: 0,
-    'True': 1,
-    True: 1,
-}
-df.replace(clean_binary_dict, inplace=True)
-
-# Create new column that sums up total resolutions met per day
-resolution_bools = df.iloc[:, data_start:data_end + 1].astype(bool)
-df_cleaned['Resolutions Met'] = resolution_bools.sum(axis=1)
-
-# Copy over resolution columns as well as create new boolean columns from categorical resolutions
-start = data_start
-while start < data_end + 1:
-    end = start + 1
-    col_name = df.iloc[:, start:end].columns.values[0].lower()
-    df_cleaned[col_name] = df.iloc[:, start:end]
-    df_cleaned[f"{col_name}_bool"] = df.iloc[:, start:end].astype(bool).astype(int)
-    start += 1
-
-# Save cleaned df as CSV
-print("*** Saving cleaned csv to data/cleaned/")
-cleaned_path = "../data/cleaned"
-if not os.path.exists(cleaned_path):
-    os.makedirs(cleaned_path)
-df_cleaned.to_csv(f"{cleaned_path}/{filename}", index=False)
+def get_date_column(col_list):
+    """
+    Returns the name of the legacy date column ("Date" or "date").
+    Raises ValueError if there is neither.
+    """
+    if "Date" in col_list:
+        return "Date"
+    print("No column called='Date': trying 'date' instead")
+    if "date" not in col_list:
+        raise ValueError("Legacy data must have a date column called 'Date' or 'date'")
+    return "date"
+
+
+def convert_chunk(chunk, date_col, data_cols):
+    """
+    Converts a chunk of legacy rows (read as text) into cleaned rows: the date split into Month, Day and Year (with
+    2-digit years expanded), the number of resolutions met, and each resolution column followed by a {col}_bool column.
+    """
+    df_cleaned = pd.DataFrame(index=chunk.index)
+
+    # Split the date and convert 2-digit years to 4-digit years
+    date_parts = chunk[date_col].str.split("/", expand=True)
+    year = date_parts[2].where(date_parts[2].str.len() != 2, "20" + date_parts[2])
+    df_cleaned["Month"] = date_parts[0].astype(int)
+    df_cleaned["Day"] = date_parts[1].astype(int)
+    df_cleaned["Year"] = year.astype(int)
+    df_cleaned["date"] = date_parts[0] + "/" + date_parts[1] + "/" + year
+
+    # Falsy values become 0's and 'True' becomes 1, otherwise the boolean conversion would return True for "0" and "0.0"
+    values = chunk[data_cols]
+    met = values.notna() & ~values.isin(FALSY_STRINGS)
+    values = values.where(met, 0).mask(values == "True", 1)
+
+    # Create new column that sums up total resolutions met per day
+    df_cleaned["Resolutions Met"] = met.sum(axis=1)
+
+    # Copy over resolution columns as well as create new boolean columns from categorical resolutions
+    for col in data_cols:
+        col_name = col.lower()
+        df_cleaned[col_name] = values[col]
+        df_cleaned[f"{col_name}_bool"] = met[col].astype(int)
+    return df_cleaned
+
+
+def convert_legacy_file(legacy_path, cleaned_path, data_cols, chunksize=CHUNK_SIZE, verbose=True):
+    """
+    Streams the legacy CSV at legacy_path into a cleaned CSV at cleaned_path a chunk at a time, using data_cols as
+    resolution data.
+    Returns the number of rows converted.
+    """
+    date_col = get_date_column(list(pd.read_csv(legacy_path, nrows=0).columns))
+
+    # Write to a temporary file first so that an interrupted conversion never leaves a truncated CSV behind
+    tmp_path = f"{cleaned_path}.tmp"
+    num_rows = 0
+    reader = pd.read_csv(legacy_path, usecols=[date_col] + data_cols, dtype=str, chunksize=chunksize)
+    with open(tmp_path, "w", newline="") as f:
+        for chunk in reader:
+            convert_chunk(chunk, date_col, data_cols).to_csv(f, header=num_rows == 0, index=False)
+            num_rows += len(chunk)
+            if verbose:
+                print(f"*** Converted {num_rows} rows")
+    os.replace(tmp_path, cleaned_path)
+    return num_rows
+
+
+if __name__ == "__main__":
+    # INPUTS
+    parser = argparse.ArgumentParser(description="Convert a legacy spreadsheet in data/legacy into a cleaned CSV.")
+    parser.add_argument("filename", help="name of the legacy CSV in data/legacy")
+    parser.add_argument("--first", type=int, help="index of the first column containing resolution data")
+    parser.add_argument("--last", type=int, help="index of the last column containing resolution data")
+    parser.add_argument("--chunksize", type=int, default=CHUNK_SIZE,
+                        help=f"rows to convert at a time (default {CHUNK_SIZE})")
+    args = parser.parse_args()
+
+    legacy_path = f"../data/legacy/{args.filename}"
+    if not os.path.exists(legacy_path):
+        sys.exit(f"filepath={legacy_path} does not exist")
+    col_list = list(pd.read_csv(legacy_path, nrows=0).columns)
+
+    if args.first is None or args.last is None:
+        cols = ""
+        for idx, col_name in enumerate(col_list):
+            cols += "{0:20}  {1}".format(col_name, idx)
+            cols += "\n"
+        print("{0:20}  {1}".format("COLUMN", "INDEX"))
+        print(cols)
+
+    data_start = args.first
+    if data_start is None:
+        data_start = get_index_response("Index of first column containing resolution data: ", len(col_list))
+    data_end = args.last
+    if data_end is None:
+        data_end = get_index_response("Index of last column containing resolution data: ", len(col_list))
+    if not 0 <= data_start <= data_end < len(col_list):
+        sys.exit(f"Invalid column range {data_start}-{data_end} for a dataset with {len(col_list)} columns")
+
+    # Save cleaned rows as CSV
+    print("*** Saving cleaned csv to data/cleaned/")
+    cleaned_path = "../data/cleaned"
+    if not os.path.exists(cleaned_path):
+        os.makedirs(cleaned_path)
+    try:
+        convert_legacy_file(legacy_path, f"{cleaned_path}/{args.filename}", col_list[data_start:data_end + 1],
+                            chunksize=args.chunksize)
+    except ValueError as e:
+        sys.exit(str(e))
@@ -0,0 +1,128 @@
+import argparse
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+# Set parent directory
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from backpopulate_data import backpopulate_mapped_column, load_mapping, save_app_data
+from convert_legacy_resolutions import CHUNK_SIZE, convert_legacy_file
+from cli_resolve.utils.date_index import ResolutionData
+from cli_resolve.utils.date_utils import date_string_to_ordinal, ordinal_to_date_string
+from cli_resolve.utils.storage import get_store
+
+
+def convert_for_ingestion(filename, mapped_cols, chunksize=CHUNK_SIZE):
+    """
+    Converts the legacy CSV data/legacy/{filename} into data/cleaned/{filename}, using the columns named in mapped_cols
+    (compared case-insensitively) as resolution data, and reads back what's needed to backpopulate them.
+    Runs in a worker process, so only compact, plain data is returned: a dict with the file's days (as ordinals) and
+    the values of each mapped column found in it (see read_cleaned_columns()).
+    """
+    legacy_path = f"../data/legacy/{filename}"
+    cleaned_path = f"../data/cleaned/{filename}"
+    data_cols = [col for col in pd.read_csv(legacy_path, nrows=0).columns if col.lower() in mapped_cols]
+    convert_legacy_file(legacy_path, cleaned_path, data_cols, chunksize=chunksize, verbose=False)
+
+    ordinals, columns = read_cleaned_columns(cleaned_path, [col.lower() for col in data_cols], chunksize)
+    if not len(ordinals):
+        raise ValueError(f"{legacy_path} has no rows")
+    return {
+        "filename": filename,
+        "first_ordinal": int(ordinals.min()),
+        "last_ordinal": int(ordinals.max()),
+        "ordinals": ordinals,
+        "columns": columns,
+    }
+
+
+def read_cleaned_columns(cleaned_path, cols, chunksize=CHUNK_SIZE):
+    """
+    Reads the days and the cols of a cleaned CSV a chunk at a time, so that memory use stays flat however long it is.
+    Returns the ordinal of each row's day as an int32 array, along with a dict of each column's values (as text) as a
+    categorical Series, since legacy values repeat a lot and categoricals store them as small integer codes.
+    """
+    ordinals = []
+    parts = {col: [] for col in cols}
+    for chunk in pd.read_csv(cleaned_path, usecols=["date"] + cols, dtype=str, chunksize=chunksize):
+        ordinals.append(np.fromiter((date_string_to_ordinal(date_str) for date_str in chunk["date"]), dtype=np.int32,
+                                    count=len(chunk)))
+        for col in cols:
+            parts[col].append(chunk[col].astype("category"))
+    ordinals = np.concatenate(ordinals) if ordinals else np.array([], dtype=np.int32)
+    return ordinals, {col: pd.Series(union_categoricals(col_parts)) for col, col_parts in parts.items() if col_parts}
+
+
+def merge_converted_files(app_data, converted, mapping, strict=False):
+    """
+    Backpopulates app_data with the mapped columns of every converted file, using the same merge rules as
+    backpopulate_data.py: each resolution ends up created on the earliest date and expiring on the latest date across
+    the files holding it. In strict mode, codes that the mapping doesn't describe are an error.
+    Files are merged in order of their first date (then by name), so where files overlap, the later file's value for a
+    day always wins regardless of which worker finished first.
+    """
+    converted = sorted(converted, key=lambda result: (result["first_ordinal"], result["filename"]))
+    for col_name, spec in mapping.items():
+        holding = [result for result in converted if col_name in result["columns"]]
+        if not holding:
+            print(f"*** Skipping column={col_name}: not found in any file")
+            continue
+        # Only the column being merged is expanded into Python values
+        ordinals = np.concatenate([result["ordinals"] for result in holding])
+        dates = [ordinal_to_date_string(int(ordinal)) for ordinal in ordinals]
+        values = pd.concat([result["columns"][col_name].astype(object) for result in holding], ignore_index=True)
+        first_date = ordinal_to_date_string(min(result["first_ordinal"] for result in holding))
+        last_date = ordinal_to_date_string(max(result["last_ordinal"] for result in holding))
+        res_id = backpopulate_mapped_column(app_data, col_name, spec, values, dates, first_date, last_date,
+                                            strict=strict)
+        # Keep the resolution's data in date order, however the files interleaved, along with its date index
+        data = app_data[res_id]["data"]
+        app_data[res_id]["data"] = ResolutionData(sorted(data.items(),
+                                                         key=lambda item: date_string_to_ordinal(item[0])))
+
+
+if __name__ == "__main__":
+    # INPUTS
+    parser = argparse.ArgumentParser(description="Convert many legacy spreadsheets from data/legacy in parallel and "
+                                                 "import them all into app data at once.")
+    parser.add_argument("filenames", nargs="+", help="names of the legacy CSVs in data/legacy")
+    parser.add_argument("--mapping", required=True,
+                        help="JSON/YAML file describing how to import each column (see backpopulate_data.py)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                        help="number of processes to convert files with (default: one per CPU)")
+    parser.add_argument("--chunksize", type=int, default=CHUNK_SIZE,
+                        help=f"rows to convert at a time (default {CHUNK_SIZE})")
+    parser.add_argument("--strict", action="store_true",
+                        help="stop without saving if a column holds codes the mapping doesn't describe, instead of "
+                             "describing them as themselves")
+    args = parser.parse_args()
+
+    missing = [filename for filename in args.filenames if not os.path.exists(f"../data/legacy/{filename}")]
+    if missing:
+        sys.exit(f"filenames={missing} do not exist in data/legacy")
+    mapping = {col.lower(): spec for col, spec in load_mapping(args.mapping).items()}
+    cleaned_path = "../data/cleaned"
+    if not os.path.exists(cleaned_path):
+        os.makedirs(cleaned_path)
+
+    print(f"*** Converting {len(args.filenames)} files with {args.workers} workers")
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        futures = [executor.submit(convert_for_ingestion, filename, set(mapping), args.chunksize)
+                   for filename in args.filenames]
+        converted = []
+        for filename, future in zip(args.filenames, futures):
+            try:
+                converted.append(future.result())
+            except Exception as e:
+                # Nothing has been saved yet, so a bad file leaves app data untouched
+                sys.exit(f"Could not convert filename={filename}: {e}")
+            print(f"*** Converted {filename}")
+
+    # Load app data, merge everything in, and save it once
+    store = get_store(data_dir="../data")
+    app_data = store.load()
+    merge_converted_files(app_data, converted, mapping, strict=args.strict)
+    save_app_data(store, app_data, label=f"before ingesting {len(args.filenames)} files")
@@ -0,0 +1,13 @@
+import os
+import sys
+
+# Set parent directory
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from cli_resolve.utils.storage import migrate_json_to_sqlite
+
+print("*** Migrating data/resolutions.json to data/resolutions.db")
+try:
+    num_res = migrate_json_to_sqlite(data_dir="../data")
+except FileExistsError as e:
+    sys.exit(f"Nothing to do: {e}")
+print(f"*** Migrated {num_res} resolutions! Resolve will now use data/resolutions.db")
@@ -0,0 +1,58 @@
+import json
+import os
+import sys
+
+import pytest
+
+# Import the app's modules the way it does when run (`from utils.x import ...`)
+repo_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(repo_dir, "cli_resolve"))
+
+from utils import storage  # noqa: E402
+
+
+def make_res(data=None, is_binary=True, codes=None, is_active=True):
+    """
+    Returns a resolution dict as stored in data/resolutions.json.
+    """
+    return {
+        "res_descript": "test resolution",
+        "res_creation_date": "1/1/2022",
+        "is_active": is_active,
+        "res_expiration_date": None,
+        "is_binary": is_binary,
+        "res_detail_codes": codes or {},
+        "data": dict(data or {}),
+    }
+
+
+# Two resolutions whose data spans two years, one of them non-binary with a multi-code day
+ALL_RES = {
+    "run": make_res({"12/31/2021": True, "1/1/2022": True, "1/2/2022": False}),
+    "read": make_res({"1/2/2022": "R,B", "1/3/2022": False}, is_binary=False, codes={"R": "novel", "B": "book"}),
+}
+
+
+def plain(all_res_dict):
+    """
+    Returns all_res_dict with plain dicts for data, to compare stores by value.
+    """
+    return {res_id: {**res, "data": dict(res["data"])} for res_id, res in all_res_dict.items()}
+
+
+@pytest.fixture
+def workspace(tmp_path, monkeypatch):
+    """
+    Runs the test from an empty temporary folder holding a data dir, with no stores shared from earlier tests.
+    Returns a function that writes a dict of all resolutions to data/resolutions.json.
+    """
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.delenv(storage.STORAGE_ENV_VAR, raising=False)
+    monkeypatch.setattr(storage, "_stores", {})
+    (tmp_path / "data").mkdir()
+
+    def write_resolutions(all_res_dict):
+        with open("data/resolutions.json", "w") as f:
+            json.dump(all_res_dict, f, indent=4)
+
+    return write_resolutions
@@ -0,0 +1,67 @@
+import os
+import sys
+
+import pytest
+
+from conftest import make_res, repo_dir
+
+sys.path.insert(0, os.path.join(repo_dir, "scripts"))
+from backpopulate_data import backpopulate_from_mapping, read_dataset  # noqa: E402
+
+CLEANED_CSV = """date,exercise,mood,reading
+01/01/2022,1,R,1
+01/02/2022,0,"r, b",2
+01/03/2022,,running,0
+01/04/2022,1,0,
+"""
+
+
+@pytest.fixture
+def df(tmp_path):
+    path = tmp_path / "cleaned.csv"
+    path.write_text(CLEANED_CSV)
+    return read_dataset(str(path))
+
+
+def test_numeric_codes_are_not_read_as_floats(df):
+    app_data = {}
+    backpopulate_from_mapping(df, app_data, {"reading": {"codes": {"1": "novel", "2": "poetry"}}})
+    assert app_data["reading"]["data"] == {"1/1/2022": "1", "1/2/2022": "2", "1/3/2022": False, "1/4/2022": False}
+    assert app_data["reading"]["res_detail_codes"] == {"1": "novel", "2": "poetry"}
+
+
+def test_mapping_recodes_and_splits_codes(df):
+    app_data = {}
+    backpopulate_from_mapping(df, app_data, {"mood": {"codes": {"R": "run", "B": "bike"}, "recode": {"running": "r"}}})
+    res = app_data["mood"]
+    assert not res["is_binary"]
+    assert res["data"] == {"1/1/2022": "R", "1/2/2022": "R,B", "1/3/2022": "R", "1/4/2022": False}
+    assert res["res_detail_codes"] == {"R": "run", "B": "bike"}
+
+
+def test_mapping_detects_binary_columns(df):
+    app_data = {}
+    backpopulate_from_mapping(df, app_data, {"exercise": {}})
+    res = app_data["exercise"]
+    assert res["is_binary"]
+    assert res["data"] == {"1/1/2022": True, "1/2/2022": False, "1/3/2022": False, "1/4/2022": True}
+    assert res["res_creation_date"] == "1/1/2022"
+    assert res["res_expiration_date"] == "1/4/2022"
+
+
+def test_mapping_merges_into_existing_resolution(df):
+    app_data = {"exercise": make_res({"12/31/2021": True})}
+    backpopulate_from_mapping(df, app_data, {"exercise": {}})
+    assert app_data["exercise"]["data"]["12/31/2021"] is True
+    assert app_data["exercise"]["data"]["1/4/2022"] is True
+
+
+def test_strict_mapping_refuses_undescribed_codes(df):
+    app_data = {}
+    with pytest.raises(SystemExit, match=r"Codes=\['B'\] in column=mood"):
+        backpopulate_from_mapping(df, app_data, {"mood": {"codes": {"R": "run"}, "recode": {"running": "R"}}},
+                                  strict=True)
+
+    app_data = {}
+    backpopulate_from_mapping(df, app_data, {"mood": {"codes": {"R": "run"}, "recode": {"running": "R"}}})
+    assert app_data["mood"]["res_detail_codes"] == {"R": "run", "B": "B"}
@@ -0,0 +1,27 @@
+import pytest
+
+from conftest import make_res
+from utils import export_utils
+from utils.export_utils import get_cleaned_frame
+from utils.storage import get_store
+
+
+@pytest.mark.parametrize("file_format", ["csv", "parquet"])
+def test_cached_frame_matches_built_frame(workspace, monkeypatch, file_format):
+    if file_format == "parquet":
+        pytest.importorskip("pyarrow")
+    monkeypatch.setattr(export_utils, "CLEANED_FORMAT", file_format)
+    workspace({
+        "run": make_res({"1/1/2022": True, "1/3/2022": False}),
+        "read": make_res({"1/2/2022": "R,B", "1/4/2022": False}, is_binary=False, codes={"R": "novel", "B": "book"}),
+        # A non-binary resolution without any codes in the range reads back from CSV as numbers unless normalized
+        "draw": make_res({"1/2/2022": False}, is_binary=False, codes={"P": "pencil"}),
+    })
+    all_res_dict = get_store().load()
+
+    built = get_cleaned_frame(all_res_dict, "1/1/2022", "12/31/2022")
+    cached = get_cleaned_frame(all_res_dict, "1/1/2022", "12/31/2022")
+    assert dict(built.dtypes) == dict(cached.dtypes)
+    assert built.equals(cached)
+    assert list(built["read"][:4]) == ["0", "R,B", "0", "0"]
+    assert set(built["draw"]) == {"0"}
@@ -0,0 +1,16 @@
+import copy
+import pickle
+
+from utils.date_index import ResolutionData
+from utils.date_utils import date_string_to_ordinal
+
+
+def test_pickle_round_trip_keeps_index():
+    data = ResolutionData({"1/3/2022": "R", "12/31/2021": True, "1/1/2022": False})
+    for restored in (pickle.loads(pickle.dumps(data)), copy.deepcopy(data)):
+        assert isinstance(restored, ResolutionData)
+        assert restored == data
+        assert restored.ordinals == data.ordinals
+        restored["1/2/2022"] = True
+        assert restored.key_for(date_string_to_ordinal("1/2/2022")) == "1/2/2022"
+        assert "1/2/2022" not in data
@@ -0,0 +1,23 @@
+import pytest
+
+from utils.date_utils import date_string_to_ordinal, ordinal_to_date_string
+from utils.input_utils import parse_date_string
+
+
+@pytest.mark.parametrize("date_str", ["1/5/2022", "01/05/2022", "12/31/1999"])
+def test_valid_dates_round_trip(date_str):
+    assert ordinal_to_date_string(date_string_to_ordinal(date_str)) == date_str.replace("01/05", "1/5")
+
+
+@pytest.mark.parametrize("date_str", ["1/5/22", "1/5/0022", "1/5/20222", "2/30/2022", "13/1/2022", "1/5", "a/b/cdef",
+                                      " 1/5/2022", "1/5/+202", "001/5/2022"])
+def test_invalid_dates_are_rejected(date_str):
+    with pytest.raises(ValueError, match="Invalid date"):
+        date_string_to_ordinal(date_str)
+
+
+def test_parse_date_string_needs_4_digit_years():
+    assert parse_date_string("2022", year_start=True) == "1/1/2022"
+    assert parse_date_string("2022", year_end=True) == "12/31/2022"
+    with pytest.raises(ValueError):
+        parse_date_string("22", year_start=True)
@@ -0,0 +1,91 @@
+import json
+
+import pytest
+
+from conftest import make_res
+from export import write_csv_export
+from utils.storage import get_store
+
+EXPORT_PATH = "data/exports/res_1-1-2022_12-31-2022.csv"
+META_PATH = "data/exports/res_1-1-2022_12-31-2022.meta.json"
+
+
+def read_export():
+    with open(EXPORT_PATH, "rb") as f:
+        return f.read()
+
+
+def full_export():
+    assert write_csv_export("1/1/2022", "12/31/2022")
+    return read_export()
+
+
+def log(res_id, date_str, value):
+    get_store().update(entries=[(res_id, date_str, value)])
+
+
+def test_incremental_export_matches_full_export(workspace):
+    workspace({"run": make_res({"1/1/2022": True, "1/2/2022": False}),
+               "read": make_res({"1/2/2022": "B"}, is_binary=False, codes={"B": "book"})})
+    assert write_csv_export("1/1/2022", "12/31/2022", incremental=True)
+    # Every day of the range gets a row, as with a full export
+    assert read_export().count(b"\n") == 1 + 365
+    assert read_export() == full_export()
+
+    write_csv_export("1/1/2022", "12/31/2022", incremental=True)
+    log("run", "3/1/2022", True)
+    log("read", "3/2/2022", "B")
+    assert write_csv_export("1/1/2022", "12/31/2022", incremental=True)
+    with open(META_PATH) as f:
+        assert json.load(f)["written_through"] == "3/2/2022"
+    appended = read_export()
+    assert appended == full_export()
+
+
+def test_incremental_export_appends_only_new_days(workspace, capsys):
+    workspace({"run": make_res({"1/1/2022": True})})
+    write_csv_export("1/1/2022", "12/31/2022", incremental=True)
+    assert write_csv_export("1/1/2022", "12/31/2022", incremental=True)
+    assert "already up to date" in capsys.readouterr().out
+
+    log("run", "1/5/2022", True)
+    write_csv_export("1/1/2022", "12/31/2022", incremental=True)
+    assert "Appending 4 day(s)" in capsys.readouterr().out
+
+
+def test_incremental_export_is_rewritten_when_old_days_change(workspace, capsys):
+    workspace({"run": make_res({"1/1/2022": True, "1/5/2022": True})})
+    write_csv_export("1/1/2022", "12/31/2022", incremental=True)
+    # A day backfilled before the high-water mark changes what the export should hold
+    log("run", "1/3/2022", True)
+    capsys.readouterr()
+    write_csv_export("1/1/2022", "12/31/2022", incremental=True)
+    assert "Appending" not in capsys.readouterr().out
+    assert read_export() == full_export()
+
+
+@pytest.mark.parametrize("edited_day", ["1/2/2022", "1/31/2022"])
+def test_incremental_export_is_rewritten_when_exported_values_are_edited(workspace, capsys, edited_day):
+    workspace({"run": make_res({f"1/{day}/2022": False for day in range(1, 32)})})
+    write_csv_export("1/1/2022", "12/31/2022", incremental=True)
+    # Editing a day already exported (including the high-water mark itself) changes neither the days with data nor the
+    # high-water mark
+    log("run", edited_day, True)
+    capsys.readouterr()
+    write_csv_export("1/1/2022", "12/31/2022", incremental=True)
+    out = capsys.readouterr().out
+    assert "already up to date" not in out and "Appending" not in out
+    assert f"{edited_day},1".encode() in read_export()
+    assert read_export() == full_export()
+
+
+def test_incremental_export_is_rewritten_when_file_was_modified(workspace, capsys):
+    workspace({"run": make_res({"1/1/2022": True})})
+    write_csv_export("1/1/2022", "12/31/2022", incremental=True)
+    with open(EXPORT_PATH, "ab") as f:
+        f.write(b"garbage\r\n")
+    log("run", "1/2/2022", True)
+    capsys.readouterr()
+    write_csv_export("1/1/2022", "12/31/2022", incremental=True)
+    assert "Appending" not in capsys.readouterr().out
+    assert read_export() == full_export()
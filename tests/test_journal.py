@@ -0,0 +1,79 @@
+import json
+import os
+
+from conftest import make_res, plain
+from utils.storage import JournalStore
+
+
+def make_journal(tmp_path, compaction_threshold=256 * 1024):
+    return JournalStore(str(tmp_path / "resolutions.json"), str(tmp_path / "resolutions.journal.jsonl"),
+                        compaction_threshold=compaction_threshold)
+
+
+def plain_data(store, res_id="run"):
+    return dict(store.load()[res_id]["data"])
+
+
+def test_replay_skips_torn_record(tmp_path, capsys):
+    store = make_journal(tmp_path)
+    store.save({"run": make_res({"1/1/2022": True})})
+    store.update(entries=[("run", "1/2/2022", True)])
+    # A crash mid-append leaves half a record at the end of the journal
+    with open(store.journal_path, "a") as f:
+        f.write('{"date": "1/3/2022", "res_id": "ru')
+
+    assert plain_data(make_journal(tmp_path)) == {"1/1/2022": True, "1/2/2022": True}
+    assert "Skipping incomplete journal record" in capsys.readouterr().out
+
+
+def test_torn_record_is_cut_off_before_next_append(tmp_path):
+    store = make_journal(tmp_path)
+    store.save({"run": make_res()})
+    store.update(entries=[("run", "1/1/2022", True)])
+    with open(store.journal_path, "a") as f:
+        f.write('{"date": "1/2/2022", "res_id": "ru')
+
+    restarted = make_journal(tmp_path)
+    restarted.load()
+    restarted.update(entries=[("run", "1/3/2022", False)])
+    with open(store.journal_path) as f:
+        records = [json.loads(line) for line in f]
+    assert [record["date"] for record in records] == ["1/1/2022", "1/3/2022"]
+    assert plain_data(make_journal(tmp_path)) == {"1/1/2022": True, "1/3/2022": False}
+
+
+def test_journal_is_compacted_past_threshold(tmp_path):
+    store = make_journal(tmp_path, compaction_threshold=200)
+    store.save({"run": make_res()})
+    store.load()
+    store.update(entries=[("run", "1/1/2022", True)])
+    # Below the threshold, entries only go to the journal
+    assert os.path.getsize(store.journal_path) > 0
+    with open(store.path) as f:
+        assert json.load(f)["run"]["data"] == {}
+
+    store.update(entries=[("run", f"1/{day}/2022", True) for day in range(2, 6)])
+    # Past it, the journal is folded into resolutions.json and emptied
+    assert os.path.getsize(store.journal_path) == 0
+    with open(store.path) as f:
+        assert json.load(f)["run"]["data"] == {f"1/{day}/2022": True for day in range(1, 6)}
+
+
+def test_restart_after_compaction_keeps_data(tmp_path):
+    store = make_journal(tmp_path, compaction_threshold=200)
+    store.save({"run": make_res(), "read": make_res(is_binary=False)})
+    store.load()
+    store.update(entries=[("run", f"1/{day}/2022", True) for day in range(1, 6)])
+    store.update(resolutions={"read": {**make_res(is_binary=False), "is_active": False}},
+                 entries=[("run", "1/1/2022", False)])
+    expected = plain(store.load())
+    assert expected["run"]["data"]["1/1/2022"] is False
+
+    # A crash between replacing resolutions.json and emptying the journal leaves records that are already in the
+    # base file; replaying them again must not change anything
+    with open(store.journal_path, "w") as f:
+        f.write(json.dumps({"date": "1/3/2022", "res_id": "run", "value": True}) + "\n")
+    restarted = make_journal(tmp_path, compaction_threshold=200)
+    assert plain(restarted.load()) == expected
+    restarted.compact()
+    assert plain(make_journal(tmp_path).load()) == expected
@@ -0,0 +1,31 @@
+import pytest
+
+from commands import get_parser, run_command
+from conftest import make_res
+from utils.input_utils import format_detail_codes, get_detail_code_response, parse_detail_codes
+from utils.storage import get_store
+
+CODES = {"R": "run", "B": "bike"}
+
+
+@pytest.mark.parametrize("typed", ["r,b", "R,B", "r, b", " R , b "])
+def test_format_detail_codes(typed):
+    assert parse_detail_codes(typed) == ["R", "B"]
+    assert format_detail_codes(typed) == "R,B"
+
+
+@pytest.mark.parametrize("typed", ["RB", "R,,B", ""])
+def test_parse_detail_codes_rejects_bad_codes(typed):
+    with pytest.raises(ValueError):
+        parse_detail_codes(typed)
+
+
+@pytest.mark.parametrize("typed", ["r, b", "R,B"])
+def test_cli_and_menu_store_codes_the_same_way(workspace, monkeypatch, typed):
+    workspace({"exercise": make_res(is_binary=False, codes=dict(CODES))})
+    args = get_parser().parse_args(["log", "--date", "1/5/2022", f"exercise={typed}"])
+    assert run_command(args) == 0
+    assert get_store().load()["exercise"]["data"]["1/5/2022"] == "R,B"
+
+    monkeypatch.setattr("builtins.input", lambda prompt: typed)
+    assert get_detail_code_response("- Did you exercise? ", dict(CODES)) == "R,B"
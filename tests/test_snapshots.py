@@ -0,0 +1,128 @@
+import os
+
+import pytest
+
+from conftest import ALL_RES, plain
+from utils.snapshots import SnapshotStore, select_snapshots_to_keep
+from utils.storage import get_store
+
+# Two snapshots on Jan 1, one on Jan 2, one on Feb 15 and two on Mar 1 (oldest first)
+IDS = ["20260101-000000-000001", "20260101-120000-000000", "20260102-000000-000000", "20260215-000000-000000",
+       "20260301-000000-000000", "20260301-100000-000000"]
+
+
+def object_files(snapshots):
+    return [os.path.join(root, filename) for root, _, filenames in os.walk(snapshots.objects_path)
+            for filename in filenames]
+
+
+@pytest.mark.parametrize("keep_last, keep_daily, keep_monthly, expected", [
+    (0, 0, 0, []),
+    (2, 0, 0, IDS[4:]),
+    (len(IDS) + 5, 0, 0, IDS),
+    # The newest snapshot of each of the last 2 days with snapshots
+    (0, 2, 0, [IDS[3], IDS[5]]),
+    (0, 10, 0, [IDS[1], IDS[2], IDS[3], IDS[5]]),
+    # The newest snapshot of each of the last 2 months with snapshots
+    (0, 0, 2, [IDS[3], IDS[5]]),
+    (0, 0, 10, [IDS[2], IDS[3], IDS[5]]),
+    (1, 2, 3, [IDS[2], IDS[3], IDS[5]]),
+    (3, 1, 1, IDS[3:]),
+])
+def test_select_snapshots_to_keep(keep_last, keep_daily, keep_monthly, expected):
+    assert sorted(select_snapshots_to_keep(IDS, keep_last, keep_daily, keep_monthly)) == expected
+
+
+def test_select_snapshots_to_keep_with_no_snapshots():
+    assert select_snapshots_to_keep([], 10, 14, 12) == set()
+
+
+def test_take_then_load(tmp_path):
+    snapshots = SnapshotStore(str(tmp_path / "snapshots"))
+    snapshot_id = snapshots.take(plain(ALL_RES), label="test")
+    assert plain(snapshots.load(snapshot_id)) == ALL_RES
+    [summary] = snapshots.list_snapshots()
+    assert summary == {"id": snapshot_id, "created": summary["created"], "label": "test", "num_resolutions": 2,
+                       "num_entries": 5}
+
+
+def test_take_returns_latest_id_when_nothing_changed(tmp_path):
+    snapshots = SnapshotStore(str(tmp_path / "snapshots"))
+    first = snapshots.take(plain(ALL_RES))
+    num_objects = len(object_files(snapshots))
+    assert snapshots.take(plain(ALL_RES), label="again") == first
+    assert snapshots.snapshot_ids() == [first]
+    assert len(object_files(snapshots)) == num_objects
+
+
+def test_take_only_stores_changed_chunks(tmp_path):
+    snapshots = SnapshotStore(str(tmp_path / "snapshots"))
+    snapshots.take(plain(ALL_RES))
+    num_objects = len(object_files(snapshots))
+    changed = plain(ALL_RES)
+    changed["run"]["data"]["1/5/2022"] = True
+    second = snapshots.take(changed)
+    # Only the 2022 chunk of "run" is new
+    assert len(object_files(snapshots)) == num_objects + 1
+    assert plain(snapshots.load(second)) == changed
+
+
+def test_load_unknown_snapshot(tmp_path):
+    with pytest.raises(ValueError, match="No snapshot"):
+        SnapshotStore(str(tmp_path / "snapshots")).load("20260101-000000-000000")
+
+
+def test_collect_garbage_keeps_referenced_chunks(tmp_path):
+    snapshots = SnapshotStore(str(tmp_path / "snapshots"))
+    first = snapshots.take(plain(ALL_RES), prune=False)
+    changed = plain(ALL_RES)
+    changed["read"]["data"]["1/2/2022"] = "B"
+    second = snapshots.take(changed, prune=False)
+    # A chunk left behind by an interrupted snapshot
+    stray_dir = f"{snapshots.objects_path}/ff"
+    os.makedirs(stray_dir)
+    open(f"{stray_dir}/{'f' * 62}", "w").close()
+
+    assert snapshots.collect_garbage() == 1
+    assert not os.path.exists(stray_dir)
+    assert plain(snapshots.load(first)) == ALL_RES
+    assert plain(snapshots.load(second)) == changed
+
+    os.remove(f"{snapshots.manifests_path}/{first}.json")
+    snapshots.collect_garbage()
+    assert plain(snapshots.load(second)) == changed
+
+
+def test_prune_everything_leaves_no_chunks(tmp_path):
+    snapshots = SnapshotStore(str(tmp_path / "snapshots"))
+    snapshots.take(plain(ALL_RES))
+    assert len(snapshots.prune(keep_last=0, keep_daily=0, keep_monthly=0)) == 1
+    assert snapshots.snapshot_ids() == []
+    assert os.listdir(snapshots.objects_path) == []
+
+
+@pytest.mark.parametrize("backend", ["json", "journal", "sqlite"])
+def test_restore_round_trip(workspace, monkeypatch, backend):
+    workspace(plain(ALL_RES))
+    if backend == "sqlite":
+        from utils.storage import migrate_json_to_sqlite
+        migrate_json_to_sqlite()
+    monkeypatch.setenv("RESOLVE_STORAGE", backend)
+    store = get_store()
+    store.load()
+
+    changed = plain(ALL_RES)
+    changed["run"]["data"]["1/1/2022"] = False
+    del changed["read"]
+    # Saving snapshots what was saved before it
+    store.save(changed)
+    before_save = store.snapshots.latest()
+    assert plain(store.snapshots.load(before_save)) == ALL_RES
+
+    store.restore(before_save)
+    assert plain(store.load()) == ALL_RES
+    # The restore can itself be undone
+    before_restore = store.snapshots.latest()
+    assert store.snapshots.read_manifest(before_restore)["label"] == f"before restoring {before_save}"
+    store.restore(before_restore)
+    assert plain(store.load()) == changed
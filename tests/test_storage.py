@@ -0,0 +1,98 @@
+import os
+
+import pytest
+
+from conftest import ALL_RES, make_res, plain
+from utils.date_index import ResolutionData
+from utils.storage import JSONStore, JournalStore, SQLiteStore, get_store, migrate_json_to_sqlite
+
+def make_store(backend, tmp_path):
+    if backend == "json":
+        return JSONStore(str(tmp_path / "resolutions.json"))
+    if backend == "journal":
+        return JournalStore(str(tmp_path / "resolutions.json"), str(tmp_path / "resolutions.journal.jsonl"))
+    return SQLiteStore(str(tmp_path / "resolutions.db"))
+
+
+@pytest.fixture(params=["json", "journal", "sqlite"])
+def store(request, tmp_path):
+    store = make_store(request.param, tmp_path)
+    store.save(plain(ALL_RES))
+    yield store
+    if isinstance(store, SQLiteStore):
+        store.close()
+
+
+def test_save_then_load(store):
+    all_res_dict = store.load()
+    assert plain(all_res_dict) == ALL_RES
+    assert all(isinstance(res["data"], ResolutionData) for res in all_res_dict.values())
+
+
+def test_update_is_persisted(store, tmp_path):
+    store.load()
+    read = {**ALL_RES["read"], "is_active": False}
+    store.update(resolutions={"read": read, "new": make_res()},
+                 entries=[("run", "1/4/2022", True), ("run", "1/1/2022", False), ("read", "1/4/2022", "B")])
+    if isinstance(store, SQLiteStore):
+        store.close()
+    # Read back from disk with a new store, as the next run would
+    reloaded = plain(make_store({JSONStore: "json", JournalStore: "journal", SQLiteStore: "sqlite"}[type(store)],
+                                tmp_path).load())
+    assert reloaded["run"]["data"] == {**ALL_RES["run"]["data"], "1/1/2022": False, "1/4/2022": True}
+    assert reloaded["read"]["is_active"] is False
+    assert reloaded["read"]["data"] == {**ALL_RES["read"]["data"], "1/4/2022": "B"}
+    assert reloaded["new"] == make_res()
+
+
+def test_save_replaces_everything(store):
+    store.save({"only": make_res({"2/1/2022": True})})
+    assert plain(store.load()) == {"only": make_res({"2/1/2022": True})}
+
+
+def test_migrate_json_to_sqlite(tmp_path):
+    JSONStore(str(tmp_path / "resolutions.json")).save(plain(ALL_RES))
+    journal = JournalStore(str(tmp_path / "resolutions.json"), str(tmp_path / "resolutions.journal.jsonl"))
+    journal.update(entries=[("run", "1/3/2022", True)])
+
+    assert migrate_json_to_sqlite(data_dir=str(tmp_path)) == 2
+    store = SQLiteStore(str(tmp_path / "resolutions.db"))
+    assert plain(store.load())["run"]["data"] == {**ALL_RES["run"]["data"], "1/3/2022": True}
+    store.close()
+    # The JSON file is left as it was
+    assert plain(JSONStore(str(tmp_path / "resolutions.json")).load()) == ALL_RES
+    assert not os.path.exists(tmp_path / "resolutions.db.tmp")
+
+
+def test_migrate_json_to_sqlite_refuses_to_overwrite(tmp_path):
+    JSONStore(str(tmp_path / "resolutions.json")).save(plain(ALL_RES))
+    SQLiteStore(str(tmp_path / "resolutions.db")).close()
+    with pytest.raises(FileExistsError):
+        migrate_json_to_sqlite(data_dir=str(tmp_path))
+    assert plain(SQLiteStore(str(tmp_path / "resolutions.db")).load()) == {}
+
+
+def test_get_store_picks_backend_from_files(workspace):
+    workspace(plain(ALL_RES))
+    assert type(get_store()) is JSONStore
+    open("data/resolutions.journal.jsonl", "w").close()
+    assert type(get_store()) is JournalStore
+    migrate_json_to_sqlite()
+    assert type(get_store()) is SQLiteStore
+
+
+@pytest.mark.parametrize("backend, store_class", [("json", JSONStore), ("journal", JournalStore),
+                                                  ("sqlite", SQLiteStore)])
+def test_get_store_picks_backend_from_environment(workspace, monkeypatch, backend, store_class):
+    workspace(plain(ALL_RES))
+    monkeypatch.setenv("RESOLVE_STORAGE", backend)
+    store = get_store()
+    assert type(store) is store_class
+    # Stores are shared for the lifetime of the process
+    assert get_store() is store
+
+
+def test_get_store_rejects_unknown_backend(workspace, monkeypatch):
+    monkeypatch.setenv("RESOLVE_STORAGE", "csv")
+    with pytest.raises(ValueError, match="Unknown storage backend"):
+        get_store()